@@ -0,0 +1,188 @@
+"""Generate synthetic repositories to benchmark docu-gen against.
+
+Every file is a copy of a template module whose classes and functions are renamed
+so no two files share a snippet, with its docstrings stripped by DocstringRemover.
+
+Usage:
+    python -m benchmarks.corpus OUTPUT_DIR --files 1000
+"""
+
+import os
+import glob
+import random
+import argparse
+import libcst as cst
+from docu_gen.core.docstring_remover import DocstringRemover
+
+TEMPLATES = os.path.join(os.path.dirname(__file__), os.pardir, "example_project")
+
+FILES_PER_PACKAGE = 50
+
+
+class _DefinitionRenamer(cst.CSTTransformer):
+    """Append a suffix to every class and function defined in a module."""
+
+    def __init__(self, names, suffix):
+        """Initialize the renamer.
+
+        Args:
+            names (set): The names of the classes and functions to rename.
+            suffix (str): The suffix appended to each of them.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.names = names
+        self.suffix = suffix
+
+    def leave_Name(self, original_node, updated_node):
+        """Rename a reference to one of the module's definitions.
+
+        Args:
+            original_node (cst.Name): The original name node.
+            updated_node (cst.Name): The updated name node.
+
+        Returns:
+            cst.Name: The renamed node, or the node unchanged.
+
+        Raises:
+            None
+        """
+        if updated_node.value in self.names and not updated_node.value.startswith("__"):
+            return updated_node.with_changes(value=updated_node.value + self.suffix)
+        return updated_node
+
+
+def load_templates(template_dir=TEMPLATES):
+    """Parse every non-empty template module.
+
+    Args:
+        template_dir (str, optional): The directory holding the templates.
+            Defaults to ``example_project``.
+
+    Returns:
+        list: (name, cst.Module, names of its definitions) tuples.
+
+    Raises:
+        None
+    """
+    templates = []
+    for path in sorted(glob.glob(os.path.join(template_dir, "*.py"))):
+        with open(path, "r", encoding="utf-8") as f:
+            source_code = f.read()
+        try:
+            module = cst.parse_module(source_code)
+        except cst.ParserSyntaxError:
+            continue
+        names = {
+            node.name.value
+            for node in _walk(module)
+            if isinstance(node, (cst.ClassDef, cst.FunctionDef))
+        }
+        if names:
+            templates.append((os.path.basename(path), module, names))
+    return templates
+
+
+def _walk(node):
+    """Yield a node and all of its descendants.
+
+    Args:
+        node (cst.CSTNode): The root node.
+
+    Returns:
+        generator: The nodes in pre-order.
+
+    Raises:
+        None
+    """
+    yield node
+    for child in node.children:
+        yield from _walk(child)
+
+
+def render_file(template, number, strip=True):
+    """Render one corpus file from a template.
+
+    Args:
+        template (tuple): A template as returned by load_templates.
+        number (int): The file number, used to make the definitions unique.
+        strip (bool, optional): Remove the docstrings. Defaults to True.
+
+    Returns:
+        str: The source code of the file.
+
+    Raises:
+        None
+    """
+    _, module, names = template
+    module = module.visit(_DefinitionRenamer(names, f"_{number}"))
+    if strip:
+        module = module.visit(DocstringRemover())
+    return module.code
+
+
+def generate_corpus(output_dir, files, seed=0, strip=True, template_dir=TEMPLATES):
+    """Write a synthetic repository of ``files`` modules.
+
+    Modules are spread over packages of FILES_PER_PACKAGE files each.
+
+    Args:
+        output_dir (str): The directory to create the repository in.
+        files (int): The number of modules to write.
+        seed (int, optional): Seed for the choice of templates. Defaults to 0.
+        strip (bool, optional): Remove the docstrings. Defaults to True.
+        template_dir (str, optional): The directory holding the templates.
+
+    Returns:
+        list: The paths of the written modules.
+
+    Raises:
+        ValueError: If no usable template is found.
+    """
+    templates = load_templates(template_dir)
+    if not templates:
+        raise ValueError(f"No template modules found in '{template_dir}'.")
+    rng = random.Random(seed)
+    paths = []
+    for number in range(files):
+        package = os.path.join(output_dir, f"pkg_{number // FILES_PER_PACKAGE}")
+        os.makedirs(package, exist_ok=True)
+        template = rng.choice(templates)
+        path = os.path.join(package, f"{os.path.splitext(template[0])[0]}_{number}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_file(template, number, strip=strip))
+        paths.append(path)
+    return paths
+
+
+def main():
+    """Generate a corpus from the command line.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir", help="Directory to create the corpus in.")
+    parser.add_argument("--files", type=int, default=200, help="Number of modules.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--keep-docstrings",
+        action="store_true",
+        help="Keep the docstrings of the templates.",
+    )
+    args = parser.parse_args()
+    paths = generate_corpus(
+        args.output_dir, args.files, seed=args.seed, strip=not args.keep_docstrings
+    )
+    print(f"Wrote {len(paths)} modules to '{args.output_dir}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Time file discovery on a repository cluttered with environments and dependencies.
+
+A temporary git repository is filled with a small source tree, a virtual
+environment, ``node_modules``, a build directory and an ignored data directory,
+and its Python files are discovered with and without ignore files and with
+``git ls-files``. The modes that leave the clutter out must find the same files.
+
+Usage:
+    python -m benchmarks.discovery --source-files 2000 --clutter-files 100000
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import subprocess
+from docu_gen.core.discovery import iter_python_files
+
+# Directories filled with clutter; "build/" and "data/" are left out by the
+# repository's .gitignore, the others by their names as well.
+CLUTTER = (".venv/lib/site-packages", "node_modules/pkg", "build/lib", "data/raw")
+
+
+def build_tree(directory, source_files, clutter_files, files_per_directory=50):
+    """Create the repository.
+
+    Args:
+        directory (str): An empty directory.
+        source_files (int): Number of Python files to document.
+        clutter_files (int): Number of files in the clutter directories, a
+            quarter of them Python files.
+        files_per_directory (int, optional): Files per leaf directory.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the repository cannot be created.
+    """
+    subprocess.run(["git", "init", "-q", directory], check=True)
+    with open(os.path.join(directory, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write(".venv/\nnode_modules/\nbuild/\n/data/\n")
+
+    def fill(root, count, suffixes):
+        for number in range(count):
+            leaf = os.path.join(root, f"d{number // files_per_directory}")
+            if number % files_per_directory == 0:
+                os.makedirs(leaf, exist_ok=True)
+            suffix = suffixes[number % len(suffixes)]
+            with open(os.path.join(leaf, f"m{number}{suffix}"), "w") as f:
+                f.write("x = 1\n")
+
+    fill(os.path.join(directory, "src"), source_files, (".py",))
+    for clutter in CLUTTER:
+        fill(
+            os.path.join(directory, clutter),
+            clutter_files // len(CLUTTER),
+            (".py", ".pyc", ".js", ".txt"),
+        )
+
+
+def main():
+    """Run the measurement from the command line.
+
+    Returns:
+        None
+
+    Raises:
+        SystemExit: With status 1 if the modes that leave the clutter out
+            disagree.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--source-files", type=int, default=2000, help="Python files to document."
+    )
+    parser.add_argument(
+        "--clutter-files",
+        type=int,
+        default=100000,
+        help="Files in environment, dependency, build and data directories.",
+    )
+    parser.add_argument(
+        "--exclude",
+        nargs="*",
+        default=["*/tests/*", "*/docs/*", "*_pb2.py"],
+        help="Exclusion patterns applied in every mode.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_tree(directory, args.source_files, args.clutter_files)
+        modes = {
+            "everything": {"use_ignore_files": False},
+            "ignore files": {},
+            "git ls-files": {"use_git": True},
+        }
+        found = {}
+        for mode, options in modes.items():
+            start = time.perf_counter()
+            found[mode] = set(iter_python_files([directory], args.exclude, **options))
+            seconds = time.perf_counter() - start
+            print(f"{mode:<14} {len(found[mode]):>8} files {seconds:>8.3f}s")
+    if found["ignore files"] != found["git ls-files"]:
+        print("ignore files and git ls-files found different files")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Measure the import time of the CLI entry points and enforce a budget.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime``. The
+best cumulative time over several runs is compared with the entry point's
+budget, and the modules that only the work itself needs (the OpenAI and Azure
+SDKs, libcst) must not be imported at all.
+
+Usage:
+    python -m benchmarks.import_time --repeat 5
+"""
+
+import sys
+import argparse
+import subprocess
+
+# (module, budget in milliseconds, modules it must not import). The CLI decides
+# what to do before anything heavy is needed; the runner is all a no-op run over
+# unchanged files uses.
+ENTRY_POINTS = [
+    ("docu_gen.cli", 60, ("openai", "httpx", "azure", "libcst")),
+    ("docu_gen.core.runner", 120, ("openai", "httpx", "azure", "libcst")),
+]
+
+
+def measure(module):
+    """Import a module in a fresh interpreter.
+
+    Args:
+        module (str): The module to import.
+
+    Returns:
+        tuple: The cumulative import time of the module in milliseconds and a
+            dict of the cumulative time of every module it imported.
+
+    Raises:
+        subprocess.CalledProcessError: If the import fails.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  ") and name.strip() != module:
+            # A top-level import of the interpreter's startup, e.g. site.
+            imported = {}
+            continue
+        imported[name.strip()] = int(cumulative) / 1000
+    return imported.get(module, 0.0), imported
+
+
+def main():
+    """Run the measurement from the command line.
+
+    Returns:
+        None
+
+    Raises:
+        SystemExit: With status 1 if an entry point exceeds its budget or imports
+            a forbidden module.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module.")
+    parser.add_argument(
+        "--top", type=int, default=5, help="Slowest imported modules shown."
+    )
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiply the budgets, e.g. on slow CI machines.",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget, forbidden in ENTRY_POINTS:
+        runs = [measure(module) for _ in range(args.repeat)]
+        best, imported = min(runs, key=lambda run: run[0])
+        budget *= args.scale
+        leaked = sorted(name for name in imported if name.split(".")[0] in forbidden)
+        ok = best <= budget and not leaked
+        failed = failed or not ok
+        print(
+            f"{module:<24} {best:>7.1f} ms (budget {budget:.0f} ms) "
+            f"{'ok' if ok else 'FAILED'}"
+        )
+        if leaked:
+            print(f"  imports {', '.join(leaked[:5])}")
+        slowest = sorted(
+            (
+                (milliseconds, name)
+                for name, milliseconds in imported.items()
+                if name != module
+            ),
+            reverse=True,
+        )[: args.top]
+        for milliseconds, name in slowest:
+            print(f"  {milliseconds:>7.1f} ms {name}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
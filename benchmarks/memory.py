@@ -0,0 +1,152 @@
+"""Measure the peak memory of documenting one very large module.
+
+A module of the requested length is assembled from renamed copies of the
+templates in ``example_project/`` and documented with the deterministic backend,
+once whole and once in chunks of top-level statements, under ``tracemalloc``.
+Whole-file processing grows with the module; chunked processing must stay close
+to the size of a chunk and produce the same file.
+
+Usage:
+    python -m benchmarks.memory --lines 2000 16000
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from benchmarks.corpus import load_templates, render_file
+from docu_gen.core.constant import CHUNKING
+from docu_gen.core.file_processor import add_docstrings_to_file
+from docu_gen.core.generator import DocstringGenerator
+from docu_gen.utils.llm import LLM
+
+
+def build_module(lines, seed=0):
+    """Concatenate rendered templates into one module.
+
+    Args:
+        lines (int): The minimum number of lines of the module.
+        seed (int, optional): Seed for the choice of templates.
+
+    Returns:
+        str: The source code of the module, without docstrings.
+
+    Raises:
+        None
+    """
+    templates = [
+        template for template in load_templates() if "def " in template[1].code
+    ]
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    number = 0
+    while total < lines:
+        part = render_file(rng.choice(templates), number).rstrip("\n") + "\n\n\n"
+        parts.append(part)
+        total += part.count("\n")
+        number += 1
+    return "".join(parts)
+
+
+def measure(source_code, chunk_lines):
+    """Document a module in a temporary file and trace the memory it takes.
+
+    Args:
+        source_code (str): The module to document.
+        chunk_lines (int): Chunk length, or 0 to process the module whole.
+
+    Returns:
+        tuple: The peak of traced memory in MiB, the wall time in seconds, the
+            outcome and the documented source code.
+
+    Raises:
+        None
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large_module.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(source_code)
+        generator = DocstringGenerator(llm=LLM(model_family="deterministic"))
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            status = add_docstrings_to_file(
+                path, generator=generator, chunk_lines=chunk_lines
+            )
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            generator.close()
+        with open(path, "r", encoding="utf-8") as f:
+            documented = f.read()
+    return peak / 2**20, seconds, status, documented
+
+
+def main():
+    """Run the measurement from the command line.
+
+    Returns:
+        None
+
+    Raises:
+        SystemExit: With status 1 if the two modes disagree on the documented
+            module or chunked processing is not bounded.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--lines",
+        type=int,
+        nargs="+",
+        default=[2000, 16000],
+        help="Module lengths to measure.",
+    )
+    parser.add_argument(
+        "--chunk-lines",
+        type=int,
+        default=CHUNKING.get("chunk_lines"),
+        help="Chunk length of the chunked mode.",
+    )
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=0.25,
+        help="Largest allowed ratio between the growth of the chunked and the "
+        "whole-file peak from the shortest to the longest module.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    failed = False
+    peaks = {"whole": [], "chunked": []}
+    for lines in sorted(args.lines):
+        source_code = build_module(lines, seed=args.seed)
+        results = {
+            "whole": measure(source_code, 0),
+            "chunked": measure(source_code, args.chunk_lines),
+        }
+        print(f"{source_code.count(chr(10))} lines:")
+        for mode, (peak, seconds, status, _) in results.items():
+            peaks[mode].append(peak)
+            print(f"  {mode:<8} {peak:>8.1f} MiB peak {seconds:>7.2f}s {status}")
+        if results["whole"][3] != results["chunked"][3]:
+            print("  the documented modules differ")
+            failed = True
+
+    if len(peaks["whole"]) > 1:
+        growth = {mode: values[-1] - values[0] for mode, values in peaks.items()}
+        ratio = growth["chunked"] / growth["whole"] if growth["whole"] > 0 else 0.0
+        print(
+            f"peak growth: whole {growth['whole']:.1f} MiB, chunked "
+            f"{growth['chunked']:.1f} MiB ({ratio:.0%})"
+        )
+        failed = failed or ratio > args.max_growth
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+"""A local OpenAI-compatible chat completions server for benchmarks.
+
+Replies after a configurable latency with a canned docstring, or with a JSON
+object of docstrings for batched requests, and fails a configurable share of the
+requests with 429 responses. Completions take a configurable time per output
+token, honour max_tokens and can be streamed. A share of the replies can be
+"chatty": the docstring in triple quotes followed by the code again, as chat
+models often answer. The openai client is pointed at it with the
+OPENAI_BASE_URL environment variable.
+
+Usage:
+    python -m benchmarks.mock_server --port 8000 --latency 0.2 --jitter 0.05
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from docu_gen.core.constant import PROMPT
+
+# Matches the "id: <id> (<code type>)" lines of a batched prompt.
+_BATCH_ID = re.compile(r"^id: (\S+) \((\w+)\)$", re.MULTILINE)
+
+FUNCTION_DOCSTRING = (
+    "Do the work of this function.\n\n"
+    "Args:\n"
+    "    value (object): The value to work on.\n\n"
+    "Returns:\n"
+    "    object: The result.\n\n"
+    "Raises:\n"
+    "    None"
+)
+
+CLASS_DOCSTRING = "Represent the state handled by this class."
+
+
+class MockServer(ThreadingHTTPServer):
+    """An HTTP server holding the mock's settings and request counters."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        seed=None,
+        token_latency=0.0,
+        chatty_rate=0.0,
+    ):
+        """Initialize the server.
+
+        Args:
+            address (tuple): The (host, port) to listen on. Port 0 picks a free port.
+            latency (float, optional): Mean response latency in seconds.
+            jitter (float, optional): Standard deviation of the latency in seconds.
+            error_rate (float, optional): Share of requests answered with a 429.
+            seed (int, optional): Seed for the latency and error draws.
+            token_latency (float, optional): Seconds per output token.
+            chatty_rate (float, optional): Share of single-target replies that
+                repeat the code after the quoted docstring.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the address cannot be bound.
+        """
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_latency = token_latency
+        self.chatty_rate = chatty_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "targets": 0,
+            "completion_tokens": 0,
+            "truncated": 0,
+            "abandoned": 0,
+        }
+
+    def draw(self):
+        """Draw the latency and outcome of one request.
+
+        Returns:
+            tuple: The delay in seconds, whether the request is throttled and
+                whether the reply is chatty.
+
+        Raises:
+            None
+        """
+        with self.lock:
+            delay = max(0.0, self.random.gauss(self.latency, self.jitter))
+            throttled = self.random.random() < self.error_rate
+            chatty = self.random.random() < self.chatty_rate
+            self.stats["requests"] += 1
+            if throttled:
+                self.stats["throttled"] += 1
+        return delay, throttled, chatty
+
+    def count(self, **increments):
+        """Add to the request counters.
+
+        Args:
+            **increments: The amount added to each counter.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        with self.lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answer chat completion requests and report the request counters."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        """Silence the per-request log lines."""
+
+    def do_GET(self):
+        """Return the request counters on ``/stats``."""
+        if self.path.rstrip("/").endswith("/stats"):
+            with self.server.lock:
+                self._send(200, dict(self.server.stats))
+        else:
+            self._send(404, {"error": {"message": "Not found."}})
+
+    def do_POST(self):
+        """Answer a chat completion request."""
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "Not found."}})
+            return
+        request = json.loads(body or b"{}")
+        delay, throttled, chatty = self.server.draw()
+        time.sleep(delay)
+        if throttled:
+            self._send(
+                429,
+                {"error": {"message": "Rate limit reached.", "type": "requests"}},
+                headers={"retry-after-ms": "100"},
+            )
+            return
+        prompt = "\n".join(
+            message.get("content") or "" for message in request.get("messages", [])
+        )
+        if (request.get("response_format") or {}).get("type") == "json_object":
+            items = _BATCH_ID.findall(prompt)
+            content = json.dumps(
+                {
+                    item_id: (
+                        CLASS_DOCSTRING if code_type == "class" else FUNCTION_DOCSTRING
+                    )
+                    for item_id, code_type in items
+                }
+            )
+        else:
+            items = [None]
+            code_type = "class" if PROMPT["class_request"] in prompt else "function"
+            content = CLASS_DOCSTRING if code_type == "class" else FUNCTION_DOCSTRING
+            if chatty:
+                # The snippet follows the request and precedes the answer cue.
+                code = prompt.split(PROMPT[f"{code_type}_request"], 1)[-1]
+                code = code.rsplit("\n\n" + PROMPT["answer"], 1)[0]
+                content = f'"""{content}\n"""\n\n{code.strip()}\n'
+        finish_reason = "stop"
+        max_tokens = request.get("max_tokens")
+        if max_tokens and len(content) > max_tokens * 4:
+            content = content[: max_tokens * 4]
+            finish_reason = "length"
+        self.server.count(targets=len(items), truncated=int(finish_reason == "length"))
+        prompt_tokens = len(prompt) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        if request.get("stream"):
+            self._stream(request, content, finish_reason, usage)
+            return
+        time.sleep(self.server.token_latency * (len(content) // 4))
+        self.server.count(completion_tokens=len(content) // 4)
+        self._send(
+            200,
+            {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _stream(self, request, content, finish_reason, usage, chunk_chars=16):
+        """Stream a completion as server-sent events, one chunk per few tokens.
+
+        A client that disconnects stops the stream, and only the tokens sent
+        until then are counted.
+
+        Args:
+            request (dict): The chat completion request.
+            content (str): The completion.
+            finish_reason (str): The finish reason of the completion.
+            usage (dict): The usage of the completion.
+            chunk_chars (int, optional): Characters per chunk.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(choices, usage=None):
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": choices,
+                "usage": usage,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        def write(data):
+            data = data.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        sent = 0
+        try:
+            for start in range(0, len(content), chunk_chars):
+                piece = content[start : start + chunk_chars]
+                time.sleep(self.server.token_latency * (len(piece) / 4))
+                last = start + chunk_chars >= len(content)
+                write(
+                    event(
+                        [
+                            {
+                                "index": 0,
+                                "delta": {"content": piece},
+                                "finish_reason": finish_reason if last else None,
+                            }
+                        ]
+                    )
+                )
+                sent += len(piece)
+            if (request.get("stream_options") or {}).get("include_usage"):
+                write(event([], usage))
+            write("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.count(abandoned=1)
+            self.close_connection = True
+        self.server.count(completion_tokens=sent // 4)
+
+    def _send(self, status, payload, headers=None):
+        """Write a JSON response.
+
+        Args:
+            status (int): The HTTP status code.
+            payload (dict): The JSON body.
+            headers (dict, optional): Extra response headers.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    """Run the mock server until interrupted.
+
+    The base URL is printed on the first line of the output once the server is
+    listening.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind.")
+    parser.add_argument(
+        "--port", type=int, default=0, help="Port to bind (0 picks a free port)."
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mean latency in seconds."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.01, help="Latency standard deviation."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of 429 responses."
+    )
+    parser.add_argument(
+        "--token-latency",
+        type=float,
+        default=0.0,
+        help="Seconds per output token.",
+    )
+    parser.add_argument(
+        "--chatty-rate",
+        type=float,
+        default=0.0,
+        help="Share of replies repeating the code after the quoted docstring.",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+    args = parser.parse_args()
+    server = MockServer(
+        (args.host, args.port),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        token_latency=args.token_latency,
+        chatty_rate=args.chatty_rate,
+    )
+    host, port = server.server_address[:2]
+    print(f"http://{host}:{port}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
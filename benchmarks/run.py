@@ -0,0 +1,306 @@
+"""Benchmark docu-gen end to end against a synthetic corpus and a mock LLM.
+
+Three runs are measured over the same corpus:
+
+- cold: empty docstring cache and index, every target goes to the mock server;
+- warm: the corpus is restored and the index dropped, every docstring is cached;
+- no-op: the documented corpus is run again with the index, nothing is parsed.
+
+For each run the report gives files/sec, targets/sec, peak RSS, CPU time, the
+wall and CPU time of every pipeline stage and the request latency percentiles,
+the last two taken from the tool's own ``--report``.
+
+Usage:
+    python -m benchmarks.run --files 500 --latency 0.2 --error-rate 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from benchmarks.corpus import generate_corpus
+from docu_gen.core.scanner import count_undocumented
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def start_mock_server(latency, jitter, error_rate, seed):
+    """Start the mock server in a subprocess.
+
+    Args:
+        latency (float): Mean response latency in seconds.
+        jitter (float): Standard deviation of the latency in seconds.
+        error_rate (float): Share of requests answered with a 429.
+        seed (int): Seed for the latency and error draws.
+
+    Returns:
+        tuple: The server process and its base URL.
+
+    Raises:
+        RuntimeError: If the server does not start.
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.mock_server",
+            "--latency",
+            str(latency),
+            "--jitter",
+            str(jitter),
+            "--error-rate",
+            str(error_rate),
+            "--seed",
+            str(seed),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    base_url = process.stdout.readline().strip()
+    if not base_url:
+        process.kill()
+        raise RuntimeError("The mock server did not start.")
+    return process, base_url
+
+
+def server_stats(base_url):
+    """Fetch the request counters of the mock server.
+
+    Args:
+        base_url (str): The base URL of the server.
+
+    Returns:
+        dict: The "requests", "throttled" and "targets" counters.
+
+    Raises:
+        urllib.error.URLError: If the server cannot be reached.
+    """
+    with urllib.request.urlopen(base_url + "/stats") as response:
+        return json.loads(response.read())
+
+
+def run_cli(arguments, env, log_path, report_path):
+    """Run the CLI in a subprocess and measure it.
+
+    Args:
+        arguments (list): The CLI arguments.
+        env (dict): The environment of the subprocess.
+        log_path (str): File receiving the output of the CLI.
+        report_path (str): Where the CLI writes its run report.
+
+    Returns:
+        dict: Wall time, user and system CPU time and peak RSS of the subprocess,
+            and the stage timings and latency percentiles of its run report.
+
+    Raises:
+        RuntimeError: If the CLI exits with an error.
+    """
+    command = [sys.executable, "-m", "docu_gen", "--report", report_path]
+    with open(log_path, "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            command + arguments, cwd=ROOT, env=env, stdout=log, stderr=log
+        )
+        # wait4 reports the resources of this child alone, including the worker
+        # processes it has waited for.
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode:
+        raise RuntimeError(f"The CLI failed, see '{log_path}'.")
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak_rss = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    result = {
+        "wall_seconds": wall,
+        "user_seconds": usage.ru_utime,
+        "system_seconds": usage.ru_stime,
+        "peak_rss_mb": peak_rss / 2**20,
+    }
+    with open(report_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    result["stages"] = report["stages"]
+    result["latency_seconds"] = report["latency_seconds"]
+    return result
+
+
+def benchmark(args):
+    """Run the cold, warm and no-op runs.
+
+    Args:
+        args (argparse.Namespace): The parsed command-line arguments.
+
+    Returns:
+        dict: The benchmark settings and the measurements of every run.
+
+    Raises:
+        RuntimeError: If the mock server or the CLI fails.
+    """
+    workdir = args.workdir or tempfile.mkdtemp(prefix="docu_gen_bench_")
+    pristine = os.path.join(workdir, "pristine")
+    corpus = os.path.join(workdir, "corpus")
+    shutil.rmtree(pristine, ignore_errors=True)
+    paths = generate_corpus(pristine, args.files, seed=args.seed)
+    targets = 0
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            targets += count_undocumented(f.read())
+
+    cache_path = os.path.join(workdir, "cache.sqlite3")
+    index_path = os.path.join(workdir, "index.sqlite3")
+    for path in (cache_path, index_path):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    server, base_url = start_mock_server(
+        args.latency, args.jitter, args.error_rate, args.seed
+    )
+    env = dict(os.environ, OPENAI_BASE_URL=base_url, OPENAI_API_KEY="benchmark")
+    arguments = [
+        corpus,
+        "--cache-path",
+        cache_path,
+        "--index",
+        index_path,
+        "--jobs",
+        str(args.jobs),
+        "--concurrency",
+        str(args.concurrency),
+        "--batch-tokens",
+        str(args.batch_tokens),
+    ]
+    runs = {}
+    try:
+        for name in ("cold", "warm", "no-op"):
+            if name != "no-op":
+                shutil.rmtree(corpus, ignore_errors=True)
+                shutil.copytree(pristine, corpus)
+                for suffix in ("", "-wal", "-shm"):
+                    if os.path.exists(index_path + suffix):
+                        os.remove(index_path + suffix)
+            before = server_stats(base_url)
+            result = run_cli(
+                arguments,
+                env,
+                os.path.join(workdir, f"{name}.log"),
+                os.path.join(workdir, f"{name}.json"),
+            )
+            after = server_stats(base_url)
+            result["files_per_second"] = len(paths) / result["wall_seconds"]
+            result["targets_per_second"] = targets / result["wall_seconds"]
+            result["requests"] = after["requests"] - before["requests"]
+            result["throttled"] = after["throttled"] - before["throttled"]
+            runs[name] = result
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "files": len(paths),
+        "targets": targets,
+        "jobs": args.jobs,
+        "concurrency": args.concurrency,
+        "batch_tokens": args.batch_tokens,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "runs": runs,
+    }
+
+
+def print_report(report):
+    """Print the measurements as tables.
+
+    Args:
+        report (dict): The result of benchmark.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    print(
+        f"{report['files']} files, {report['targets']} targets, "
+        f"{report['jobs']} job(s), mock latency {report['latency']}s "
+        f"± {report['jitter']}s, error rate {report['error_rate']:.0%}"
+    )
+    columns = ["run", "wall s", "files/s", "targets/s", "CPU s", "peak MB"]
+    columns += ["requests", "429s", "p50 s", "p99 s"]
+    print("".join(f"{column:>11}" for column in columns))
+    for name, run in report["runs"].items():
+        values = [
+            name,
+            f"{run['wall_seconds']:.2f}",
+            f"{run['files_per_second']:.1f}",
+            f"{run['targets_per_second']:.1f}",
+            f"{run['user_seconds'] + run['system_seconds']:.2f}",
+            f"{run['peak_rss_mb']:.0f}",
+            run["requests"],
+            run["throttled"],
+            f"{run['latency_seconds']['p50']:.2f}",
+            f"{run['latency_seconds']['p99']:.2f}",
+        ]
+        print("".join(f"{value:>11}" for value in values))
+
+    runs = report["runs"]
+    print("\nStage wall / CPU seconds:")
+    print(f"{'stage':>11}" + "".join(f"{name:>18}" for name in runs))
+    for stage in next(iter(runs.values()))["stages"]:
+        values = [
+            "{wall_seconds:.2f} / {cpu_seconds:.2f}".format(**run["stages"][stage])
+            for run in runs.values()
+        ]
+        print(f"{stage:>11}" + "".join(f"{value:>18}" for value in values))
+
+
+def main():
+    """Run the benchmark from the command line.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Corpus size.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Mock latency in seconds."
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.01, help="Mock latency deviation."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of 429 responses."
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="CLI worker processes.")
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="CLI requests per file."
+    )
+    parser.add_argument(
+        "--batch-tokens", type=int, default=0, help="CLI batch token budget."
+    )
+    parser.add_argument(
+        "--workdir", help="Keep the corpus, logs and profiles in this directory."
+    )
+    parser.add_argument("--output", help="Also write the report as JSON.")
+    args = parser.parse_args()
+    report = benchmark(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare the token-based and libcst validators on a synthetic corpus.
+
+Every template is rendered with and without its docstrings. Adding the
+docstrings back must be accepted. The same change is also combined with a random
+edit, which is rejected unless it falls inside a docstring. Both validators must
+agree on every case; their timings are reported.
+
+Usage:
+    python -m benchmarks.validators --files 200
+"""
+
+import time
+import random
+import argparse
+from benchmarks.corpus import load_templates, render_file
+from docu_gen.core.validate import (
+    validate_only_docstrings_added,
+    validate_only_docstrings_added_libcst,
+)
+
+# Code edits applied to the documented source, as (old, new) replacements.
+EDITS = [
+    ("return ", "return  "),
+    ("(self", "( self"),
+    (" = ", " == "),
+    ("\n\n\n", "\n\n"),
+    ("):", "): # edited"),
+]
+
+
+def make_pairs(files, seed=0):
+    """Build (original, modified, expected) validation cases.
+
+    Args:
+        files (int): The number of rendered modules.
+        seed (int, optional): Seed for the choice of templates and edits.
+
+    Returns:
+        list: (original code, modified code, expected answer) tuples. The
+            expected answer of an edited case is None, as it depends on where the
+            edit lands.
+
+    Raises:
+        None
+    """
+    templates = load_templates()
+    rng = random.Random(seed)
+    pairs = []
+    for number in range(files):
+        template = rng.choice(templates)
+        original = render_file(template, number, strip=True)
+        documented = render_file(template, number, strip=False)
+        pairs.append((original, documented, True))
+        old, new = rng.choice(EDITS)
+        if old in documented:
+            position = rng.choice(
+                [
+                    index
+                    for index in range(len(documented))
+                    if documented.startswith(old, index)
+                ]
+            )
+            edited = documented[:position] + new + documented[position + len(old) :]
+            pairs.append((original, edited, None))
+    return pairs
+
+
+def main():
+    """Run the comparison from the command line.
+
+    Returns:
+        None
+
+    Raises:
+        SystemExit: With status 1 if the validators disagree.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Rendered modules.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+    pairs = make_pairs(args.files, seed=args.seed)
+
+    timings = {}
+    answers = {}
+    for validator in (
+        validate_only_docstrings_added,
+        validate_only_docstrings_added_libcst,
+    ):
+        start = time.perf_counter()
+        answers[validator.__name__] = [
+            validator(original, modified) for original, modified, _ in pairs
+        ]
+        timings[validator.__name__] = time.perf_counter() - start
+
+    tokens, libcst = answers.values()
+    disagreements = sum(a != b for a, b in zip(tokens, libcst))
+    rejected_additions = sum(
+        not answer for answer, (_, _, expected) in zip(tokens, pairs) if expected
+    )
+    print(
+        f"{len(pairs)} cases, {disagreements} disagreements, "
+        f"{rejected_additions} docstring additions rejected."
+    )
+    for name, seconds in timings.items():
+        print(f"  {name:<40} {seconds:.3f}s ({len(pairs) / seconds:.0f} cases/s)")
+    if disagreements or rejected_additions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
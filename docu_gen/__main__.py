@@ -0,0 +1,4 @@
+from docu_gen.cli import main
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,30 @@
 import os
+import sys
+import time
 import argparse
-from docu_gen.core.docstring_adder import add_docstrings_to_file, is_excluded
+from docu_gen.core.check import (
+    build_check_report,
+    check_files,
+    print_check_report,
+    write_check_report,
+)
+from docu_gen.core.constant import (
+    AI_MODEL,
+    CACHE,
+    CHUNKING,
+    DAEMON,
+    INDEX_PATH,
+    JOURNAL_PATH,
+    MAX_CONCURRENT_REQUESTS,
+    MAX_FILES_PER_WORKER,
+    RATE_LIMIT,
+    ROUTING,
+)
+from docu_gen.core.client import send_request
+from docu_gen.core.discovery import iter_python_files
+from docu_gen.core.router import parse_tier
+from docu_gen.utils.backends import backend_names
+from docu_gen.utils.docstring_cache import DocstringCache
 
 
 def main():
@@ -20,27 +44,424 @@ def main():
     parser = argparse.ArgumentParser(
         description="Automatically generate docstrings for Python code."
     )
-    parser.add_argument("paths", nargs="+", help="File or directory paths to process.")
+    parser.add_argument("paths", nargs="*", help="File or directory paths to process.")
     parser.add_argument("--exclude", nargs="*", default=[], help="Patterns to exclude.")
     parser.add_argument(
-        "--override", action="store_true", help="Override existing docstrings."
+        "--no-ignore",
+        action="store_true",
+        help="Also process files ignored by .gitignore and files in virtual "
+        "environment, dependency, cache and build directories.",
+    )
+    parser.add_argument(
+        "--git-files",
+        action="store_true",
+        help="List the files of directories in a git repository with git ls-files "
+        "instead of walking them.",
+    )
+    parser.add_argument(
+        "--override",
+        action="store_true",
+        help="Regenerate existing docstrings that no longer match their code.",
+    )
+    parser.add_argument(
+        "--override-all",
+        action="store_true",
+        help="Regenerate every existing docstring. Implies --override.",
     )
     parser.add_argument("--apikey", help="OpenAI API key.")
+    parser.add_argument(
+        "--backend",
+        choices=backend_names(),
+        default=AI_MODEL.get("model_family"),
+        help="Backend generating the docstrings: the OpenAI API, a local "
+        "OpenAI-compatible server or an in-process deterministic generator.",
+    )
+    parser.add_argument(
+        "--model", help="Model name. Defaults to the default model of the backend."
+    )
+    parser.add_argument(
+        "--base-url",
+        help="URL of the OpenAI-compatible API, e.g. http://localhost:8000/v1.",
+    )
+    parser.add_argument(
+        "--route",
+        action="store_true",
+        help="Send simple targets to a small model and complex ones to the default "
+        "model, using the default routing tiers.",
+    )
+    parser.add_argument(
+        "--tier",
+        action="append",
+        default=[],
+        metavar="NAME=MODEL[:MAX_SCORE[:MAX_TOKENS]]",
+        help="Routing tier, from the simplest targets to the most complex; may be "
+        "repeated. Replaces the default tiers and implies --route.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=CACHE.get("path"),
+        help="Location of the generated docstring cache.",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable the docstring cache."
+    )
+    parser.add_argument(
+        "--compact-cache",
+        action="store_true",
+        help="Evict stale cache entries, compact the cache file and exit.",
+    )
+    parser.add_argument(
+        "--index",
+        default=INDEX_PATH,
+        help="Location of the index of previous runs used to skip unchanged code.",
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Ignore the index and process every file and definition.",
+    )
+    parser.add_argument(
+        "--journal",
+        default=JOURNAL_PATH,
+        help="Directory of the journal recording generated docstrings and "
+        "committed files, kept until the run completes.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume an interrupted run: reuse the docstrings of its journal "
+        "without calling the LLM and skip the files it committed.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=MAX_CONCURRENT_REQUESTS,
+        help="Maximum number of concurrent LLM requests per file.",
+    )
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=RATE_LIMIT.get("requests_per_minute"),
+        help="Requests per minute allowed by the API quota.",
+    )
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=RATE_LIMIT.get("tokens_per_minute"),
+        help="Tokens per minute allowed by the API quota.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=RATE_LIMIT.get("max_retries"),
+        help="Retries of a throttled or timed out request before giving up on it.",
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=0,
+        help="Pack targets from the same file into batched requests of up to this "
+        "many estimated snippet tokens (0 disables batching).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream responses and stop reading each one as soon as its quoted "
+        "docstring is complete.",
+    )
+    parser.add_argument(
+        "--no-adaptive-max-tokens",
+        action="store_true",
+        help="Request the full output token limit for every target instead of a "
+        "limit predicted from the target and similar completions.",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Generate a docstring for every structural clone instead of reusing "
+        "one per clone group.",
+    )
+    parser.add_argument(
+        "--near-duplicate-threshold",
+        type=float,
+        help="Also reuse the docstring of a definition with the same name and "
+        "parameters whose estimated similarity is at least this value (0-1).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of files processed in parallel worker processes. Defaults to "
+        "1, or to one per CPU with --check.",
+    )
+    parser.add_argument(
+        "--chunk-lines",
+        type=int,
+        default=CHUNKING.get("chunk_lines"),
+        help="Document files longer than this many lines one chunk of top-level "
+        "statements at a time, bounding memory by the largest chunk (0 disables "
+        "chunking).",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Read, plan and write files in the worker processes but generate "
+        "every docstring in one queue shared by all files, largest first.",
+    )
+    parser.add_argument(
+        "--max-files-per-worker",
+        type=int,
+        default=MAX_FILES_PER_WORKER,
+        help="Replace a worker process after it has processed this many files.",
+    )
+    parser.add_argument(
+        "--export-batch",
+        metavar="PATH",
+        help="Write a Batch API request file for every target and exit.",
+    )
+    parser.add_argument(
+        "--ingest-batch",
+        metavar="PATH",
+        help="Apply the docstrings from a Batch API result file without calling "
+        "the LLM.",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="Write per-file stage timings and per-request token usage as JSON. "
+        "With --check, write the check results as JSON ('-' for standard output).",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Report the definitions missing a docstring without calling the LLM "
+        "or changing any file.",
+    )
+    parser.add_argument(
+        "--fail-under",
+        type=float,
+        default=100.0,
+        help="With --check, exit with status 1 if the percentage of definitions "
+        "with a docstring is below this value.",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and document the files sent with --send, reusing the "
+        "clients and caches across requests.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="With --daemon, document the given paths in the background and again "
+        "whenever a file changes.",
+    )
+    parser.add_argument(
+        "--send",
+        action="store_true",
+        help="Have the running daemon document the given files and wait for it.",
+    )
+    parser.add_argument(
+        "--qualname",
+        action="append",
+        default=[],
+        help="With --send, only document this definition, e.g. Class.method; may "
+        "be repeated.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DAEMON.get("socket_path"),
+        help="Location of the daemon's Unix socket.",
+    )
     args = parser.parse_args()
 
     # Set the API key to environment variable if provided
     if args.apikey:
         os.environ["OPENAI_API_KEY"] = args.apikey
     args = parser.parse_args()
+    discovery = {"use_ignore_files": not args.no_ignore, "use_git": args.git_files}
 
-    for path in args.paths:
-        if os.path.isfile(path):
-            if not is_excluded(path, args.exclude) and path.endswith(".py"):
-                add_docstrings_to_file(path, override=args.override)
+    if args.check:
+        if not args.paths:
+            parser.error("the following arguments are required: paths")
+        report = build_check_report(
+            check_files(
+                iter_python_files(args.paths, args.exclude, **discovery), jobs=args.jobs
+            ),
+            args.fail_under,
+        )
+        if args.report == "-":
+            write_check_report(report, "-")
         else:
-            for root, _, files in os.walk(path):
-                for file in files:
-                    if file.endswith(".py"):
-                        file_path = os.path.join(root, file)
-                        if not is_excluded(file_path, args.exclude):
-                            add_docstrings_to_file(file_path, override=args.override)
+            print_check_report(report)
+            if args.report:
+                write_check_report(report, args.report)
+        if not report["passed"]:
+            sys.exit(1)
+        return
+
+    if args.send:
+        if not args.paths:
+            parser.error("the following arguments are required: paths")
+        failed = False
+        for file_path in iter_python_files(args.paths, args.exclude, **discovery):
+            try:
+                response = send_request(
+                    {
+                        "command": "document",
+                        "path": os.path.abspath(file_path),
+                        "qualnames": args.qualname or None,
+                    },
+                    socket_path=args.socket,
+                )
+            except OSError as e:
+                print(f"No daemon listening on '{args.socket}': {e}", file=sys.stderr)
+                sys.exit(1)
+            status = response.get("status") or "error: " + response.get("error", "")
+            print(f"{status}: {file_path}")
+            failed = failed or not response.get("ok") or status.startswith("error")
+        if failed:
+            sys.exit(1)
+        return
+
+    # Imported here so --check never loads the generation modules, and libcst is
+    # only loaded once a file needs docstrings.
+    from docu_gen.core.report import (
+        build_run_report,
+        print_run_report,
+        write_run_report,
+    )
+    from docu_gen.core.journal import Journal
+    from docu_gen.core.runner import process_files, print_summary
+
+    jobs = args.jobs or 1
+    try:
+        tiers = [parse_tier(spec) for spec in args.tier]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.route and not tiers:
+        tiers = ROUTING.get("tiers")
+    cache = None if args.no_cache else DocstringCache(path=args.cache_path)
+
+    if args.compact_cache:
+        if cache is None:
+            parser.error("--compact-cache cannot be combined with --no-cache.")
+        removed = cache.compact()
+        cache.close()
+        print(f"Removed {removed} cache entries from '{args.cache_path}'.")
+        return
+
+    if not args.paths and not args.daemon:
+        parser.error("the following arguments are required: paths")
+
+    # The pipeline generates every docstring in the main process.
+    generators = 1 if args.pipeline else jobs
+    options = {
+        "override": args.override or args.override_all,
+        "override_all": args.override_all,
+        "cache_path": None if cache is None else args.cache_path,
+        "index_path": None if args.no_index else args.index,
+        "concurrency": args.concurrency,
+        "batch_tokens": args.batch_tokens,
+        "offline": bool(args.ingest_batch),
+        # The quota is shared by all generating processes.
+        "requests_per_minute": args.rpm and args.rpm / generators,
+        "tokens_per_minute": args.tpm and args.tpm / generators,
+        "max_retries": args.max_retries,
+        "model_family": args.backend,
+        "model_name": args.model,
+        "base_url": args.base_url,
+        "routing_tiers": tiers or None,
+        "dedup": not args.no_dedup,
+        "stream": args.stream,
+        "adaptive_max_tokens": not args.no_adaptive_max_tokens,
+        "near_duplicate_threshold": args.near_duplicate_threshold,
+        "chunk_lines": args.chunk_lines,
+        # The daemon never completes a run that would remove the journal.
+        "journal_path": None if args.daemon else args.journal,
+        "resume": args.resume,
+    }
+    if args.export_batch:
+        from docu_gen.core.offline import export_batch
+
+        count = export_batch(
+            iter_python_files(args.paths, args.exclude, **discovery),
+            args.export_batch,
+            options,
+        )
+        print(f"Wrote {count} batch requests to '{args.export_batch}'.")
+        if cache is not None:
+            cache.close()
+        return
+
+    if args.ingest_batch:
+        if cache is None:
+            parser.error("--ingest-batch cannot be combined with --no-cache.")
+        from docu_gen.core.offline import ingest_batch
+
+        count = ingest_batch(args.ingest_batch, cache, options)
+        print(f"Loaded {count} docstrings from '{args.ingest_batch}'.")
+
+    if args.daemon:
+        from docu_gen.core.daemon import DocstringDaemon
+
+        DocstringDaemon(
+            options,
+            socket_path=args.socket,
+            watch_paths=args.paths if args.watch else None,
+            exclude_patterns=args.exclude,
+            discovery=discovery,
+        ).run()
+        if cache is not None:
+            cache.close()
+        return
+
+    journal = Journal(args.journal)
+    if args.resume:
+        docstrings, files = journal.replay()
+        print(
+            f"Resuming from '{args.journal}': {docstrings} docstrings and "
+            f"{files} committed files."
+        )
+    elif journal.exists():
+        print(f"Discarding the journal of an interrupted run in '{args.journal}'.")
+        journal.remove()
+
+    start = time.perf_counter()
+    try:
+        if args.pipeline:
+            from docu_gen.core.pipeline import run_pipeline
+
+            results = run_pipeline(
+                iter_python_files(args.paths, args.exclude, **discovery),
+                options,
+                jobs=jobs,
+            )
+        else:
+            results = process_files(
+                iter_python_files(args.paths, args.exclude, **discovery),
+                options,
+                jobs=jobs,
+                max_files_per_worker=args.max_files_per_worker,
+            )
+    except KeyboardInterrupt:
+        print(
+            "\nInterrupted. Run again with --resume to reuse the docstrings "
+            "generated so far.",
+            file=sys.stderr,
+        )
+        if cache is not None:
+            cache.close()
+        sys.exit(130)
+    # The run completed, so nothing is left to resume.
+    journal.remove()
+    print_summary(results)
+    report = build_run_report(results, time.perf_counter() - start)
+    print_run_report(report)
+    if args.report:
+        write_run_report(report, args.report)
+        print(f"Wrote the run report to '{args.report}'.")
+
+    if cache is not None:
+        cache.evict()
+        cache.close()
@@ -0,0 +1,89 @@
+import math
+from collections import deque
+from docu_gen.core.constant import OUTPUT_BUDGET
+from docu_gen.core.report import percentile
+from docu_gen.core.router import measure_complexity
+from docu_gen.utils.tokens import estimate_tokens
+
+
+class OutputBudget:
+    """Predicts the output token limit of each docstring request.
+
+    Targets are grouped by code type, number of parameters and whether they raise.
+    Until a group has enough observed completions the limit is estimated from
+    the parts of the docstring the target needs; afterwards it follows the 95th
+    percentile of the group's completion lengths. Either way headroom is added,
+    and the limit stays within the configured bounds.
+    """
+
+    def __init__(self, settings=None):
+        """Initialize the budget without any observations.
+
+        Args:
+            settings (dict, optional): Overrides of OUTPUT_BUDGET. Defaults to None.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.settings = dict(OUTPUT_BUDGET, **(settings or {}))
+        # Recent completion lengths keyed by group.
+        self._samples = {}
+
+    def predict(self, code_snippet, code_type, max_tokens=None):
+        """Predict the output token limit of a target.
+
+        Args:
+            code_snippet (str): The code sent to the LLM for the target.
+            code_type (str): "class" or "function".
+            max_tokens (int, optional): Upper bound of the limit. Defaults to
+                OUTPUT_BUDGET["max_tokens"].
+
+        Returns:
+            tuple: The predicted limit and the group of the target, which is passed
+                to observe with the completion length.
+
+        Raises:
+            None
+        """
+        settings = self.settings
+        max_tokens = max_tokens or settings["max_tokens"]
+        measures = measure_complexity(code_snippet)
+        group = (
+            code_type,
+            min(measures["parameters"], 8),
+            measures["raises"] > 0,
+        )
+        samples = self._samples.get(group, ())
+        if len(samples) >= settings["min_samples"]:
+            expected = percentile(samples, 0.95)
+        elif code_type == "class":
+            expected = settings["class_tokens"]
+        else:
+            expected = (
+                settings["function_tokens"]
+                + settings["tokens_per_parameter"] * measures["parameters"]
+                + settings["tokens_per_raise"] * measures["raises"]
+                + settings["tokens_per_snippet_token"] * estimate_tokens(code_snippet)
+            )
+        limit = math.ceil(expected * settings["headroom"])
+        return min(max_tokens, max(settings["min_tokens"], limit)), group
+
+    def observe(self, group, completion_tokens):
+        """Record the length of a complete response.
+
+        Args:
+            group (tuple): The group returned by predict for the target.
+            completion_tokens (int): The tokens the response took.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if group not in self._samples:
+            self._samples[group] = deque(maxlen=self.settings["max_samples"])
+        self._samples[group].append(completion_tokens)
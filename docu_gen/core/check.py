@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import multiprocessing
+from docu_gen.core.scanner import scan_definitions
+
+# Files sent to a worker process at a time; checking one file is much cheaper
+# than the round trip to the worker.
+CHUNK_SIZE = 64
+
+
+def check_file(file_path):
+    """List the definitions of a file that have no docstring.
+
+    Args:
+        file_path (str): The Python file to check.
+
+    Returns:
+        dict: The "path", the number of "definitions", the "missing" ones as
+            dicts with their "qualname", "type" and "line", and an "error"
+            message if the file could not be read or parsed, otherwise None.
+
+    Raises:
+        None
+    """
+    result = {"path": file_path, "definitions": 0, "missing": [], "error": None}
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            definitions = scan_definitions(f.read(), with_hashes=False)
+    except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as e:
+        result["error"] = (str(e).splitlines() or [type(e).__name__])[0]
+        return result
+    result["definitions"] = len(definitions)
+    result["missing"] = [
+        {
+            "qualname": definition.qualname,
+            "type": definition.code_type,
+            "line": definition.start,
+        }
+        for definition in definitions
+        if not definition.has_docstring
+    ]
+    return result
+
+
+def check_files(files, jobs=None):
+    """Check files for missing docstrings, in parallel worker processes.
+
+    Args:
+        files (iterable): The files to check, typically a generator.
+        jobs (int, optional): Number of worker processes. Defaults to None, which
+            uses one per CPU; 1 checks the files in the current process.
+
+    Returns:
+        list: The results of check_file, in discovery order.
+
+    Raises:
+        None
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        return [check_file(file_path) for file_path in files]
+    with multiprocessing.Pool(processes=jobs) as pool:
+        return list(pool.imap(check_file, files, chunksize=CHUNK_SIZE))
+
+
+def build_check_report(results, fail_under):
+    """Aggregate the results of a check.
+
+    Args:
+        results (list): The results of check_files.
+        fail_under (float): The minimum coverage, in percent.
+
+    Returns:
+        dict: The number of "files", "definitions" and "documented" definitions,
+            the "coverage" in percent, the "fail_under" threshold, whether the
+            check "passed", the "missing" definitions with their "path" and the
+            files with "errors".
+
+    Raises:
+        None
+    """
+    definitions = sum(result["definitions"] for result in results)
+    missing = [
+        dict(entry, path=result["path"])
+        for result in results
+        for entry in result["missing"]
+    ]
+    documented = definitions - len(missing)
+    coverage = 100.0 * documented / definitions if definitions else 100.0
+    return {
+        "files": len(results),
+        "definitions": definitions,
+        "documented": documented,
+        "coverage": coverage,
+        "fail_under": fail_under,
+        "passed": coverage >= fail_under,
+        "missing": missing,
+        "errors": [
+            {"path": result["path"], "error": result["error"]}
+            for result in results
+            if result["error"]
+        ],
+    }
+
+
+def print_check_report(report):
+    """Print the missing docstrings and the coverage.
+
+    Args:
+        report (dict): A report built with build_check_report.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    for entry in report["missing"]:
+        print(f"{entry['path']}:{entry['line']}: {entry['type']} {entry['qualname']}")
+    for entry in report["errors"]:
+        print(f"{entry['path']}: error: {entry['error']}")
+    print(
+        f"{report['documented']} of {report['definitions']} definitions in "
+        f"{report['files']} files have a docstring ({report['coverage']:.1f}%, "
+        f"required {report['fail_under']:g}%): "
+        + ("passed." if report["passed"] else "failed.")
+    )
+
+
+def write_check_report(report, path):
+    """Write the check report as JSON.
+
+    Args:
+        report (dict): A report built with build_check_report.
+        path (str): The destination file, or "-" for the standard output.
+
+    Returns:
+        None
+
+    Raises:
+        IOError: If the file cannot be written.
+    """
+    if path == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,24 @@
+import json
+import socket
+from docu_gen.core.constant import DAEMON
+
+
+def send_request(request, socket_path=DAEMON.get("socket_path")):
+    """Send one request to a running daemon and wait for its response.
+
+    Args:
+        request (dict): The request, e.g. {"command": "document", "path": ...}.
+        socket_path (str, optional): Location of the daemon's Unix socket.
+
+    Returns:
+        dict: The response.
+
+    Raises:
+        OSError: If no daemon is listening on the socket.
+        ValueError: If the response is not valid JSON.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as stream:
+            return json.loads(stream.readline())
@@ -0,0 +1,500 @@
+import libcst as cst
+from libcst.helpers import get_full_name_for_node
+from docu_gen.core.constant import SNIPPET
+from docu_gen.utils.tokens import estimate_tokens
+
+_COLLECTIONS = (cst.List, cst.Set, cst.Tuple, cst.Dict)
+
+# Limits of the summary of elided statements.
+_MAX_CALLS = 20
+_MAX_EXITS = 8
+
+
+class SnippetCompactor(cst.CSTTransformer):
+    """Drop the parts of a definition that do not help describe it.
+
+    Comments are removed, long string literals are shortened, long collection
+    displays keep only their first items, and the bodies of definitions nested
+    in a function are replaced by ``...``.
+    """
+
+    def __init__(
+        self,
+        max_string_length=SNIPPET.get("max_string_length"),
+        max_collection_items=SNIPPET.get("max_collection_items"),
+    ):
+        """Initialize the compactor.
+
+        Args:
+            max_string_length (int, optional): Longer string literals are cut to
+                this many characters.
+            max_collection_items (int, optional): Longer list, set, tuple and dict
+                displays keep this many items.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        super().__init__()
+        self.max_string_length = max_string_length
+        self.max_collection_items = max_collection_items
+        self._functions = 0
+
+    def visit_FunctionDef(self, node):
+        """Enter a function definition.
+
+        Args:
+            node (cst.FunctionDef): The function definition being entered.
+
+        Returns:
+            bool: True, so the function body is visited.
+
+        Raises:
+            None
+        """
+        self._functions += 1
+        return True
+
+    def leave_FunctionDef(self, original_node, updated_node):
+        """Elide the body of a function nested in another function.
+
+        Args:
+            original_node (cst.FunctionDef): The original function definition.
+            updated_node (cst.FunctionDef): The compacted function definition.
+
+        Returns:
+            cst.FunctionDef: The function definition, with its body replaced by
+                ``...`` if it is nested in a function.
+
+        Raises:
+            None
+        """
+        self._functions -= 1
+        return self._elide_nested(updated_node)
+
+    def leave_ClassDef(self, original_node, updated_node):
+        """Elide the body of a class nested in a function.
+
+        Args:
+            original_node (cst.ClassDef): The original class definition.
+            updated_node (cst.ClassDef): The compacted class definition.
+
+        Returns:
+            cst.ClassDef: The class definition, with its body replaced by ``...``
+                if it is nested in a function.
+
+        Raises:
+            None
+        """
+        return self._elide_nested(updated_node)
+
+    def leave_EmptyLine(self, original_node, updated_node):
+        """Remove comment lines.
+
+        Args:
+            original_node (cst.EmptyLine): The original line.
+            updated_node (cst.EmptyLine): The updated line.
+
+        Returns:
+            cst.EmptyLine: The line, or a removal sentinel for a comment line.
+
+        Raises:
+            None
+        """
+        if updated_node.comment is not None:
+            return cst.RemoveFromParent()
+        return updated_node
+
+    def leave_TrailingWhitespace(self, original_node, updated_node):
+        """Remove trailing comments.
+
+        Args:
+            original_node (cst.TrailingWhitespace): The original whitespace.
+            updated_node (cst.TrailingWhitespace): The updated whitespace.
+
+        Returns:
+            cst.TrailingWhitespace: The whitespace without its comment.
+
+        Raises:
+            None
+        """
+        if updated_node.comment is not None:
+            return updated_node.with_changes(
+                whitespace=cst.SimpleWhitespace(""), comment=None
+            )
+        return updated_node
+
+    def leave_SimpleString(self, original_node, updated_node):
+        """Shorten a long string literal.
+
+        Args:
+            original_node (cst.SimpleString): The original string.
+            updated_node (cst.SimpleString): The updated string.
+
+        Returns:
+            cst.SimpleString: The string, cut to max_string_length characters
+                followed by "...".
+
+        Raises:
+            None
+        """
+        value = updated_node.value
+        if len(value) <= self.max_string_length:
+            return updated_node
+        prefix = updated_node.prefix
+        quote = updated_node.quote
+        body = value[len(prefix) + len(quote) : -len(quote)]
+        body = body[: self.max_string_length].rstrip("\\")
+        return updated_node.with_changes(value=f"{prefix}{quote}{body}...{quote}")
+
+    def on_leave(self, original_node, updated_node):
+        """Keep only the first items of long collection displays.
+
+        Args:
+            original_node (cst.CSTNode): The original node.
+            updated_node (cst.CSTNode): The updated node.
+
+        Returns:
+            cst.CSTNode: The node, with a long collection cut short and ended with
+                an ``...`` item.
+
+        Raises:
+            None
+        """
+        updated_node = super().on_leave(original_node, updated_node)
+        if (
+            isinstance(updated_node, _COLLECTIONS)
+            and len(updated_node.elements) > self.max_collection_items
+        ):
+            if isinstance(updated_node, cst.Dict):
+                ellipsis = cst.DictElement(cst.Ellipsis(), cst.Ellipsis())
+            else:
+                ellipsis = cst.Element(cst.Ellipsis())
+            # The last kept item is followed by another, so it has its comma.
+            elements = list(updated_node.elements[: self.max_collection_items])
+            return updated_node.with_changes(elements=elements + [ellipsis])
+        return updated_node
+
+    def _elide_nested(self, node):
+        """Replace the body of a definition by ``...`` if it is inside a function.
+
+        Args:
+            node (cst.FunctionDef | cst.ClassDef): The definition.
+
+        Returns:
+            cst.FunctionDef | cst.ClassDef: The definition.
+
+        Raises:
+            None
+        """
+        if self._functions and isinstance(node.body, cst.IndentedBlock):
+            return node.with_changes(body=node.body.with_changes(body=[_ellipsis()]))
+        return node
+
+
+def compact_snippet(node, max_tokens=SNIPPET.get("max_tokens")):
+    """Render a class or function for the prompt within a token budget.
+
+    The definition is compacted with SnippetCompactor. If it is still over the
+    budget, the middle of the function body (of ``__init__`` for a class) is
+    elided: the first and last statements are kept, and the elided statements
+    are summarized by the names they call and their raise and return statements.
+    As a last resort the middle lines are dropped.
+
+    Args:
+        node (cst.FunctionDef | cst.ClassDef): The definition, without decorators.
+        max_tokens (int, optional): The budget, as counted by estimate_tokens.
+            None or 0 disables the budget, but not the compaction.
+
+    Returns:
+        str: The code sent to the LLM.
+
+    Raises:
+        None
+    """
+    node = node.visit(SnippetCompactor())
+    code = _render(node)
+    if not max_tokens or estimate_tokens(code) <= max_tokens:
+        return code
+
+    function = node
+    if isinstance(node, cst.ClassDef):
+        function = next(
+            (
+                element
+                for element in node.body.body
+                if isinstance(element, cst.FunctionDef)
+            ),
+            None,
+        )
+    if function is not None and isinstance(function.body, cst.IndentedBlock):
+        statements = list(function.body.body)
+        # Keep as many statements from each end as fit: the most is tried first.
+        low, high = 0, (len(statements) - 1) // 2
+        best = None
+        while low <= high:
+            keep = (low + high) // 2
+            candidate = _render(_replace_body(node, function, _elide(statements, keep)))
+            if estimate_tokens(candidate) <= max_tokens:
+                best = candidate
+                low = keep + 1
+            else:
+                high = keep - 1
+        if best is not None:
+            return best
+        code = _render(_replace_body(node, function, _elide(statements, 0)))
+    return _elide_lines(code, max_tokens)
+
+
+def _render(node):
+    """Render a definition as module code.
+
+    Args:
+        node (cst.CSTNode): The definition.
+
+    Returns:
+        str: The code.
+
+    Raises:
+        None
+    """
+    return cst.Module(body=[node]).code
+
+
+def _ellipsis(comment=None):
+    """Build an ``...`` statement, optionally preceded by a comment line.
+
+    Args:
+        comment (str, optional): The comment text, including "#".
+
+    Returns:
+        cst.SimpleStatementLine: The statement.
+
+    Raises:
+        None
+    """
+    leading_lines = [cst.EmptyLine(comment=cst.Comment(comment))] if comment else []
+    return cst.SimpleStatementLine(
+        body=[cst.Expr(cst.Ellipsis())], leading_lines=leading_lines
+    )
+
+
+def _replace_body(node, function, statements):
+    """Replace the statements of a function, itself or inside a class.
+
+    Args:
+        node (cst.FunctionDef | cst.ClassDef): The rendered definition.
+        function (cst.FunctionDef): The function whose body is replaced; either
+            ``node`` or one of its methods.
+        statements (list): The new statements.
+
+    Returns:
+        cst.FunctionDef | cst.ClassDef: The updated definition.
+
+    Raises:
+        None
+    """
+    updated = function.with_changes(body=function.body.with_changes(body=statements))
+    if node is function:
+        return updated
+    return node.with_changes(
+        body=node.body.with_changes(
+            body=[
+                updated if element is function else element
+                for element in node.body.body
+            ]
+        )
+    )
+
+
+def _elide(statements, keep):
+    """Replace the middle of a list of statements by a summary.
+
+    Args:
+        statements (list): The statements of a function body.
+        keep (int): Number of statements kept at each end.
+
+    Returns:
+        list: The first and last ``keep`` statements around an ``...`` statement
+            commented with the names called by the elided statements, followed by
+            their raise and return statements.
+
+    Raises:
+        None
+    """
+    middle = statements[keep : len(statements) - keep]
+    if not middle:
+        return statements
+    collector = _ExitCollector()
+    for statement in middle:
+        statement.visit(collector)
+    comment = f"# ... {len(middle)} statements elided"
+    if collector.calls:
+        comment += ", calling " + ", ".join(collector.calls)
+    exits = [
+        cst.SimpleStatementLine(body=[exit_statement])
+        for exit_statement in collector.exits
+    ]
+    return (
+        statements[:keep]
+        + [_ellipsis(comment)]
+        + exits
+        + statements[len(statements) - keep :]
+    )
+
+
+class _ExitCollector(cst.CSTVisitor):
+    """Collect the called names and the distinct raise and return statements.
+
+    Raise statements are distinct when they raise different exception types,
+    return statements when their code differs.
+    """
+
+    def __init__(self):
+        """Initialize empty collections.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        super().__init__()
+        self.calls = []
+        self.exits = []
+        self._seen = set()
+
+    def visit_FunctionDef(self, node):
+        """Skip nested functions, whose exits are not the function's own.
+
+        Args:
+            node (cst.FunctionDef): The nested function.
+
+        Returns:
+            bool: False, so the nested function is not visited.
+
+        Raises:
+            None
+        """
+        return False
+
+    def visit_Call(self, node):
+        """Record the name of a called function.
+
+        Args:
+            node (cst.Call): The call.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        name = get_full_name_for_node(node.func)
+        if name and name not in self.calls and len(self.calls) < _MAX_CALLS:
+            self.calls.append(name)
+
+    def visit_Raise(self, node):
+        """Record a raise statement.
+
+        Args:
+            node (cst.Raise): The statement.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        exception = node.exc
+        if isinstance(exception, cst.Call):
+            exception = exception.func
+        name = exception and get_full_name_for_node(exception)
+        self._add(node, "raise " + (name or self._code(node)))
+
+    def visit_Return(self, node):
+        """Record a return statement.
+
+        Args:
+            node (cst.Return): The statement.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._add(node, self._code(node))
+
+    def _add(self, node, key):
+        """Record an exit statement unless an equivalent one was recorded.
+
+        Args:
+            node (cst.Raise | cst.Return): The statement.
+            key (str): Identifies equivalent statements.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if key not in self._seen and len(self.exits) < _MAX_EXITS:
+            self._seen.add(key)
+            self.exits.append(node.with_changes(semicolon=cst.MaybeSentinel.DEFAULT))
+
+    def _code(self, node):
+        """Render a small statement.
+
+        Args:
+            node (cst.BaseSmallStatement): The statement.
+
+        Returns:
+            str: Its code.
+
+        Raises:
+            None
+        """
+        return cst.Module(body=[]).code_for_node(node)
+
+
+def _elide_lines(code, max_tokens):
+    """Drop the middle lines of code until it fits the budget.
+
+    Args:
+        code (str): The code.
+        max_tokens (int): The budget, as counted by estimate_tokens.
+
+    Returns:
+        str: The first and last lines around a comment giving the number of
+            dropped lines. At least the first line is kept.
+
+    Raises:
+        None
+    """
+    lines = code.splitlines()
+    costs = [estimate_tokens(line) for line in lines]
+    budget = max_tokens - estimate_tokens("# ... 0000 lines elided")
+    head = []
+    tail = []
+    # Take lines alternately from each end while they fit.
+    start, stop = 0, len(lines)
+    while start < stop:
+        if len(head) <= len(tail):
+            if costs[start] > budget and head:
+                break
+            budget -= costs[start]
+            head.append(lines[start])
+            start += 1
+        else:
+            if costs[stop - 1] > budget:
+                break
+            budget -= costs[stop - 1]
+            tail.append(lines[stop - 1])
+            stop -= 1
+    if start < stop:
+        indent = lines[start][: len(lines[start]) - len(lines[start].lstrip())]
+        head.append(f"{indent}# ... {stop - start} lines elided")
+    return "\n".join(head + tail[::-1]) + "\n"
@@ -1 +1,175 @@
+import os
+
 AI_MODEL = {"model_name": "gpt-3.5-turbo", "model_family": "openai"}
+
+# Settings of the generation backends other than "openai", selected with the
+# model family.
+BACKENDS = {
+    "local": {
+        "base_url": "http://localhost:8000/v1",
+        "model_name": "local",
+        "max_concurrency": 4,
+    },
+    "deterministic": {"model_name": "deterministic"},
+}
+
+# Bump whenever the prompts in ``docu_gen.utils.llm`` change so cached docstrings
+# generated from an older prompt are not reused.
+PROMPT_VERSION = "2"
+
+# The request preceding the code in the prompts of ``docu_gen.utils.llm``, and
+# the cues the model answers after. The deterministic backend finds the code of
+# a prompt between them.
+PROMPT = {
+    "class_request": (
+        "Now, please generate a docstring for the following class, including only "
+        "the description. Do not include any attributes or methods. Do not include "
+        "the class signature in the docstring."
+    ),
+    "function_request": (
+        "Now, please generate a docstring for the following code, including "
+        "parameter descriptions, return types, and any raises clauses. Do not "
+        "include the function signature in the docstring. Ensure the docstring "
+        "adheres to PEP 257 conventions."
+    ),
+    "batch_request": (
+        "Now, please generate a docstring for each of the following pieces of code."
+    ),
+    "answer": "Docstring:",
+    "batch_answer": "JSON:",
+}
+
+CACHE = {
+    "path": os.path.join(
+        os.path.expanduser("~"), ".cache", "docu_gen", "docstrings.sqlite3"
+    ),
+    "max_entries": 100000,
+    "max_age_days": 90,
+    # Cache hits whose last use is written to the database in one transaction.
+    "touch_batch": 256,
+}
+
+MAX_CONCURRENT_REQUESTS = 8
+
+# Directories never walked, unless ignore files are disabled: version control,
+# virtual environments, dependencies and caches. Build output is left to
+# .gitignore and --exclude, as "build" or "dist" may also name source packages.
+DISCOVERY = {
+    "skip_directories": (
+        ".git",
+        ".hg",
+        ".svn",
+        ".venv",
+        "venv",
+        "node_modules",
+        "__pycache__",
+        ".tox",
+        ".nox",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".docu_gen",
+    ),
+}
+
+MAX_FILES_PER_WORKER = 100
+
+CLIENT = {
+    "api_key_ttl_seconds": 3600,
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry_seconds": 60,
+}
+
+INDEX_PATH = os.path.join(".docu_gen", "index.sqlite3")
+
+# Directory of the journal segments an interrupted run is resumed from.
+JOURNAL_PATH = os.path.join(".docu_gen", "journal")
+
+DAEMON = {
+    "socket_path": os.path.join(".docu_gen", "daemon.sock"),
+    "poll_interval_seconds": 1.0,
+}
+
+BATCH = {
+    "max_targets": 20,
+    "output_tokens_per_target": 300,
+    "max_output_tokens": 4000,
+}
+
+# Files longer than chunk_lines lines are documented one chunk of top-level
+# statements at a time; 0 documents every file whole.
+CHUNKING = {"chunk_lines": 2000}
+
+# Bounds of the stages of --pipeline: files read and planned ahead of generation,
+# and files waiting to be written per worker process.
+PIPELINE = {"max_planned_files": 64, "max_applying_files_per_job": 2}
+
+# Output token limit of a docstring request. Unless disabled, each target gets a
+# smaller limit predicted from its parameters, raised exceptions and size, or
+# from the completion lengths of similar targets once enough were observed,
+# times headroom; a response cut short by the prediction is requested again
+# with max_tokens.
+OUTPUT_BUDGET = {
+    "max_tokens": 1000,
+    "min_tokens": 64,
+    "class_tokens": 60,
+    "function_tokens": 80,
+    "tokens_per_parameter": 30,
+    "tokens_per_raise": 25,
+    "tokens_per_snippet_token": 0.05,
+    "headroom": 1.5,
+    "min_samples": 8,
+    "max_samples": 256,
+}
+
+# Code sent to the LLM is compacted and, above max_tokens estimated tokens, has
+# the middle of its body elided.
+SNIPPET = {
+    "max_tokens": 2000,
+    "max_string_length": 80,
+    "max_collection_items": 8,
+}
+
+# Model routing tiers, from the simplest targets to the most complex. A target
+# goes to the first tier whose max_score its complexity score does not exceed; a
+# max_score of None accepts every target. model_names maps a model family to the
+# tier's model; families without one use the run's model, as does an override
+# that does not cost less per token than the run's model according to prices.
+ROUTING = {
+    "tiers": [
+        {
+            "name": "small",
+            "model_names": {"openai": "gpt-4o-mini"},
+            "max_score": 6,
+            "max_tokens": 500,
+        },
+        {"name": "large", "model_names": {}, "max_score": None, "max_tokens": 1000},
+    ],
+    # USD per million input and output tokens.
+    "prices": {
+        "gpt-4o-mini": (0.15, 0.6),
+        "gpt-3.5-turbo": (0.5, 1.5),
+        "gpt-4o": (2.5, 10.0),
+        "gpt-4-turbo": (10.0, 30.0),
+        "gpt-4": (30.0, 60.0),
+    },
+}
+
+# Structural clone detection: targets are shingled into token n-grams and
+# near-duplicates are looked up with MinHash signatures split into LSH bands.
+DEDUP = {
+    "shingle_size": 5,
+    "minhash_hashes": 32,
+    "lsh_bands": 8,
+    "max_entries": 100000,
+}
+
+RATE_LIMIT = {
+    "requests_per_minute": None,
+    "tokens_per_minute": None,
+    "max_retries": 6,
+    "base_delay_seconds": 1.0,
+    "max_delay_seconds": 60.0,
+    "latency_spike_factor": 3.0,
+    "latency_backoff_factor": 0.9,
+}
@@ -0,0 +1,364 @@
+import os
+import json
+import time
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from docu_gen.core.constant import DAEMON
+from docu_gen.core.discovery import iter_python_files
+from docu_gen.core.runner import _init_worker, _process_file, _worker
+
+
+def _document(file_path, selection):
+    """Process one file in the daemon's worker thread.
+
+    Args:
+        file_path (str): The file to process.
+        selection (set): The only definitions documented, or None for all of them.
+
+    Returns:
+        tuple: The file path, its outcome and its FileReport as a dict. A run
+            cancelled because the file changed again has the outcome "cancelled"
+            and no report.
+
+    Raises:
+        None
+    """
+    try:
+        return _process_file(file_path, selection)
+    except asyncio.CancelledError:
+        print(f"Cancelled processing of file '{file_path}'.")
+        return file_path, "cancelled", None
+
+
+def _merge_selections(first, second):
+    """Combine the definitions requested by two jobs on the same file.
+
+    Args:
+        first (set): The definitions of one job, or None for all of them.
+        second (set): The definitions of the other job, or None for all of them.
+
+    Returns:
+        set: The union, or None if either job covers every definition.
+
+    Raises:
+        None
+    """
+    if first is None or second is None:
+        return None
+    return first | second
+
+
+class DocstringDaemon:
+    """A long-running process keeping the generator, caches and clients warm.
+
+    Files are documented one at a time in a single worker thread that owns the
+    generator. Clients send JSON requests over a Unix socket, and watched
+    directories are polled for changes to document files in the background. A
+    file that changes again while it is processed has its in-flight requests
+    cancelled and is queued again.
+    """
+
+    def __init__(
+        self,
+        options,
+        socket_path=DAEMON.get("socket_path"),
+        watch_paths=None,
+        exclude_patterns=(),
+        discovery=None,
+        poll_interval=DAEMON.get("poll_interval_seconds"),
+    ):
+        """Initialize the daemon without starting it.
+
+        Args:
+            options (dict): The run options of the generator, as for process_files.
+            socket_path (str, optional): Location of the Unix socket clients connect
+                to.
+            watch_paths (list, optional): Files and directories polled for changes.
+                Defaults to None, which watches nothing.
+            exclude_patterns (list, optional): Patterns of watched files to ignore.
+            discovery (dict, optional): Keyword arguments of iter_python_files
+                for the watched directories, e.g. "use_git". Defaults to None.
+            poll_interval (float, optional): Seconds between two polls.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.options = options
+        self.socket_path = socket_path
+        self.watch_paths = list(watch_paths or [])
+        self.exclude_patterns = list(exclude_patterns)
+        self.discovery = dict(discovery or {})
+        self.poll_interval = poll_interval
+        # Queued jobs: file path -> (selection, futures of the waiting clients).
+        self._pending = OrderedDict()
+        self._running = None
+        self._processed = 0
+        self._started = None
+        self._wakeup = None
+        self._stopped = None
+
+    def run(self):
+        """Serve requests until a shutdown request or an interrupt.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the socket cannot be created.
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    async def serve(self):
+        """Serve requests and watch files until a shutdown request.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the socket cannot be created.
+        """
+        self._started = time.monotonic()
+        self._wakeup = asyncio.Event()
+        self._stopped = asyncio.Event()
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        # The worker thread opens the caches, the index and the clients once.
+        executor = ThreadPoolExecutor(
+            max_workers=1, initializer=_init_worker, initargs=(self.options,)
+        )
+        server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path
+        )
+        tasks = [asyncio.create_task(self._work(executor))]
+        if self.watch_paths:
+            tasks.append(asyncio.create_task(self._watch()))
+        print(f"Listening on '{self.socket_path}'.")
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            self._cancel_running()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.get_running_loop().run_in_executor(executor, _close_worker)
+            executor.shutdown(wait=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def submit(self, file_path, selection=None):
+        """Queue a file to be documented.
+
+        A file already queued is not queued twice, and a file being processed has
+        its run cancelled and is queued again.
+
+        Args:
+            file_path (str): The file to document.
+            selection (set, optional): The only definitions documented. Defaults to
+                None, meaning all of them.
+
+        Returns:
+            asyncio.Future: Resolved with the (file path, outcome, report) tuple of
+                the run that documents the file.
+
+        Raises:
+            None
+        """
+        file_path = os.path.abspath(file_path)
+        future = asyncio.get_running_loop().create_future()
+        if file_path in self._pending:
+            queued, futures = self._pending[file_path]
+            self._pending[file_path] = (
+                _merge_selections(queued, selection),
+                futures + [future],
+            )
+        else:
+            self._pending[file_path] = (selection, [future])
+        if self._running == file_path:
+            self._cancel_running()
+        self._wakeup.set()
+        return future
+
+    def _cancel_running(self):
+        """Cancel the in-flight requests of the file being processed.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        generator = _worker.get("generator")
+        if self._running is not None and generator is not None:
+            generator.cancel()
+
+    async def _work(self, executor):
+        """Process the queued files one at a time in the worker thread.
+
+        Args:
+            executor (ThreadPoolExecutor): The single-thread executor owning the
+                generator.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            if not self._pending:
+                self._wakeup.clear()
+                continue
+            file_path, (selection, futures) = self._pending.popitem(last=False)
+            self._running = file_path
+            try:
+                result = await loop.run_in_executor(
+                    executor, _document, file_path, selection
+                )
+            finally:
+                self._running = None
+            self._processed += 1
+            if result[1] == "cancelled" and file_path in self._pending:
+                # The clients are answered by the run of the new content.
+                queued, waiting = self._pending[file_path]
+                self._pending[file_path] = (
+                    _merge_selections(queued, selection),
+                    futures + waiting,
+                )
+                continue
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+    async def _watch(self):
+        """Poll the watched paths and queue the files that changed.
+
+        Every watched file is queued on the first poll, so its docstrings are
+        generated in the background before anyone asks for them.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        loop = asyncio.get_running_loop()
+        seen = {}
+        while True:
+            # Walking the tree blocks, so it runs next to the event loop.
+            current = await loop.run_in_executor(None, self._snapshot)
+            for file_path, signature in current.items():
+                if seen.get(file_path) != signature:
+                    self.submit(file_path)
+            seen = current
+            await asyncio.sleep(self.poll_interval)
+
+    def _snapshot(self):
+        """Return the modification time and size of every watched file.
+
+        Returns:
+            dict: (mtime in nanoseconds, size) tuples keyed by absolute path.
+
+        Raises:
+            None
+        """
+        snapshot = {}
+        for file_path in iter_python_files(
+            self.watch_paths, self.exclude_patterns, **self.discovery
+        ):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(file_path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    async def _handle_client(self, reader, writer):
+        """Answer the JSON requests of one client connection, one per line.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's input.
+            writer (asyncio.StreamWriter): The connection's output.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self._answer(json.loads(line))
+                except (ValueError, TypeError, KeyError) as e:
+                    response = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, request):
+        """Answer one request.
+
+        Args:
+            request (dict): A "command" of "document" with a "path" and optional
+                "qualnames", "status" or "shutdown".
+
+        Returns:
+            dict: The response, with "ok" set to whether the request succeeded.
+
+        Raises:
+            KeyError: If a required field is missing.
+            ValueError: If the command is unknown.
+        """
+        command = request["command"]
+        if command == "document":
+            qualnames = request.get("qualnames")
+            file_path, status, report = await self.submit(
+                request["path"], set(qualnames) if qualnames else None
+            )
+            return {"ok": True, "path": file_path, "status": status, "report": report}
+        if command == "status":
+            return {
+                "ok": True,
+                "running": self._running,
+                "queued": list(self._pending),
+                "processed": self._processed,
+                "uptime_seconds": time.monotonic() - self._started,
+            }
+        if command == "shutdown":
+            self._stopped.set()
+            return {"ok": True}
+        raise ValueError(f"Unknown command '{command}'.")
+
+
+def _close_worker():
+    """Close the generator of the daemon's worker thread.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    generator = _worker.get("generator")
+    if generator is not None:
+        generator.close()
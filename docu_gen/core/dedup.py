@@ -0,0 +1,346 @@
+import re
+import ast
+import zlib
+import hashlib
+import textwrap
+from array import array
+from collections import OrderedDict
+from docu_gen.core.constant import DEDUP
+from docu_gen.utils.docstring_cache import normalize_snippet
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# The comments compact_snippet puts in place of elided statements and lines.
+_ELISION_PATTERN = re.compile(
+    r"^[ \t]*(# \.\.\. \d+ (?:statements|lines) elided.*)$", re.M
+)
+
+_FUNCTION_TYPES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class Structure:
+    """The normalized structure of a target, used to recognize its clones."""
+
+    def __init__(self, fingerprint, interface, text):
+        """Initialize the structure.
+
+        Args:
+            fingerprint (str): Hash of the normalized code. Clones share it.
+            interface (str): Hash of the name and parameters. Only definitions with
+                the same interface are considered near-duplicates.
+            text (str): The normalized code the fingerprint is computed from.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.fingerprint = fingerprint
+        self.interface = interface
+        self.text = text
+        self._shingles = None
+
+    @property
+    def shingles(self):
+        """set: Hashed token n-grams of the normalized code, computed on first use."""
+        if self._shingles is None:
+            self._shingles = _shingles(self.text, DEDUP.get("shingle_size"))
+        return self._shingles
+
+
+def analyze(code_snippet):
+    """Compute the normalized structure of a target's code.
+
+    Docstrings, comments and formatting are ignored, and local variables are
+    renamed by order of appearance. Parameters, globals, attributes and called
+    names are kept, so only code that differs in the names of its local
+    variables is normalized to the same structure. The comments summarizing the
+    statements compact_snippet elided are kept as well, so large definitions
+    that only share the code around the elided middle are told apart.
+
+    Args:
+        code_snippet (str): The code sent to the LLM for the target.
+
+    Returns:
+        Structure: The structure of the code. Code that cannot be parsed is
+            fingerprinted by its normalized text and has no interface.
+
+    Raises:
+        None
+    """
+    try:
+        tree = ast.parse(textwrap.dedent(code_snippet))
+        node = tree.body[0]
+    except (SyntaxError, ValueError, IndexError):
+        text = normalize_snippet(code_snippet)
+        return Structure(_hash(text), None, text)
+
+    interface = [getattr(node, "name", "")]
+    if isinstance(node, _FUNCTION_TYPES):
+        interface.append(ast.dump(node.args))
+
+    nodes = list(ast.walk(node))
+    kept = set()
+    bound = []
+    for child in nodes:
+        body = getattr(child, "body", None)
+        if (
+            isinstance(body, list)
+            and body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            child.body = body[1:] or [ast.Pass()]
+        if isinstance(child, ast.arg):
+            kept.add(child.arg)
+        elif isinstance(child, (ast.Global, ast.Nonlocal)):
+            kept.update(child.names)
+        elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+            bound.append(child.id)
+        elif isinstance(child, ast.ExceptHandler) and child.name:
+            bound.append(child.name)
+    names = {}
+    for name in bound:
+        if name not in kept and name not in names:
+            names[name] = f"_{len(names)}"
+    if names:
+        for child in nodes:
+            if isinstance(child, ast.Name):
+                child.id = names.get(child.id, child.id)
+            elif isinstance(child, ast.ExceptHandler) and child.name:
+                child.name = names.get(child.name, child.name)
+
+    text = "\n".join(
+        [ast.dump(node, annotate_fields=False)] + _ELISION_PATTERN.findall(code_snippet)
+    )
+    return Structure(_hash(text), _hash("\n".join(interface)), text)
+
+
+def _hash(text):
+    """Hash a text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        str: A hex SHA-256 digest.
+
+    Raises:
+        None
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _shingles(text, size):
+    """Hash the token n-grams of a text.
+
+    Args:
+        text (str): The text.
+        size (int): Number of tokens per n-gram.
+
+    Returns:
+        set: The 32-bit hashes of the n-grams.
+
+    Raises:
+        None
+    """
+    tokens = _TOKEN_PATTERN.findall(text)
+    return {
+        zlib.crc32(" ".join(tokens[position : position + size]).encode("utf-8"))
+        for position in range(max(1, len(tokens) - size + 1))
+    }
+
+
+def minhash(shingles, num_hashes=DEDUP.get("minhash_hashes")):
+    """Compute a one-permutation MinHash signature.
+
+    Each shingle is hashed once and assigned to one of ``num_hashes`` bins by its
+    hash; a bin keeps its smallest value and empty bins borrow from the next
+    non-empty one. The signature costs one pass over the shingles instead of one
+    per hash function, and two signatures agree on a share of their bins close to
+    the Jaccard similarity of the shingle sets.
+
+    Args:
+        shingles (set): The 32-bit shingle hashes.
+        num_hashes (int, optional): The signature length.
+
+    Returns:
+        array: The signature, as unsigned 32-bit integers.
+
+    Raises:
+        None
+    """
+    empty = 0xFFFFFFFF
+    signature = array("I", [empty]) * num_hashes
+    for shingle in shingles:
+        shingle = (shingle * 0x9E3779B1) & 0xFFFFFFFF
+        position = shingle % num_hashes
+        if shingle < signature[position]:
+            signature[position] = shingle
+    if shingles:
+        filled = signature.tolist()
+        for position in range(num_hashes):
+            offset = 0
+            while filled[(position + offset) % num_hashes] == empty:
+                offset += 1
+            if offset:
+                borrowed = filled[(position + offset) % num_hashes]
+                signature[position] = (borrowed + offset * 0x61C88647) & 0xFFFFFFFE
+    return signature
+
+
+class NearDuplicateIndex:
+    """A MinHash LSH index of generated docstrings, for near-duplicate targets."""
+
+    def __init__(
+        self,
+        threshold,
+        num_hashes=DEDUP.get("minhash_hashes"),
+        bands=DEDUP.get("lsh_bands"),
+        max_entries=DEDUP.get("max_entries"),
+    ):
+        """Initialize an empty index.
+
+        Args:
+            threshold (float): Minimum estimated Jaccard similarity for a match.
+            num_hashes (int, optional): MinHash signature length.
+            bands (int, optional): Number of LSH bands; must divide num_hashes.
+            max_entries (int, optional): Entries beyond this number are not added.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.threshold = threshold
+        self.num_hashes = num_hashes
+        self.rows = num_hashes // bands
+        self.max_entries = max_entries
+        self._signatures = []
+        self._values = []
+        self._buckets = {}
+
+    def _keys(self, interface, signature):
+        """Return the LSH bucket keys of a signature.
+
+        Args:
+            interface (str): The interface of the target; only targets with the
+                same interface share buckets.
+            signature (array): The MinHash signature.
+
+        Returns:
+            list: One key per band.
+
+        Raises:
+            None
+        """
+        return [
+            (interface, start, signature[start : start + self.rows].tobytes())
+            for start in range(0, self.num_hashes, self.rows)
+        ]
+
+    def query(self, structure):
+        """Return the value of the most similar entry above the threshold.
+
+        Args:
+            structure (Structure): The structure of the target.
+
+        Returns:
+            object: The stored value, or None if no entry is similar enough.
+
+        Raises:
+            None
+        """
+        if structure.interface is None:
+            return None
+        signature = minhash(structure.shingles, self.num_hashes)
+        candidates = set()
+        for key in self._keys(structure.interface, signature):
+            candidates.update(self._buckets.get(key, ()))
+        best, best_similarity = None, self.threshold
+        for candidate in candidates:
+            other = self._signatures[candidate]
+            similarity = sum(a == b for a, b in zip(signature, other)) / self.num_hashes
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return None if best is None else self._values[best]
+
+    def add(self, structure, value):
+        """Add an entry.
+
+        Args:
+            structure (Structure): The structure of the target.
+            value (object): The value returned for near-duplicates of the target.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if structure.interface is None or len(self._values) >= self.max_entries:
+            return
+        signature = minhash(structure.shingles, self.num_hashes)
+        entry = len(self._values)
+        self._signatures.append(signature)
+        self._values.append(value)
+        for key in self._keys(structure.interface, signature):
+            self._buckets.setdefault(key, []).append(entry)
+
+
+class CloneRegistry:
+    """Docstrings generated during the run, keyed by structural fingerprint."""
+
+    def __init__(self, max_entries=DEDUP.get("max_entries")):
+        """Initialize an empty registry.
+
+        Args:
+            max_entries (int, optional): The least recently used fingerprints
+                beyond this number are forgotten.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.max_entries = max_entries
+        self._docstrings = OrderedDict()
+
+    def get(self, fingerprint):
+        """Return the docstring generated for a fingerprint.
+
+        Args:
+            fingerprint (str): The structural fingerprint.
+
+        Returns:
+            str: The docstring, or None.
+
+        Raises:
+            None
+        """
+        docstring = self._docstrings.get(fingerprint)
+        if docstring is not None:
+            self._docstrings.move_to_end(fingerprint)
+        return docstring
+
+    def set(self, fingerprint, docstring):
+        """Record the docstring generated for a fingerprint.
+
+        Args:
+            fingerprint (str): The structural fingerprint.
+            docstring (str): The docstring.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._docstrings[fingerprint] = docstring
+        self._docstrings.move_to_end(fingerprint)
+        while len(self._docstrings) > self.max_entries:
+            self._docstrings.popitem(last=False)
@@ -0,0 +1,489 @@
+import os
+import re
+import fnmatch
+from docu_gen.core.constant import DISCOVERY
+
+
+class ExcludeMatcher:
+    """The exclusion patterns of a run, compiled into a single regular expression.
+
+    Patterns are glob patterns resolved against the current directory, as with
+    ``fnmatch``, and are matched against absolute paths.
+    """
+
+    def __init__(self, exclude_patterns):
+        """Compile the patterns.
+
+        Args:
+            exclude_patterns (list): Glob patterns of the paths to leave out.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        patterns = [
+            os.path.normcase(os.path.abspath(pattern)) for pattern in exclude_patterns
+        ]
+        self._files = _compile_globs(patterns)
+        # Only a pattern ending with "*" matches everything below a directory
+        # it matches, so only those can prune directories.
+        self._directories = _compile_globs(
+            [pattern for pattern in patterns if pattern.endswith("*")]
+        )
+
+    def matches(self, file_path):
+        """Check whether a file is excluded.
+
+        Args:
+            file_path (str): The file path to check.
+
+        Returns:
+            bool: True if any pattern matches the path.
+
+        Raises:
+            None
+        """
+        return self.matches_absolute(os.path.normcase(os.path.abspath(file_path)))
+
+    def matches_absolute(self, absolute_path):
+        """Check whether a normalized absolute file path is excluded.
+
+        Unlike matches, the path is not normalized, which saves the work while
+        walking a tree whose paths are already normalized.
+
+        Args:
+            absolute_path (str): The path, as returned by os.path.abspath and
+                os.path.normcase.
+
+        Returns:
+            bool: True if any pattern matches the path.
+
+        Raises:
+            None
+        """
+        return self._files is not None and self._files.match(absolute_path) is not None
+
+    def excludes_directory(self, absolute_path):
+        """Check whether every file below a directory is excluded.
+
+        Args:
+            absolute_path (str): The normalized absolute path of the directory.
+
+        Returns:
+            bool: True if the directory can be skipped without being walked.
+
+        Raises:
+            None
+        """
+        if self._directories is None:
+            return False
+        return (
+            self._directories.match(absolute_path) is not None
+            or self._directories.match(absolute_path + os.sep) is not None
+        )
+
+
+def _compile_globs(patterns):
+    """Combine glob patterns into one regular expression.
+
+    Args:
+        patterns (list): The glob patterns.
+
+    Returns:
+        re.Pattern: A regular expression matching what any of the patterns
+            matches, or None if there are no patterns.
+
+    Raises:
+        None
+    """
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+class GitIgnore:
+    """The rules of one .gitignore file.
+
+    Rules are matched against paths relative to the directory of the file, with
+    "/" as separator. As in git, the last matching rule wins, "!" negates a rule,
+    a trailing "/" only matches directories and a rule containing a "/" other
+    than a trailing one is anchored to the directory of the file.
+    """
+
+    def __init__(self, base, lines):
+        """Compile the rules.
+
+        Args:
+            base (str): The normalized absolute path of the directory the rules
+                are relative to.
+            lines (iterable): The lines of the file.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.base = base
+        # (regular expression, negated, directories only) in file order.
+        self.rules = []
+        for line in lines:
+            rule = _parse_rule(line)
+            if rule is not None:
+                self.rules.append(rule)
+
+    @classmethod
+    def load(cls, file_path, base):
+        """Read a .gitignore file.
+
+        Args:
+            file_path (str): The file.
+            base (str): The normalized absolute path of the directory its rules
+                are relative to.
+
+        Returns:
+            GitIgnore: The rules, or None if the file cannot be read or has none.
+
+        Raises:
+            None
+        """
+        try:
+            with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+                ignore = cls(base, f.read().splitlines())
+        except OSError:
+            return None
+        return ignore if ignore.rules else None
+
+    def match(self, absolute_path, is_dir):
+        """Find whether the rules ignore a path.
+
+        Args:
+            absolute_path (str): The normalized absolute path, below the base.
+            is_dir (bool): Whether the path is a directory.
+
+        Returns:
+            bool: True if the last matching rule ignores the path, False if it
+                re-includes it, or None if no rule matches.
+
+        Raises:
+            None
+        """
+        relative_path = absolute_path[len(self.base) :].lstrip(os.sep)
+        if os.sep != "/":
+            relative_path = relative_path.replace(os.sep, "/")
+        for regex, negated, directories_only in reversed(self.rules):
+            if directories_only and not is_dir:
+                continue
+            if regex.match(relative_path):
+                return not negated
+        return None
+
+
+def _parse_rule(line):
+    """Compile one line of a .gitignore file.
+
+    Args:
+        line (str): The line.
+
+    Returns:
+        tuple: The regular expression matching the relative paths the rule
+            applies to, whether the rule is negated and whether it only applies
+            to directories, or None for blank lines and comments.
+
+    Raises:
+        None
+    """
+    if line.endswith("\\ "):
+        line = line.rstrip() + " "
+    else:
+        line = line.rstrip()
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+    directories_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    line = line.lstrip("/")
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + _translate_rule(line) + r"\Z"), negated, directories_only
+
+
+def _translate_rule(pattern):
+    """Translate a .gitignore pattern into a regular expression.
+
+    Unlike fnmatch, "*" and "?" do not match "/", and "**" matches any number of
+    directories.
+
+    Args:
+        pattern (str): The pattern, without negation, leading or trailing "/".
+
+    Returns:
+        str: The regular expression, without anchors.
+
+    Raises:
+        None
+    """
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("/**", i) and i + 3 == len(pattern):
+            parts.append("/.*")
+            break
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                parts.append(re.escape(char))
+            else:
+                chars = pattern[i + 1 : end]
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                parts.append("[" + chars.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return "".join(parts)
+
+
+def _parent_ignores(directory):
+    """Load the ignore rules of the repository a directory belongs to.
+
+    Every .gitignore from the directory's parent up to the repository root, and
+    the root's ``.git/info/exclude``, apply to the directory.
+
+    Args:
+        directory (str): The normalized absolute path of a walked directory.
+
+    Returns:
+        list: GitIgnore objects, outermost first; empty if the directory is not
+            inside a git repository.
+
+    Raises:
+        None
+    """
+    ignores = []
+    current = directory
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):
+            break
+        parent = os.path.dirname(current)
+        if parent == current:
+            return []
+        current = parent
+        ignore = GitIgnore.load(os.path.join(current, ".gitignore"), current)
+        if ignore is not None:
+            ignores.append(ignore)
+    exclude = GitIgnore.load(os.path.join(current, ".git", "info", "exclude"), current)
+    if exclude is not None:
+        ignores.append(exclude)
+    return ignores[::-1]
+
+
+def _is_ignored(ignores, absolute_path, is_dir):
+    """Check whether the applicable ignore rules ignore a path.
+
+    Args:
+        ignores (list): GitIgnore objects, outermost first.
+        absolute_path (str): The normalized absolute path.
+        is_dir (bool): Whether the path is a directory.
+
+    Returns:
+        bool: True if the path is ignored.
+
+    Raises:
+        None
+    """
+    # Rules of a deeper .gitignore take precedence over those of its parents.
+    for ignore in reversed(ignores):
+        ignored = ignore.match(absolute_path, is_dir)
+        if ignored is not None:
+            return ignored
+    return False
+
+
+def _walk(path, matcher, use_ignore_files):
+    """Yield the Python files below a directory, pruning what is left out.
+
+    Directories matched by an exclusion pattern, ignored by a .gitignore or
+    named in DISCOVERY["skip_directories"] are not descended into.
+
+    Args:
+        path (str): The directory.
+        matcher (ExcludeMatcher): The exclusion patterns.
+        use_ignore_files (bool): Whether .gitignore files and the skipped
+            directory names apply.
+
+    Yields:
+        str: The path of each Python file that is not left out.
+
+    Raises:
+        None
+    """
+    skipped = set(DISCOVERY.get("skip_directories")) if use_ignore_files else set()
+    top = os.path.normcase(os.path.abspath(path))
+    ignores = _parent_ignores(top) if use_ignore_files else []
+    # (path as given, normalized absolute path, applicable ignore rules)
+    stack = [(path, top, ignores)]
+    while stack:
+        root, absolute_root, ignores = stack.pop()
+        if use_ignore_files:
+            ignore = GitIgnore.load(os.path.join(root, ".gitignore"), absolute_root)
+            if ignore is not None:
+                ignores = ignores + [ignore]
+        try:
+            with os.scandir(root) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        directories = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            absolute_path = os.path.join(absolute_root, os.path.normcase(entry.name))
+            if is_dir:
+                # Symbolic links to directories are not followed, as in os.walk.
+                if (
+                    entry.name in skipped
+                    or entry.is_symlink()
+                    or matcher.excludes_directory(absolute_path)
+                    or _is_ignored(ignores, absolute_path, True)
+                ):
+                    continue
+                directories.append((entry.path, absolute_path, ignores))
+            elif (
+                entry.name.endswith(".py")
+                and not matcher.matches_absolute(absolute_path)
+                and not _is_ignored(ignores, absolute_path, False)
+            ):
+                yield entry.path
+        stack.extend(reversed(directories))
+
+
+def _git_files(path):
+    """List the Python files git tracks or would track below a directory.
+
+    Args:
+        path (str): The directory.
+
+    Returns:
+        list: The paths of the tracked and untracked, not ignored Python files
+            that exist, or None if the directory is not in a git repository or
+            git is not installed.
+
+    Raises:
+        None
+    """
+    # Imported here so discovery without git does not pay for it.
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            [
+                "git",
+                "-C",
+                path,
+                "ls-files",
+                "-z",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--",
+                "*.py",
+            ],
+            capture_output=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    files = []
+    seen = set()
+    for name in os.fsdecode(result.stdout).split("\0"):
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        file_path = os.path.join(path, name)
+        # Tracked files deleted from the working tree are still listed.
+        if os.path.isfile(file_path):
+            files.append(file_path)
+    return files
+
+
+def iter_python_files(paths, exclude_patterns, use_ignore_files=True, use_git=False):
+    """Yield the Python files under the given paths as they are discovered.
+
+    Directories left out are pruned instead of being walked. A file given
+    explicitly is only left out by the exclusion patterns.
+
+    Args:
+        paths (list): File or directory paths to search.
+        exclude_patterns (list): Patterns of files to leave out.
+        use_ignore_files (bool, optional): Whether to leave out the files ignored
+            by .gitignore files and the directories named in
+            DISCOVERY["skip_directories"]. Defaults to True.
+        use_git (bool, optional): Whether to list the files of directories in a
+            git repository with ``git ls-files`` instead of walking them.
+            Directories outside a repository are walked. Defaults to False.
+
+    Yields:
+        str: The path of each Python file that is not excluded.
+
+    Raises:
+        None
+    """
+    matcher = ExcludeMatcher(exclude_patterns)
+    for path in paths:
+        if os.path.isfile(path):
+            if path.endswith(".py") and not matcher.matches(path):
+                yield path
+            continue
+        files = _git_files(path) if use_git else None
+        if files is None:
+            yield from _walk(path, matcher, use_ignore_files)
+            continue
+        for file_path in files:
+            if not matcher.matches(file_path):
+                yield file_path
+
+
+def is_excluded(file_path, exclude_patterns):
+    """Check if a file path is excluded based on a list of patterns.
+
+    Prefer an ExcludeMatcher when checking many paths against the same patterns.
+
+    Args:
+        file_path (str): The file path to check for exclusion.
+        exclude_patterns (list): A list of patterns to match against the file path.
+
+    Returns:
+        bool: True if the file path is excluded by any of the patterns, False otherwise.
+
+    Raises:
+        None
+    """
+    return ExcludeMatcher(exclude_patterns).matches(file_path)
@@ -1,18 +1,87 @@
-import os
-import fnmatch
 import libcst as cst
-from docu_gen.utils.llm import LLM
-from docu_gen.core.validate import validate_only_docstrings_added
+from docu_gen.core.compactor import compact_snippet
+from docu_gen.core.constant import CHUNKING, SNIPPET
+from docu_gen.core.generator import DocstringGenerator
+from docu_gen.core.discovery import is_excluded  # noqa: F401
+from docu_gen.core.docstring_remover import has_docstring
+from docu_gen.core.file_processor import add_docstrings_to_file  # noqa: F401
+from docu_gen.core.report import FileReport
+from docu_gen.core.scanner import split_top_level
 
 
-class DocstringAdder(cst.CSTTransformer):
-    """A class that adds docstrings to other classes."""
+def _as_block(body):
+    """Turn a one-line suite into the equivalent indented block.
+
+    Args:
+        body (cst.BaseSuite): The body of a class or function.
+
+    Returns:
+        cst.IndentedBlock: The body, with the statements of a suite such as
+            ``def f(): return 1`` moved onto their own line. A leading docstring
+            gets a line of its own.
+
+    Raises:
+        None
+    """
+    if isinstance(body, cst.IndentedBlock):
+        return body
+    statements = list(body.body)
+    lines = []
+    if has_docstring(statements) and len(statements) > 1:
+        docstring = statements.pop(0).with_changes(semicolon=cst.MaybeSentinel.DEFAULT)
+        lines.append(cst.SimpleStatementLine(body=[docstring]))
+    lines.append(
+        cst.SimpleStatementLine(
+            body=statements, trailing_whitespace=body.trailing_whitespace
+        )
+    )
+    return cst.IndentedBlock(body=lines)
+
+
+class DocstringTarget:
+    """A class, method or function that needs a docstring."""
+
+    def __init__(self, index, qualname, code_type, code_snippet):
+        """Initialize the target.
 
-    def __init__(self, override=False):
-        """Initialize the object with optional override flag.
+        Args:
+            index (int): Pre-order position of the definition among all class and
+                function definitions in the module.
+            qualname (str): Dotted name of the definition, e.g. "Class.method".
+            code_type (str): The type of code ("class", "method" or "function").
+            code_snippet (str): The code sent to the LLM.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.index = index
+        self.qualname = qualname
+        self.code_type = code_type
+        self.code_snippet = code_snippet
+        # The routing tier chosen by the generator's router, if any.
+        self.tier = None
+
+
+class DocstringPlanner(cst.CSTVisitor):
+    """A class that collects the classes and functions that need a docstring."""
+
+    def __init__(
+        self,
+        override=False,
+        qualnames=None,
+        snippet_tokens=SNIPPET.get("max_tokens"),
+        selection=None,
+    ):
+        """Initialize the planner with optional override flag.
 
         Args:
-            override (bool, optional): A flag indicating whether to override certain settings. Defaults to False.
+            override (bool, optional): Whether definitions that already have a docstring are planned too. Defaults to False.
+            qualnames (set, optional): With override, the only documented definitions that are planned. Defaults to None, meaning all of them.
+            snippet_tokens (int, optional): Estimated token budget of the code sent for each target. Defaults to SNIPPET["max_tokens"].
+            selection (set, optional): The only definitions that are planned at all. Defaults to None, meaning all of them.
 
         Raises:
             None
@@ -21,16 +90,20 @@ class DocstringAdder(cst.CSTTransformer):
             None
         """
         super().__init__()
-        self.llm = LLM()
-        self.llm.initialize_client()
-        self.current_class_name = None
         self.override = override
+        self.qualnames = qualnames
+        self.snippet_tokens = snippet_tokens
+        self.selection = selection
+        self.targets = []
+        self.current_class_name = None
+        self._next_index = 0
+        self._scope = []
 
     def visit_ClassDef(self, node):
-        """Update the current class name when entering a class definition.
+        """Enter a class definition and record its position.
 
         Args:
-            node (ast.ClassDef): The AST node representing the class definition.
+            node (cst.ClassDef): The class definition being entered.
 
         Returns:
             None
@@ -38,112 +111,120 @@ class DocstringAdder(cst.CSTTransformer):
         Raises:
             None
         """
-        # Entering a class definition
+        self._enter(node)
         self.current_class_name = node.name.value
 
-    def leave_ClassDef(self, original_node, updated_node):
-        """Leaves the ClassDef node with an updated docstring.
-
-        Checks if the class already has a docstring. If not, generates a docstring based on the simplified class code for the LLM (Language Model). Inserts the generated docstring at the beginning of the class body.
+    def leave_ClassDef(self, original_node):
+        """Plan a docstring for the class if it needs one.
 
         Args:
-            self: The instance of the class.
-            original_node (cst.ClassDef): The original ClassDef node.
-            updated_node (cst.ClassDef): The updated ClassDef node.
+            original_node (cst.ClassDef): The class definition being left.
 
         Returns:
-            cst.ClassDef: The updated ClassDef node with the inserted docstring.
+            None
 
         Raises:
-            None.
+            None
         """
-        if self.override or not self._has_docstring(original_node.body.body):
-            class_code = self._get_class_code(original_node)
-            docstring = self.llm.generate_docstring(class_code, code_type="class")
-            if docstring:
-                docstring_node = cst.SimpleStatementLine(
-                    body=[cst.Expr(value=cst.SimpleString(f'"""{docstring}"""'))]
-                )
-                new_body = [docstring_node] + list(
-                    updated_node.body.body[1:]
-                    if self.override
-                    else updated_node.body.body
-                )
-                updated_node = updated_node.with_changes(
-                    body=updated_node.body.with_changes(body=new_body)
+        index, qualname = self._scope.pop()
+        if self._needs_docstring(original_node, qualname):
+            self.targets.append(
+                DocstringTarget(
+                    index, qualname, "class", self._get_class_code(original_node)
                 )
+            )
         self.current_class_name = None
-        return updated_node
 
-    def leave_FunctionDef(self, original_node, updated_node):
-        """Check if the function already has a docstring and add one if needed.
+    def visit_FunctionDef(self, node):
+        """Enter a function definition and record its position.
 
         Args:
-            self: The instance of the class.
-            original_node: The original AST node representing the function definition.
-            updated_node: The updated AST node representing the function definition.
+            node (cst.FunctionDef): The function definition being entered.
 
         Returns:
-            cst.FunctionDef: The updated AST node with the docstring added if necessary.
+            None
 
         Raises:
-            N/A
+            None
         """
-        if self.override or not self._has_docstring(original_node.body.body):
-            function_code = self._get_code_without_decorators(original_node)
-            is_method = self.current_class_name is not None
-            code_type = "method" if is_method else "function"
-            docstring = self.llm.generate_docstring(function_code, code_type=code_type)
-            if docstring:
-                docstring_node = cst.SimpleStatementLine(
-                    body=[cst.Expr(value=cst.SimpleString(f'"""{docstring}"""'))]
-                )
-                new_body = [docstring_node] + list(
-                    updated_node.body.body[1:]
-                    if self.override
-                    else updated_node.body.body
-                )
-                updated_node = updated_node.with_changes(
-                    body=updated_node.body.with_changes(body=new_body)
+        self._enter(node)
+
+    def leave_FunctionDef(self, original_node):
+        """Plan a docstring for the function or method if it needs one.
+
+        Args:
+            original_node (cst.FunctionDef): The function definition being left.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        index, qualname = self._scope.pop()
+        if self._needs_docstring(original_node, qualname):
+            code_type = "method" if self.current_class_name is not None else "function"
+            self.targets.append(
+                DocstringTarget(
+                    index,
+                    qualname,
+                    code_type,
+                    self._get_code_without_decorators(original_node),
                 )
-        return updated_node
+            )
 
-    def _has_docstring(self, body):
-        """Check if a given body has a docstring.
+    def _needs_docstring(self, node, qualname):
+        """Decide whether a definition is planned.
 
         Args:
-            self: The object instance.
-            body (List[cst.BaseStatement]): The body of the function or class to check for a docstring.
+            node (cst.ClassDef | cst.FunctionDef): The definition.
+            qualname (str): Its qualified name.
 
         Returns:
-            bool: True if the body contains a docstring, False otherwise.
+            bool: True if the definition is selected and has no docstring, or if
+                override applies to it.
 
         Raises:
-            None.
+            None
         """
-        if body and isinstance(body[0], cst.SimpleStatementLine):
-            stmt = body[0].body[0]
-            if isinstance(stmt, cst.Expr) and isinstance(stmt.value, cst.SimpleString):
-                return True
-        return False
+        if self.selection is not None and qualname not in self.selection:
+            return False
+        if not has_docstring(node.body.body):
+            return True
+        return self.override and (self.qualnames is None or qualname in self.qualnames)
+
+    def _enter(self, node):
+        """Assign the next pre-order index and qualified name to a definition.
+
+        Args:
+            node (cst.ClassDef | cst.FunctionDef): The definition being entered.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        parent = self._scope[-1][1] + "." if self._scope else ""
+        self._scope.append((self._next_index, parent + node.name.value))
+        self._next_index += 1
 
     def _get_code_without_decorators(self, node):
-        """Get the code of a function without decorators.
+        """Get the compacted code of a function without decorators.
 
         Args:
             self: The instance of the class.
             node (cst.FunctionDef): The function node containing decorators.
 
         Returns:
-            str: The code of the function without decorators.
+            str: The code of the function without decorators, compacted to the
+                snippet token budget.
 
         Raises:
             None.
         """
         function_def = node.with_changes(decorators=[])
-        module = cst.Module(body=[function_def])
-        function_code = module.code
-        return function_code
+        return compact_snippet(function_def, self.snippet_tokens)
 
     def _get_class_code(self, node):
         """Extracts the code for a class containing only the __init__ method and
@@ -154,11 +235,12 @@ class DocstringAdder(cst.CSTTransformer):
             node (cst.ClassDef): The class node to extract code from.
 
         Returns:
-            str: The code representing the class with only the __init__ method and attribute assignments.
+            str: The code representing the class with only the __init__ method and attribute assignments, compacted to the snippet token budget.
 
         Raises:
             None.
         """
+        node = node.with_changes(body=_as_block(node.body))
         init_method = None
         for element in node.body.body:
             if (
@@ -176,9 +258,152 @@ class DocstringAdder(cst.CSTTransformer):
             class_def = node.with_changes(
                 bases=[], decorators=[], body=node.body.with_changes(body=[pass_stmt])
             )
-        module = cst.Module(body=[class_def])
-        class_code = module.code
-        return class_code
+        return compact_snippet(class_def, self.snippet_tokens)
+
+
+class DocstringAdder(cst.CSTTransformer):
+    """A class that adds docstrings to other classes."""
+
+    def __init__(self, override=False, docstrings=None):
+        """Initialize the transformer with the docstrings to insert.
+
+        Args:
+            override (bool, optional): Without docstrings, whether definitions that
+                already have a docstring are documented again. Defaults to False.
+            docstrings (dict, optional): Docstrings keyed by the pre-order index of
+                the definition they belong to, as assigned by DocstringPlanner.
+                Defaults to None, which plans and generates the docstrings of the
+                visited module with a new DocstringGenerator.
+
+        Raises:
+            None
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.override = override
+        self.docstrings = docstrings
+        self._next_index = 0
+        self._indexes = []
+
+    def visit_Module(self, node):
+        """Plan and generate the docstrings of the module if none were given.
+
+        Args:
+            node (cst.Module): The module being visited.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if self.docstrings is None:
+            targets = plan_docstrings(node, override=self.override)
+            generator = DocstringGenerator()
+            try:
+                self.docstrings = generator.generate(targets)
+            finally:
+                generator.close()
+
+    def visit_ClassDef(self, node):
+        """Record the position of a class definition when entering it.
+
+        Args:
+            node (cst.ClassDef): The class definition being entered.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._enter()
+
+    def leave_ClassDef(self, original_node, updated_node):
+        """Leaves the ClassDef node with an updated docstring.
+
+        Args:
+            self: The instance of the class.
+            original_node (cst.ClassDef): The original ClassDef node.
+            updated_node (cst.ClassDef): The updated ClassDef node.
+
+        Returns:
+            cst.ClassDef: The updated ClassDef node with the inserted docstring.
+
+        Raises:
+            None.
+        """
+        return self._insert_docstring(updated_node)
+
+    def visit_FunctionDef(self, node):
+        """Record the position of a function definition when entering it.
+
+        Args:
+            node (cst.FunctionDef): The function definition being entered.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._enter()
+
+    def leave_FunctionDef(self, original_node, updated_node):
+        """Add the planned docstring to a function definition.
+
+        Args:
+            self: The instance of the class.
+            original_node: The original AST node representing the function definition.
+            updated_node: The updated AST node representing the function definition.
+
+        Returns:
+            cst.FunctionDef: The updated AST node with the docstring added if necessary.
+
+        Raises:
+            N/A
+        """
+        return self._insert_docstring(updated_node)
+
+    def _enter(self):
+        """Assign the next pre-order index to the definition being entered.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._indexes.append(self._next_index)
+        self._next_index += 1
+
+    def _insert_docstring(self, updated_node):
+        """Insert the planned docstring, replacing an existing one.
+
+        Args:
+            updated_node (cst.ClassDef | cst.FunctionDef): The definition being left.
+
+        Returns:
+            cst.ClassDef | cst.FunctionDef: The definition with its docstring.
+
+        Raises:
+            None
+        """
+        docstring = self.docstrings.get(self._indexes.pop())
+        if docstring:
+            docstring_node = cst.SimpleStatementLine(
+                body=[cst.Expr(value=cst.SimpleString(f'"""{docstring}"""'))]
+            )
+            body = _as_block(updated_node.body)
+            new_body = [docstring_node] + list(
+                body.body[1:] if has_docstring(body.body) else body.body
+            )
+            updated_node = updated_node.with_changes(
+                body=body.with_changes(body=new_body)
+            )
+        return updated_node
 
 
 class ClassOrFunctionFinder(cst.CSTVisitor):
@@ -233,21 +458,75 @@ class ClassOrFunctionFinder(cst.CSTVisitor):
         return False
 
 
-def add_docstrings_to_code(source_code, file_path, override=False):
-    """Add docstrings to classes and functions in Python source code.
+def plan_docstrings(module, override=False, qualnames=None, selection=None):
+    """Collect the classes and functions of a module that need a docstring.
 
     Args:
-        source_code (str): The source code to analyze and add docstrings to.
+        module (cst.Module): The parsed module.
+        override (bool, optional): Whether to plan definitions that already have a docstring. Defaults to False.
+        qualnames (set, optional): With override, the only documented definitions to plan. Defaults to None, meaning all of them.
+        selection (set, optional): The only definitions to plan at all. Defaults to None, meaning all of them.
+
+    Returns:
+        list: The DocstringTarget objects, in the order their definitions are left.
+
+    Raises:
+        None
+    """
+    planner = DocstringPlanner(
+        override=override, qualnames=qualnames, selection=selection
+    )
+    module.visit(planner)
+    return planner.targets
+
+
+def apply_docstrings(module, docstrings):
+    """Insert generated docstrings into a module in a single transform.
+
+    Args:
+        module (cst.Module): The module the docstrings were planned on.
+        docstrings (dict): Docstrings keyed by target index.
+
+    Returns:
+        cst.Module: The transformed module.
+
+    Raises:
+        None
+    """
+    if not docstrings:
+        return module
+    return module.visit(DocstringAdder(docstrings=docstrings))
+
+
+def plan_code(
+    source_code,
+    file_path,
+    override=False,
+    qualnames=None,
+    report=None,
+    selection=None,
+):
+    """Parse source code and collect the targets that need a docstring.
+
+    Args:
+        source_code (str): The source code to analyze.
         file_path (str): The path to the file containing the source code.
         override (bool, optional): Whether to override existing docstrings. Defaults to False.
+        qualnames (set, optional): With override, the only documented definitions whose docstring is regenerated. Defaults to None, meaning all of them.
+        report (FileReport, optional): Receives the time spent in each stage. Defaults to None.
+        selection (set, optional): The only definitions documented. Defaults to None, meaning all of them.
 
     Returns:
-        str: The modified source code with added docstrings.
+        tuple: The parsed module and its DocstringTarget objects. The list is
+            empty for code without classes or functions or with nothing to do.
 
     Raises:
-        None
+        libcst.ParserSyntaxError: If the source code cannot be parsed.
     """
-    module = cst.parse_module(source_code)
+    if report is None:
+        report = FileReport(file_path)
+    with report.stage("parse"):
+        module = cst.parse_module(source_code)
 
     if not any(
         not isinstance(stmt, (cst.EmptyLine, cst.SimpleStatementLine))
@@ -260,74 +539,123 @@ def add_docstrings_to_code(source_code, file_path, override=False):
         print(
             f"File '{file_path}' is empty or contains only comments and will be skipped."
         )
-        return source_code
+        return module, []
 
     class_or_function_finder = ClassOrFunctionFinder()
-    module.visit(class_or_function_finder)
+    with report.stage("finder"):
+        module.visit(class_or_function_finder)
 
     if not class_or_function_finder.has_class_or_function:
         print(
             f"File '{file_path}' does not contain classes, methods, or functions and will be skipped."
         )
-        return source_code
-
-    transformer = DocstringAdder(override=override)
-    modified_tree = module.visit(transformer)
-    return modified_tree.code
+        return module, []
 
+    with report.stage("plan"):
+        targets = plan_docstrings(
+            module, override=override, qualnames=qualnames, selection=selection
+        )
+    return module, targets
+
+
+def add_docstrings_to_code(
+    source_code,
+    file_path,
+    override=False,
+    generator=None,
+    qualnames=None,
+    report=None,
+    selection=None,
+):
+    """Add docstrings to classes and functions in Python source code.
 
-def add_docstrings_to_file(file_path, override=False):
-    """Add docstrings to the functions in a Python file and write them back to the file.
+    Targets are collected in a planning pass, generated concurrently and then
+    inserted in one final transform.
 
     Args:
-        file_path (str): The path to the Python file to process.
+        source_code (str): The source code to analyze and add docstrings to.
+        file_path (str): The path to the file containing the source code.
         override (bool, optional): Whether to override existing docstrings. Defaults to False.
+        generator (DocstringGenerator, optional): Generator used for the LLM calls. Defaults to a new generator.
+        qualnames (set, optional): With override, the only documented definitions whose docstring is regenerated. Defaults to None, meaning all of them.
+        report (FileReport, optional): Receives the time spent in each stage and the LLM requests. Defaults to None.
+        selection (set, optional): The only definitions documented. Defaults to None, meaning all of them.
+
+    Returns:
+        str: The modified source code with added docstrings.
 
     Raises:
-        FileNotFoundError: If the specified file_path does not exist.
-        PermissionError: If the file cannot be opened due to permission issues.
-        UnicodeDecodeError: If the file cannot be decoded using the specified encoding.
-        IOError: If an I/O error occurs while reading or writing the file.
+        None
     """
-    print(f"Processing file: {file_path}")
-    with open(file_path, "r", encoding="utf-8") as f:
-        source_code = f.read()
-
-    if not source_code.strip():
-        print(f"File '{file_path}' is empty and will be skipped.")
-        return
-
-    modified_code = add_docstrings_to_code(source_code, file_path, override)
-
-    print(f"Validating changes for file: {file_path}")
-    if validate_only_docstrings_added(source_code, modified_code):
-        if modified_code != source_code:
-            print(f"Generated Docstring for: {file_path}")
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(modified_code)
-                print(f"Validation passed for file: {file_path}. Changes written.")
-        else:
-            print(f"No changes made to file: {file_path}")
-    else:
-        print(
-            f"Validation failed for file '{file_path}'. Code was modified beyond adding docstrings."
-        )
-
+    if report is None:
+        report = FileReport(file_path)
+    module, targets = plan_code(
+        source_code, file_path, override, qualnames, report, selection
+    )
+    if not targets:
+        return source_code
 
-def is_excluded(file_path, exclude_patterns):
-    """Check if a file path is excluded based on a list of patterns.
+    if generator is None:
+        generator = DocstringGenerator()
+    with report.stage("llm"):
+        docstrings = generator.generate(targets, report)
+    with report.stage("transform"):
+        return apply_docstrings(module, docstrings).code
+
+
+def iter_docstring_chunks(
+    source_code,
+    file_path,
+    override=False,
+    generator=None,
+    qualnames=None,
+    report=None,
+    selection=None,
+    chunk_lines=CHUNKING.get("chunk_lines"),
+):
+    """Add docstrings to a module one chunk of top-level statements at a time.
+
+    Each chunk is parsed, planned, generated and transformed on its own and its
+    trees are released before the next chunk is parsed, so memory follows the
+    largest chunk rather than the file. Qualified names do not depend on the
+    chunking, so the result is the same as the one of add_docstrings_to_code.
 
     Args:
-        file_path (str): The file path to check for exclusion.
-        exclude_patterns (list): A list of patterns to match against the file path.
+        source_code (str): The source code to analyze and add docstrings to.
+        file_path (str): The path to the file containing the source code.
+        override (bool, optional): Whether to override existing docstrings. Defaults to False.
+        generator (DocstringGenerator, optional): Generator used for the LLM calls. Defaults to a new generator.
+        qualnames (set, optional): With override, the only documented definitions whose docstring is regenerated. Defaults to None, meaning all of them.
+        report (FileReport, optional): Receives the time spent in each stage and the LLM requests. Defaults to None.
+        selection (set, optional): The only definitions documented. Defaults to None, meaning all of them.
+        chunk_lines (int, optional): The number of lines after which a chunk is closed at the next top-level statement.
 
-    Returns:
-        bool: True if the file path is excluded by any of the patterns, False otherwise.
+    Yields:
+        tuple: The original code of each chunk and the code with docstrings added.
+            Joined, the chunks give back the module.
 
     Raises:
-        None
+        tokenize.TokenError: If the code cannot be tokenized.
+        libcst.ParserSyntaxError: If a chunk cannot be parsed.
     """
-    for pattern in exclude_patterns:
-        if fnmatch.fnmatch(os.path.abspath(file_path), os.path.abspath(pattern)):
-            return True
-    return False
+    if report is None:
+        report = FileReport(file_path)
+    if generator is None:
+        generator = DocstringGenerator()
+    for chunk in split_top_level(source_code, chunk_lines):
+        with report.stage("parse"):
+            module = cst.parse_module(chunk)
+        with report.stage("plan"):
+            targets = plan_docstrings(
+                module, override=override, qualnames=qualnames, selection=selection
+            )
+        if not targets:
+            yield chunk, chunk
+            continue
+        with report.stage("llm"):
+            docstrings = generator.generate(targets, report)
+        with report.stage("transform"):
+            modified_chunk = apply_docstrings(module, docstrings).code
+        # The trees are not needed while the caller validates and writes.
+        del module, targets, docstrings
+        yield chunk, modified_chunk
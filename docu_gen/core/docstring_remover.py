@@ -1,6 +1,48 @@
 import libcst as cst
 
 
+def _is_string(node):
+    """Check if an expression is a string literal or a concatenation of them.
+
+    Args:
+        node (cst.BaseExpression): The expression to check.
+
+    Returns:
+        bool: True for a plain or bytes literal, or an implicit concatenation of
+            them. Formatted strings are not constants and do not count.
+
+    Raises:
+        None
+    """
+    if isinstance(node, cst.ConcatenatedString):
+        return _is_string(node.left) and _is_string(node.right)
+    return isinstance(node, cst.SimpleString)
+
+
+def has_docstring(body):
+    """Check if a body starts with a docstring.
+
+    This is the rule Python uses for __doc__, and scanner.has_docstring applies it
+    to the ast, so the planner and the counts of undocumented definitions agree.
+
+    Args:
+        body (Sequence): The statements of a module or an indented block, or the
+            small statements of a one-line suite such as ``def f(): "doc"``.
+
+    Returns:
+        bool: True if the first statement is a string expression.
+
+    Raises:
+        None
+    """
+    if not body:
+        return False
+    statement = body[0]
+    if isinstance(statement, cst.SimpleStatementLine):
+        statement = statement.body[0]
+    return isinstance(statement, cst.Expr) and _is_string(statement.value)
+
+
 class DocstringRemover(cst.CSTTransformer):
     """A class that removes docstrings from Python code."""
 
@@ -18,7 +60,7 @@ class DocstringRemover(cst.CSTTransformer):
         Raises:
             None.
         """
-        if self._has_docstring(updated_node.body):
+        if has_docstring(updated_node.body):
             new_body = updated_node.body[1:]
             updated_node = updated_node.with_changes(body=new_body)
         return updated_node
@@ -37,12 +79,7 @@ class DocstringRemover(cst.CSTTransformer):
         Raises:
             None.
         """
-        if self._has_docstring(updated_node.body.body):
-            new_body = updated_node.body.body[1:]
-            updated_node = updated_node.with_changes(
-                body=updated_node.body.with_changes(body=new_body)
-            )
-        return updated_node
+        return _remove_docstring(updated_node)
 
     def leave_FunctionDef(self, original_node, updated_node):
         """Removes the docstring from a function definition node.
@@ -58,28 +95,25 @@ class DocstringRemover(cst.CSTTransformer):
         Raises:
             None.
         """
-        if self._has_docstring(updated_node.body.body):
-            new_body = updated_node.body.body[1:]
-            updated_node = updated_node.with_changes(
-                body=updated_node.body.with_changes(body=new_body)
-            )
-        return updated_node
+        return _remove_docstring(updated_node)
 
-    def _has_docstring(self, body):
-        """Check if a given body has a docstring.
 
-        Args:
-            self: The object instance.
-            body (List[cst.BaseStatement]): The body of the function or class to check for a docstring.
+def _remove_docstring(node):
+    """Remove the docstring of a class or function definition.
 
-        Returns:
-            bool: True if the body contains a docstring, False otherwise.
+    Args:
+        node (cst.ClassDef | cst.FunctionDef): The definition.
 
-        Raises:
-            None.
-        """
-        if body and isinstance(body[0], cst.SimpleStatementLine):
-            stmt = body[0].body[0]
-            if isinstance(stmt, cst.Expr) and isinstance(stmt.value, cst.SimpleString):
-                return True
-        return False
+    Returns:
+        cst.ClassDef | cst.FunctionDef: The definition without its docstring. A
+            one-line suite left empty gets a ``pass``.
+
+    Raises:
+        None
+    """
+    if not has_docstring(node.body.body):
+        return node
+    new_body = node.body.body[1:]
+    if not new_body and isinstance(node.body, cst.SimpleStatementSuite):
+        new_body = [cst.Pass()]
+    return node.with_changes(body=node.body.with_changes(body=new_body))
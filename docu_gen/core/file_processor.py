@@ -0,0 +1,427 @@
+import shutil
+import hashlib
+import tempfile
+from docu_gen.core.constant import CHUNKING
+from docu_gen.core.index import hash_content
+from docu_gen.core.report import FileReport
+from docu_gen.core.scanner import count_undocumented, scan_chunk, scan_definitions
+
+
+def add_docstrings_to_file(
+    file_path,
+    override=False,
+    generator=None,
+    index=None,
+    report=None,
+    selection=None,
+    override_all=False,
+    chunk_lines=CHUNKING.get("chunk_lines"),
+    journal=None,
+):
+    """Add docstrings to the functions in a Python file and write them back to the file.
+
+    Args:
+        file_path (str): The path to the Python file to process.
+        override (bool, optional): Whether to regenerate the existing docstrings that
+            are stale: their Args or Raises section no longer matches the code, or, with
+            an index, their definition changed since they were written. Defaults to
+            False.
+        generator (DocstringGenerator, optional): Generator used for the LLM calls.
+            Defaults to a new generator.
+        index (ProjectIndex, optional): Record of previous runs used to skip unchanged
+            files and, with override, to find the docstrings whose definition changed.
+            Defaults to None.
+        report (FileReport, optional): Receives the time spent in each stage and the LLM
+            requests. Defaults to None.
+        selection (set, optional): The only definitions documented, by qualified name.
+            The index is neither consulted nor updated for a partial run. Defaults to
+            None, meaning all of them.
+        override_all (bool, optional): With override, regenerate every existing
+            docstring, stale or not. Defaults to False.
+        chunk_lines (int, optional): Files longer than this number of lines are
+            processed one chunk of top-level statements of about this length at a time,
+            which bounds memory by the largest chunk instead of the file. 0 or None
+            processes every file whole.
+        journal (Journal, optional): Records the file once it is committed, and skips it
+            if a replayed run already committed it with the same content. Defaults to
+            None.
+
+    Returns:
+        str: The outcome for the file: "written", "unchanged", "indexed",
+            "resumed", "documented", "skipped", "validation failed" or "changed",
+            if the file was modified by someone else while it was processed.
+
+    Raises:
+        FileNotFoundError: If the specified file_path does not exist.
+        PermissionError: If the file cannot be opened due to permission issues.
+        UnicodeDecodeError: If the file cannot be decoded using the specified encoding.
+        IOError: If an I/O error occurs while reading or writing the file.
+    """
+    if report is None:
+        report = FileReport(file_path)
+    if selection is not None:
+        index = None
+    status, source_code, qualnames, chunk_lines = prepare_file(
+        file_path,
+        override,
+        index,
+        report,
+        selection,
+        override_all,
+        chunk_lines,
+        journal,
+    )
+    if status in ("indexed", "resumed"):
+        return status
+
+    final_code = source_code
+    scanned = None
+    if status is None and chunk_lines:
+        from docu_gen.core.docstring_adder import iter_docstring_chunks
+
+        chunks = iter_docstring_chunks(
+            source_code,
+            file_path,
+            override,
+            generator,
+            qualnames,
+            report,
+            selection,
+            chunk_lines,
+        )
+        status, final_code, scanned = _write_chunks_if_valid(
+            file_path, source_code, chunks, report, scan=index is not None
+        )
+    elif status is None:
+        # Imported here so files that need no docstrings never load libcst.
+        from docu_gen.core.docstring_adder import add_docstrings_to_code
+
+        modified_code = add_docstrings_to_code(
+            source_code, file_path, override, generator, qualnames, report, selection
+        )
+        status, final_code = _write_if_valid(
+            file_path, source_code, modified_code, report
+        )
+
+    commit_file(
+        file_path,
+        status,
+        final_code,
+        override,
+        qualnames,
+        index,
+        journal,
+        report,
+        chunk_lines,
+        scanned,
+    )
+    return status
+
+
+def prepare_file(
+    file_path,
+    override=False,
+    index=None,
+    report=None,
+    selection=None,
+    override_all=False,
+    chunk_lines=CHUNKING.get("chunk_lines"),
+    journal=None,
+):
+    """Read a file and decide, without libcst, whether it needs docstrings.
+
+    Args:
+        file_path (str): The path to the Python file to process.
+        override (bool, optional): Whether to regenerate stale docstrings. Defaults to
+            False.
+        index (ProjectIndex, optional): Record of previous runs. Defaults to None.
+        report (FileReport, optional): Receives the time spent in each stage. Defaults
+            to None.
+        selection (set, optional): The only definitions documented. Defaults to None,
+            meaning all of them.
+        override_all (bool, optional): With override, regenerate every existing
+            docstring. Defaults to False.
+        chunk_lines (int, optional): Length above which the file is scanned and
+            processed in chunks. Defaults to CHUNKING["chunk_lines"].
+        journal (Journal, optional): Journal of the resumed run. Defaults to None.
+
+    Returns:
+        tuple: The outcome so far, the content of the file, the qualified names
+            of the stale docstrings to regenerate (None for all of them) and the
+            chunk length the file is processed with (None for the whole file).
+            The outcome is None if docstrings must be generated; "indexed" and
+            "resumed" files are done, while "skipped" and "documented" ones still
+            have to be committed with commit_file. An "indexed" file is not read.
+
+    Raises:
+        FileNotFoundError: If the specified file_path does not exist.
+        UnicodeDecodeError: If the file cannot be decoded using the specified encoding.
+    """
+    if report is None:
+        report = FileReport(file_path)
+    with report.stage("index"):
+        up_to_date = index is not None and index.is_up_to_date(
+            file_path, override=override
+        )
+    if up_to_date:
+        print(
+            f"File '{file_path}' is unchanged since the last run and will be skipped."
+        )
+        return "indexed", None, None, None
+
+    print(f"Processing file: {file_path}")
+    with report.stage("read"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            source_code = f.read()
+
+    if journal is not None and journal.is_committed(file_path, source_code):
+        print(
+            f"File '{file_path}' was committed by the resumed run and will be skipped."
+        )
+        return "resumed", source_code, None, None
+
+    # Long files are also scanned in chunks, so no tree of the whole file is built.
+    if not chunk_lines or source_code.count("\n") <= chunk_lines:
+        chunk_lines = None
+    qualnames = None
+    if index is not None:
+        with report.stage("index"):
+            unchanged = index.has_content(
+                file_path, hash_content(source_code), override=override
+            )
+        if unchanged:
+            print(
+                f"File '{file_path}' is unchanged since the last run and will be "
+                "skipped."
+            )
+            return "indexed", source_code, None, None
+    if override and not override_all and source_code.strip():
+        with report.stage("scan"):
+            definitions = scan_definitions(
+                source_code, with_drift=True, chunk_lines=chunk_lines
+            )
+            qualnames = {
+                definition.qualname for definition in definitions if definition.drift
+            }
+        if index is not None:
+            with report.stage("index"):
+                qualnames |= index.drifted_definitions(file_path, definitions)
+        if qualnames:
+            print(
+                f"Regenerating {len(qualnames)} stale docstring(s) in file: {file_path}"
+            )
+
+    with report.stage("scan"):
+        documented = (
+            (not override or qualnames == set())
+            and selection is None
+            and not count_undocumented(source_code, chunk_lines)
+        )
+    status = None
+    if not source_code.strip():
+        print(f"File '{file_path}' is empty and will be skipped.")
+        status = "skipped"
+    elif documented:
+        # Cheap stdlib pre-scan: nothing to do, so libcst is never involved.
+        print(f"File '{file_path}' has no missing docstrings and will be skipped.")
+        status = "documented"
+    return status, source_code, qualnames, chunk_lines
+
+
+def commit_file(
+    file_path,
+    status,
+    final_code,
+    override=False,
+    qualnames=None,
+    index=None,
+    journal=None,
+    report=None,
+    chunk_lines=None,
+    scanned=None,
+):
+    """Record a processed file in the index and the journal.
+
+    Args:
+        file_path (str): The processed file.
+        status (str): Its outcome.
+        final_code (str): The content of the file after it was processed, or None
+            if it is described by scanned.
+        override (bool, optional): Whether stale docstrings were regenerated. Defaults
+            to False.
+        qualnames (set, optional): The docstrings regenerated with override, or None for
+            all of them. Defaults to None.
+        index (ProjectIndex, optional): Record of previous runs. Defaults to None.
+        journal (Journal, optional): Journal of the run. Defaults to None.
+        report (FileReport, optional): Receives the time spent in each stage. Defaults
+            to None.
+        chunk_lines (int, optional): Chunk length the file is scanned with, or None for
+            the whole file. Defaults to None.
+        scanned (tuple, optional): The hash_content of the final code and, if it was
+            scanned, its Definition objects with drift, computed while the file was
+            written. Defaults to None, which computes them from final_code.
+
+    Returns:
+        None
+
+    Raises:
+        OSError: If the file's metadata cannot be read.
+    """
+    if report is None:
+        report = FileReport(file_path)
+    content_hash, definitions = scanned or (None, None)
+    if content_hash is None and status != "changed":
+        content_hash = hash_content(final_code)
+    # A file changed by someone else is left for the next run.
+    if index is not None and status != "changed":
+        if definitions is None:
+            with report.stage("scan"):
+                definitions = scan_definitions(
+                    final_code, with_drift=True, chunk_lines=chunk_lines
+                )
+        written = set()
+        if status == "written" and override:
+            written = qualnames
+            if qualnames is None:
+                written = {definition.qualname for definition in definitions}
+        with report.stage("index"):
+            index.record(file_path, content_hash, definitions, written)
+    if journal is not None and status not in ("changed", "validation failed"):
+        journal.record_file(file_path, content_hash)
+
+
+def _write_if_valid(file_path, source_code, modified_code, report=None):
+    """Validate the modified code and write it to the file if only docstrings changed.
+
+    Args:
+        file_path (str): The path to the Python file.
+        source_code (str): The original content of the file.
+        modified_code (str): The content with docstrings added.
+        report (FileReport, optional): Receives the time spent validating and
+            writing. Defaults to None.
+
+    Returns:
+        tuple: The outcome ("written", "unchanged", "validation failed" or
+            "changed") and the content of the file after the call.
+
+    Raises:
+        IOError: If an I/O error occurs while writing the file.
+    """
+    from docu_gen.core.validate import validate_only_docstrings_added
+
+    if report is None:
+        report = FileReport(file_path)
+    print(f"Validating changes for file: {file_path}")
+    with report.stage("validate"):
+        valid = validate_only_docstrings_added(source_code, modified_code)
+    if valid:
+        if modified_code != source_code:
+            print(f"Generated Docstring for: {file_path}")
+            with report.stage("write"):
+                # An editor may have saved the file while docstrings were generated.
+                with open(file_path, "r+", encoding="utf-8") as f:
+                    current_code = f.read()
+                    if current_code == source_code:
+                        f.seek(0)
+                        f.write(modified_code)
+                        f.truncate()
+            if current_code != source_code:
+                print(
+                    f"File '{file_path}' changed while it was processed and was not "
+                    "written."
+                )
+                return "changed", current_code
+            print(f"Validation passed for file: {file_path}. Changes written.")
+            return "written", modified_code
+        print(f"No changes made to file: {file_path}")
+        return "unchanged", source_code
+    print(
+        f"Validation failed for file '{file_path}'. Code was modified beyond "
+        "adding docstrings."
+    )
+    return "validation failed", source_code
+
+
+def _write_chunks_if_valid(file_path, source_code, chunks, report=None, scan=True):
+    """Validate chunks as they are generated and write the file if all passed.
+
+    Each modified chunk is validated against its original, hashed, scanned and
+    spooled to a temporary file, so neither the modified module nor its trees
+    are held in memory, not even once the file is written.
+
+    Args:
+        file_path (str): The path to the Python file.
+        source_code (str): The original content of the file.
+        chunks (iterable): (original, modified) code pairs covering the file, as
+            yielded by iter_docstring_chunks.
+        report (FileReport, optional): Receives the time spent validating,
+            scanning and writing. Defaults to None.
+        scan (bool, optional): Scan the definitions of the modified chunks for
+            the index. Defaults to True.
+
+    Returns:
+        tuple: The outcome ("written", "unchanged", "validation failed" or
+            "changed"), the content of the file after the call, or None once it
+            is written, and, once it is written, the hash_content of the written
+            file and its Definition objects with drift, or None without scan.
+            The last item is None for the other outcomes.
+
+    Raises:
+        IOError: If an I/O error occurs while writing the file.
+        SyntaxError: If a modified chunk cannot be scanned.
+    """
+    from docu_gen.core.validate import validate_only_docstrings_added
+
+    if report is None:
+        report = FileReport(file_path)
+    print(f"Validating changes for file: {file_path}")
+    modified = False
+    # Past the first chunk, a leading string is a plain expression rather than
+    # the module docstring, and must be validated as such.
+    prefix = ""
+    digest = hashlib.sha256()
+    definitions = [] if scan else None
+    line_offset = 0
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as spool:
+        for chunk, modified_chunk in chunks:
+            with report.stage("validate"):
+                valid = validate_only_docstrings_added(
+                    prefix + chunk, prefix + modified_chunk
+                )
+            if not valid:
+                print(
+                    f"Validation failed for file '{file_path}'. Code was modified "
+                    "beyond adding docstrings."
+                )
+                return "validation failed", source_code, None
+            modified = modified or modified_chunk != chunk
+            prefix = "pass\n"
+            if scan:
+                with report.stage("scan"):
+                    scan_chunk(
+                        modified_chunk, line_offset, definitions, with_drift=True
+                    )
+                line_offset += modified_chunk.count("\n")
+            with report.stage("write"):
+                digest.update(modified_chunk.encode("utf-8"))
+                spool.write(modified_chunk)
+        if not modified:
+            print(f"No changes made to file: {file_path}")
+            return "unchanged", source_code, None
+        print(f"Generated Docstring for: {file_path}")
+        with report.stage("write"):
+            spool.seek(0)
+            with open(file_path, "r+", encoding="utf-8") as f:
+                current_code = f.read()
+                if current_code == source_code:
+                    f.seek(0)
+                    shutil.copyfileobj(spool, f)
+                    f.truncate()
+            if current_code != source_code:
+                print(
+                    f"File '{file_path}' changed while it was processed and was not "
+                    "written."
+                )
+                return "changed", current_code, None
+    print(f"Validation passed for file: {file_path}. Changes written.")
+    return "written", None, (digest.hexdigest(), definitions)
@@ -0,0 +1,628 @@
+import time
+import asyncio
+from docu_gen.utils.docstring_cache import DocstringCache
+from docu_gen.utils.llm import LLM
+from docu_gen.utils.scheduler import RequestScheduler
+from docu_gen.utils.tokens import estimate_tokens
+from docu_gen.core.budget import OutputBudget
+from docu_gen.core.constant import (
+    BATCH,
+    MAX_CONCURRENT_REQUESTS,
+    OUTPUT_BUDGET,
+    RATE_LIMIT,
+)
+from docu_gen.core.dedup import CloneRegistry, NearDuplicateIndex, analyze
+
+
+class DocstringGenerator:
+    """Generates docstrings for planned targets concurrently, through the cache."""
+
+    def __init__(
+        self,
+        llm=None,
+        cache=None,
+        concurrency=MAX_CONCURRENT_REQUESTS,
+        batch_tokens=0,
+        offline=False,
+        requests_per_minute=RATE_LIMIT.get("requests_per_minute"),
+        tokens_per_minute=RATE_LIMIT.get("tokens_per_minute"),
+        max_retries=RATE_LIMIT.get("max_retries"),
+        dedup=True,
+        near_duplicate_threshold=None,
+        router=None,
+        journal=None,
+        stream=False,
+        adaptive_max_tokens=True,
+    ):
+        """Initialize the generator.
+
+        The LLM client is only initialized on the first cache miss, so a run whose
+        docstrings are all cached makes no network calls.
+
+        Args:
+            llm (LLM, optional): The model used for generation. Defaults to a new LLM.
+            cache (DocstringCache, optional): Cache consulted before calling the LLM. Defaults to None.
+            concurrency (int, optional): Maximum number of requests in flight at once,
+                capped by the backend's own limit. The scheduler lowers the
+                effective limit while requests are throttled.
+            batch_tokens (int, optional): Estimated snippet tokens packed into one
+                batched request. Defaults to 0, which sends one request per target,
+                as do backends that do not support batching.
+            offline (bool, optional): Only use cached docstrings and never call the
+                LLM. Defaults to False.
+            requests_per_minute (float, optional): Request quota, or None for no limit.
+                Ignored by backends without a quota.
+            tokens_per_minute (float, optional): Token quota, or None for no limit.
+                Ignored by backends without a quota.
+            max_retries (int, optional): Retries of a throttled request before the
+                target is left without a docstring.
+            dedup (bool, optional): Generate one docstring per structural clone
+                group and reuse it for the other clones. Defaults to True.
+            near_duplicate_threshold (float, optional): Also reuse the docstring of
+                a target with the same name and parameters whose estimated
+                similarity is at least this value. Defaults to None, which only
+                reuses docstrings between exact clones.
+            router (ModelRouter, optional): Chooses the model and output token
+                limit of each target from its complexity. Defaults to None, which
+                sends every target to the LLM's model.
+            journal (Journal, optional): Records every generated docstring as soon
+                as it arrives, and answers for the docstrings it replayed before
+                the cache and the LLM are consulted. Defaults to None.
+            stream (bool, optional): Stream responses and stop reading each one
+                once its docstring is complete. Ignored by backends that cannot
+                stream. Defaults to False.
+            adaptive_max_tokens (bool, optional): Limit the output of each
+                request to a length predicted for its target, requesting a
+                response cut short again with the full limit. Defaults to True;
+                False requests OUTPUT_BUDGET["max_tokens"] for every target.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.llm = llm or LLM()
+        self.cache = cache
+        # The backend's capabilities bound the requested settings.
+        backend = self.llm.backend
+        if backend.max_concurrency:
+            concurrency = min(concurrency, backend.max_concurrency)
+        if not backend.rate_limited:
+            requests_per_minute = tokens_per_minute = None
+        self.scheduler = RequestScheduler(
+            max_concurrency=concurrency,
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_retries=max_retries,
+        )
+        self.batch_tokens = batch_tokens if backend.batching else 0
+        self.offline = offline
+        self.dedup = dedup
+        self.router = router
+        self.journal = journal
+        self.stream = stream and backend.streaming
+        self.budget = OutputBudget() if adaptive_max_tokens else None
+        self._clones = CloneRegistry()
+        self._near_duplicates = (
+            NearDuplicateIndex(near_duplicate_threshold)
+            if dedup and near_duplicate_threshold
+            else None
+        )
+        # Futures of the clone groups being generated, keyed by fingerprint.
+        self._inflight = {}
+        self._loop = None
+        self._task = None
+
+    def generate(self, targets, report=None):
+        """Generate docstrings for a list of targets.
+
+        Args:
+            targets (list): The DocstringTarget objects to document.
+            report (FileReport, optional): Receives the duration and token usage of
+                every request. Defaults to None.
+
+        Returns:
+            dict: Generated docstrings keyed by target index. Targets for which no
+                docstring could be generated are left out.
+
+        Raises:
+            asyncio.CancelledError: If the generation was cancelled with cancel.
+        """
+        if not targets:
+            return {}
+        # A single long-lived loop keeps the async client's pooled connections
+        # usable across files.
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.agenerate(targets, report))
+        try:
+            return self._loop.run_until_complete(self._task)
+        finally:
+            self._task = None
+
+    def cancel(self):
+        """Cancel the generation in progress, including its in-flight requests.
+
+        May be called from any thread; generate then raises CancelledError.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        loop, task = self._loop, self._task
+        if task is not None:
+            loop.call_soon_threadsafe(task.cancel)
+
+    async def agenerate(self, targets, report=None):
+        """Generate docstrings for a list of targets on the running event loop.
+
+        Cached docstrings are returned directly, then those of clones of targets
+        already documented. Of the remaining targets only one per clone group is
+        sent to the LLM, concurrently through the request scheduler and optionally
+        packed into batches; the other clones wait for its docstring, even if it
+        is generated for another file.
+
+        Args:
+            targets (list): The DocstringTarget objects to document.
+            report (FileReport, optional): Receives the duration and token usage of
+                every request. Defaults to None.
+
+        Returns:
+            dict: Generated docstrings keyed by target index.
+
+        Raises:
+            None
+        """
+        self._route(targets, report)
+        docstrings = {}
+        misses = []
+        for target in targets:
+            docstring = self._lookup(target)
+            if docstring is None:
+                misses.append(target)
+            else:
+                docstrings[target.index] = docstring
+
+        structures = {}
+        if misses and self.dedup:
+            structures = {
+                target.index: analyze(target.code_snippet) for target in misses
+            }
+            misses = self._reuse_clones(misses, structures, docstrings, report)
+
+        if misses and not self.offline:
+            if self.llm.async_client is None:
+                self.llm.initialize_client()
+            leaders = []
+            followers = []
+            for target in misses:
+                structure = structures.get(target.index)
+                if structure is None:
+                    leaders.append(target)
+                elif structure.fingerprint in self._inflight:
+                    followers.append((target, self._inflight[structure.fingerprint]))
+                else:
+                    self._inflight[structure.fingerprint] = (
+                        asyncio.get_running_loop().create_future()
+                    )
+                    leaders.append(target)
+
+            batches = self._make_batches(leaders)
+            try:
+                results = await asyncio.gather(
+                    *(self._generate_batch(batch, report) for batch in batches)
+                )
+                for batch, batch_docstrings in zip(batches, results):
+                    for target, docstring in zip(batch, batch_docstrings):
+                        if docstring:
+                            docstrings[target.index] = docstring
+                            structure = structures.get(target.index)
+                            if structure is not None:
+                                self._remember(target, structure, docstring)
+            finally:
+                for target in leaders:
+                    structure = structures.get(target.index)
+                    if structure is not None:
+                        future = self._inflight.pop(structure.fingerprint)
+                        if not future.done():
+                            future.set_result(docstrings.get(target.index))
+
+            for target, future in followers:
+                docstring = await future
+                if docstring:
+                    docstrings[target.index] = docstring
+                    self._store(target, docstring)
+                    if report is not None:
+                        report.add_reuse(target.qualname, "clone")
+        return docstrings
+
+    def batch_requests(self, targets):
+        """Build a Batch API request for every target without a docstring yet.
+
+        Targets are routed as for generation and those found in the journal or the
+        cache are left out. Each request is identified by the target's cache key,
+        so a docstring stored under it is found by a later run.
+
+        Args:
+            targets (list): The DocstringTarget objects to document.
+
+        Returns:
+            list: (cache key, chat completion request body) tuples.
+
+        Raises:
+            None
+        """
+        self._route(targets)
+        requests = []
+        for target in targets:
+            if self._lookup(target) is not None:
+                continue
+            requests.append(
+                (
+                    self._cache_key(target),
+                    {
+                        "model": self._model_name(target),
+                        "messages": self.llm.build_messages(
+                            target.code_snippet, target.code_type
+                        ),
+                        "max_tokens": (target.tier or {}).get("max_tokens")
+                        or OUTPUT_BUDGET.get("max_tokens"),
+                        "temperature": 0,
+                    },
+                )
+            )
+        return requests
+
+    def _route(self, targets, report=None):
+        """Choose the routing tier of every target.
+
+        Args:
+            targets (list): The DocstringTarget objects.
+            report (FileReport, optional): Receives the tier of every target.
+                Defaults to None.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if self.router is None:
+            return
+        for target in targets:
+            target.tier, measures = self.router.route(target.code_snippet)
+            if report is not None:
+                report.add_route(
+                    target.qualname,
+                    target.tier,
+                    self._model_name(target),
+                    measures,
+                )
+
+    def _reuse_clones(self, targets, structures, docstrings, report=None):
+        """Reuse the docstrings of clones of targets documented earlier.
+
+        Clones are looked up among the docstrings generated during the run, then
+        in the cache and, if enabled, among near-duplicates.
+
+        Args:
+            targets (list): The targets missing from the cache.
+            structures (dict): The Structure of every target, keyed by index.
+            docstrings (dict): Receives the reused docstrings, keyed by index.
+            report (FileReport, optional): Receives the reused targets.
+
+        Returns:
+            list: The targets for which no docstring could be reused.
+
+        Raises:
+            None
+        """
+        remaining = []
+        for target in targets:
+            structure = structures[target.index]
+            kind = "clone"
+            docstring = self._clones.get(structure.fingerprint)
+            if docstring is None and self.cache is not None:
+                docstring = self.cache.get(self._fingerprint_key(target, structure))
+            if docstring is None and self._near_duplicates is not None:
+                kind = "near-duplicate"
+                docstring = self._near_duplicates.query(structure)
+            if docstring is None:
+                remaining.append(target)
+                continue
+            docstrings[target.index] = docstring
+            self._store(target, docstring)
+            if report is not None:
+                report.add_reuse(target.qualname, kind)
+        return remaining
+
+    def _remember(self, target, structure, docstring):
+        """Record a generated docstring for the clones of its target.
+
+        Args:
+            target (DocstringTarget): The documented target.
+            structure (Structure): The structure of the target.
+            docstring (str): The generated docstring.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._clones.set(structure.fingerprint, docstring)
+        if self.cache is not None:
+            self.cache.set(self._fingerprint_key(target, structure), docstring)
+        if self._near_duplicates is not None:
+            self._near_duplicates.add(structure, docstring)
+
+    async def _generate_one(self, target, report=None):
+        """Generate the docstring for one target and store it in the cache.
+
+        A response cut short by the predicted output limit is requested again with
+        the full limit.
+
+        Args:
+            target (DocstringTarget): The target to document.
+            report (FileReport, optional): Receives the request's duration and
+                token usage.
+
+        Returns:
+            str: The generated docstring, or None if the request failed after all
+                retries. Failures are never turned into placeholder docstrings.
+
+        Raises:
+            None
+        """
+        limit = (target.tier or {}).get("max_tokens") or OUTPUT_BUDGET.get("max_tokens")
+        max_tokens, group = limit, None
+        if self.budget is not None:
+            max_tokens, group = self.budget.predict(
+                target.code_snippet, target.code_type, limit
+            )
+        while True:
+            usage = {}
+            start = time.perf_counter()
+            try:
+                docstring = await self.scheduler.run(
+                    lambda: self.llm.agenerate_docstring(
+                        target.code_snippet,
+                        code_type=target.code_type,
+                        usage=usage,
+                        model_name=self._model_name(target),
+                        max_tokens=max_tokens,
+                        stream=self.stream,
+                    ),
+                    estimate_tokens(target.code_snippet) + max_tokens,
+                )
+            except Exception as e:
+                print(f"Error generating docstring for '{target.qualname}': {e}")
+                docstring = None
+            if report is not None:
+                report.add_request(
+                    [target.qualname],
+                    time.perf_counter() - start,
+                    usage,
+                    docstring is not None,
+                    model=self._model_name(target),
+                )
+            truncated = usage.get("truncated", False)
+            if docstring is None or not truncated or max_tokens >= limit:
+                break
+            # The prediction was too short for this target.
+            max_tokens = limit
+        if group is not None and docstring is not None and not truncated:
+            # Backends that report no usage are measured by the docstring.
+            self.budget.observe(
+                group, usage.get("completion_tokens") or estimate_tokens(docstring)
+            )
+        self._store(target, docstring)
+        return docstring
+
+    def _make_batches(self, targets):
+        """Pack targets into batches of at most ``batch_tokens`` estimated tokens.
+
+        Only targets routed to the same model share a batch.
+
+        Args:
+            targets (list): The targets to pack, in planning order.
+
+        Returns:
+            list: Lists of targets. Without batching, or for targets larger than
+                the budget, a batch holds a single target.
+
+        Raises:
+            None
+        """
+        if not self.batch_tokens:
+            return [[target] for target in targets]
+        batches = []
+        # The batch being filled and its estimated tokens, per model.
+        current = {}
+        for target in targets:
+            model_name = self._model_name(target)
+            tokens = estimate_tokens(target.code_snippet)
+            batch, batch_tokens = current.get(model_name, ([], 0))
+            if batch and (
+                batch_tokens + tokens > self.batch_tokens
+                or len(batch) >= BATCH.get("max_targets")
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(target)
+            current[model_name] = (batch, batch_tokens + tokens)
+        batches.extend(batch for batch, _ in current.values())
+        return batches
+
+    async def _generate_batch(self, batch, report=None):
+        """Generate the docstrings for a batch of targets in one request.
+
+        Targets missing from the batched response fall back to single requests.
+
+        Args:
+            batch (list): The targets to document.
+            report (FileReport, optional): Receives the duration and token usage of
+                every request.
+
+        Returns:
+            list: The docstrings, in the order of ``batch``.
+
+        Raises:
+            None
+        """
+        if len(batch) == 1:
+            return [await self._generate_one(batch[0], report)]
+
+        items = [
+            (str(position), target.code_snippet, target.code_type)
+            for position, target in enumerate(batch)
+        ]
+        max_tokens = min(
+            BATCH.get("max_output_tokens"),
+            BATCH.get("output_tokens_per_target") * len(batch),
+        )
+        estimated_tokens = max_tokens + sum(
+            estimate_tokens(target.code_snippet) for target in batch
+        )
+        model_name = self._model_name(batch[0])
+        usage = {}
+        start = time.perf_counter()
+        try:
+            results = await self.scheduler.run(
+                lambda: self.llm.agenerate_docstrings(
+                    items, max_tokens, usage=usage, model_name=model_name
+                ),
+                estimated_tokens,
+            )
+            ok = True
+        except Exception as e:
+            print(f"Error generating batched docstrings: {e}")
+            results = {}
+            ok = False
+        if report is not None:
+            report.add_request(
+                [target.qualname for target in batch],
+                time.perf_counter() - start,
+                usage,
+                ok,
+                model=model_name,
+            )
+
+        docstrings = [results.get(str(position)) for position in range(len(batch))]
+        for target, docstring in zip(batch, docstrings):
+            self._store(target, docstring)
+        missing = [
+            position for position, docstring in enumerate(docstrings) if not docstring
+        ]
+        fallbacks = await asyncio.gather(
+            *(self._generate_one(batch[position], report) for position in missing)
+        )
+        for position, docstring in zip(missing, fallbacks):
+            docstrings[position] = docstring
+        return docstrings
+
+    def _store(self, target, docstring):
+        """Store a generated docstring in the cache and the journal.
+
+        Args:
+            target (DocstringTarget): The documented target.
+            docstring (str): The generated docstring.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if not docstring:
+            return
+        if self.cache is not None:
+            self.cache.set(self._cache_key(target), docstring)
+        if self.journal is not None:
+            self.journal.record_docstring(self._cache_key(target), docstring)
+
+    def _lookup(self, target):
+        """Return the replayed or cached docstring for a target.
+
+        Args:
+            target (DocstringTarget): The target to look up.
+
+        Returns:
+            str: The docstring, or None on a miss or without a journal or cache.
+
+        Raises:
+            None
+        """
+        docstring = None
+        if self.journal is not None:
+            docstring = self.journal.get(self._cache_key(target))
+        if docstring is None and self.cache is not None:
+            docstring = self.cache.get(self._cache_key(target))
+        return docstring
+
+    def _cache_key(self, target):
+        """Build the cache key for a target.
+
+        Args:
+            target (DocstringTarget): The target to build the key for.
+
+        Returns:
+            str: The cache key.
+
+        Raises:
+            None
+        """
+        return DocstringCache.make_key(
+            target.code_snippet, target.code_type, self._model_name(target)
+        )
+
+    def _model_name(self, target):
+        """Return the model a target is sent to.
+
+        Args:
+            target (DocstringTarget): The target.
+
+        Returns:
+            str: The model of the target's routing tier, or the LLM's model.
+
+        Raises:
+            None
+        """
+        return (target.tier or {}).get("model_name") or self.llm.model_name
+
+    def _fingerprint_key(self, target, structure):
+        """Build the cache key shared by all clones of a target.
+
+        Args:
+            target (DocstringTarget): The target.
+            structure (Structure): The structure of the target.
+
+        Returns:
+            str: The cache key.
+
+        Raises:
+            None
+        """
+        return self.cache.make_key(
+            "fingerprint:" + structure.fingerprint,
+            target.code_type,
+            self._model_name(target),
+        )
+
+    def close(self):
+        """Close the event loop used for generation and flush the cache.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if self.cache is not None:
+            self.cache.flush()
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
@@ -0,0 +1,289 @@
+import os
+import sqlite3
+import hashlib
+
+
+def hash_content(source_code):
+    """Hash the content of a source file.
+
+    Args:
+        source_code (str): The file content.
+
+    Returns:
+        str: A hex SHA-256 digest.
+
+    Raises:
+        None
+    """
+    return hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+
+
+class ProjectIndex:
+    """A persistent record of the files and definitions seen by previous runs."""
+
+    def __init__(self, path):
+        """Initialize the index without opening the underlying database.
+
+        Args:
+            path (str): Location of the SQLite database file, normally under the
+                project root.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.path = path
+        self._connection = None
+
+    def _connect(self):
+        """Open the database on first use and create the schema if needed.
+
+        Returns:
+            sqlite3.Connection: The open connection.
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened.
+        """
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, "
+                "size INTEGER NOT NULL, content_hash TEXT NOT NULL, "
+                "undocumented INTEGER NOT NULL, stale INTEGER NOT NULL DEFAULT 0);"
+                "CREATE TABLE IF NOT EXISTS definitions ("
+                "path TEXT NOT NULL, qualname TEXT NOT NULL, "
+                "start_line INTEGER NOT NULL, end_line INTEGER NOT NULL, "
+                "body_hash TEXT NOT NULL, has_docstring INTEGER NOT NULL, "
+                "docstring_hash TEXT, documented_hash TEXT);"
+                "CREATE INDEX IF NOT EXISTS definitions_path ON definitions (path);"
+            )
+            self._connection.commit()
+        return self._connection
+
+    @staticmethod
+    def _key(file_path):
+        """Return the path under which a file is recorded.
+
+        Args:
+            file_path (str): The file path as given by the user.
+
+        Returns:
+            str: The absolute, normalized path.
+
+        Raises:
+            None
+        """
+        return os.path.realpath(file_path)
+
+    def is_up_to_date(self, file_path, stat=None, override=False):
+        """Check from the file's metadata alone whether it can be skipped.
+
+        A file can be skipped when its modification time and size match the last
+        recorded run and that run left no definition without a docstring.
+
+        Args:
+            file_path (str): The file to check.
+            stat (os.stat_result, optional): The file's metadata, if already known.
+            override (bool, optional): Whether stale docstrings are regenerated, in
+                which case the run must also have left none. Defaults to False.
+
+        Returns:
+            bool: True if the file is unchanged and fully documented.
+
+        Raises:
+            OSError: If the file's metadata cannot be read.
+        """
+        stat = stat or os.stat(file_path)
+        row = (
+            self._connect()
+            .execute(
+                "SELECT mtime_ns, size, undocumented, stale FROM files WHERE path = ?",
+                (self._key(file_path),),
+            )
+            .fetchone()
+        )
+        return (
+            row is not None
+            and row[:3] == (stat.st_mtime_ns, stat.st_size, 0)
+            and not (override and row[3])
+        )
+
+    def has_content(self, file_path, content_hash, override=False):
+        """Check whether a file's content matches a fully documented recorded run.
+
+        When it does, the recorded metadata is refreshed so the next run can skip
+        the file without reading it.
+
+        Args:
+            file_path (str): The file to check.
+            content_hash (str): Hash of the file's current content.
+            override (bool, optional): Whether stale docstrings are regenerated, in
+                which case the run must also have left none. Defaults to False.
+
+        Returns:
+            bool: True if the content is unchanged and fully documented.
+
+        Raises:
+            OSError: If the file's metadata cannot be read.
+        """
+        connection = self._connect()
+        key = self._key(file_path)
+        row = connection.execute(
+            "SELECT content_hash, undocumented, stale FROM files WHERE path = ?",
+            (key,),
+        ).fetchone()
+        if row is None or row[:2] != (content_hash, 0) or (override and row[2]):
+            return False
+        stat = os.stat(file_path)
+        connection.execute(
+            "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+            (stat.st_mtime_ns, stat.st_size, key),
+        )
+        connection.commit()
+        return True
+
+    def _documented_hashes(self, key):
+        """Return the body hash each recorded docstring was written for.
+
+        Args:
+            key (str): The recorded path of the file.
+
+        Returns:
+            dict: Body hashes keyed by (qualified name, docstring hash).
+
+        Raises:
+            None
+        """
+        return {
+            (qualname, docstring_hash): documented_hash
+            for qualname, docstring_hash, documented_hash in self._connect().execute(
+                "SELECT qualname, docstring_hash, documented_hash FROM definitions "
+                "WHERE path = ? AND docstring_hash IS NOT NULL",
+                (key,),
+            )
+        }
+
+    def drifted_definitions(self, file_path, definitions):
+        """Return the qualified names of docstrings whose code changed since.
+
+        A docstring is drifted when it is the one recorded by a previous run and
+        the body of its definition differs from the body it was written for. A
+        docstring edited since is taken as written for the current body.
+
+        Args:
+            file_path (str): The file the definitions belong to.
+            definitions (list): The file's current Definition objects.
+
+        Returns:
+            set: Qualified names of the drifted definitions.
+
+        Raises:
+            None
+        """
+        documented = self._documented_hashes(self._key(file_path))
+        return {
+            definition.qualname
+            for definition in definitions
+            if documented.get(
+                (definition.qualname, definition.docstring_hash),
+                definition.body_hash,
+            )
+            != definition.body_hash
+        }
+
+    def record(self, file_path, content_hash, definitions, written=()):
+        """Record the state of a file after it has been processed.
+
+        A docstring recorded before keeps the body hash it was written for; a new,
+        rewritten or regenerated one is recorded as written for the current body.
+
+        Args:
+            file_path (str): The processed file.
+            content_hash (str): Hash of the file's content as it is on disk now.
+            definitions (list): The Definition objects of that content, scanned
+                with drift detection to count the stale docstrings.
+            written (set, optional): Qualified names whose docstrings this run
+                generated, even if the text came out the same. Defaults to none.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the file's metadata cannot be read.
+        """
+        stat = os.stat(file_path)
+        key = self._key(file_path)
+        undocumented = sum(
+            1 for definition in definitions if not definition.has_docstring
+        )
+        previous = self._documented_hashes(key)
+        rows = []
+        stale = 0
+        for definition in definitions:
+            documented_hash = None
+            if definition.qualname in written:
+                documented_hash = definition.body_hash
+            elif definition.docstring_hash is not None:
+                documented_hash = previous.get(
+                    (definition.qualname, definition.docstring_hash),
+                    definition.body_hash,
+                )
+            stale += bool(definition.drift) or documented_hash not in (
+                None,
+                definition.body_hash,
+            )
+            rows.append(
+                (
+                    key,
+                    definition.qualname,
+                    definition.start,
+                    definition.end,
+                    definition.body_hash,
+                    int(definition.has_docstring),
+                    definition.docstring_hash,
+                    documented_hash,
+                )
+            )
+        connection = self._connect()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO files "
+                "(path, mtime_ns, size, content_hash, undocumented, stale) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    content_hash,
+                    undocumented,
+                    stale,
+                ),
+            )
+            connection.execute("DELETE FROM definitions WHERE path = ?", (key,))
+            connection.executemany(
+                "INSERT INTO definitions "
+                "(path, qualname, start_line, end_line, body_hash, has_docstring, "
+                "docstring_hash, documented_hash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self):
+        """Close the database connection if it is open.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
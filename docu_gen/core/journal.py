@@ -0,0 +1,249 @@
+import os
+import json
+import signal
+import threading
+from docu_gen.core.index import hash_content
+
+
+class Journal:
+    """An append-only record of the docstrings generated and files committed by a run.
+
+    Every process appends to its own segment file in the journal directory. Each
+    record is a JSON line written with a single unbuffered write, so it survives
+    the process being killed; on SIGINT and on close the segment is also synced
+    to disk. A run resumed from the journal replays every segment.
+    """
+
+    def __init__(self, directory):
+        """Initialize the journal without opening or reading any segment.
+
+        Args:
+            directory (str): The directory holding the segment files.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.directory = directory
+        # Replayed docstrings keyed by cache key, and content hashes of the
+        # committed files keyed by real path.
+        self._docstrings = {}
+        self._files = {}
+        self._fd = None
+        self._previous_handler = None
+
+    def _segments(self):
+        """Return the paths of the segment files.
+
+        Returns:
+            list: The segment paths, sorted.
+
+        Raises:
+            None
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".jsonl")
+        )
+
+    def exists(self):
+        """Check whether a previous run left a journal.
+
+        Returns:
+            bool: True if any segment file exists.
+
+        Raises:
+            None
+        """
+        return bool(self._segments())
+
+    def replay(self):
+        """Load the records of every segment.
+
+        A line cut short by a crash is ignored.
+
+        Returns:
+            tuple: The number of docstrings and of committed files replayed.
+
+        Raises:
+            OSError: If a segment cannot be read.
+        """
+        for segment in self._segments():
+            with open(segment, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("type") == "docstring":
+                        self._docstrings[record["key"]] = record["docstring"]
+                    elif record.get("type") == "file":
+                        self._files[record["path"]] = record["content_hash"]
+        return len(self._docstrings), len(self._files)
+
+    def get(self, key):
+        """Return a replayed docstring.
+
+        Args:
+            key (str): The cache key of the target.
+
+        Returns:
+            str: The docstring, or None if none was replayed for the key.
+
+        Raises:
+            None
+        """
+        return self._docstrings.get(key)
+
+    def is_committed(self, file_path, source_code):
+        """Check whether a replayed run committed a file with this content.
+
+        Args:
+            file_path (str): The file.
+            source_code (str): Its current content.
+
+        Returns:
+            bool: True if the file was committed and has not changed since.
+
+        Raises:
+            None
+        """
+        content_hash = self._files.get(os.path.realpath(file_path))
+        return content_hash is not None and content_hash == hash_content(source_code)
+
+    def record_docstring(self, key, docstring):
+        """Append a generated docstring.
+
+        Args:
+            key (str): The cache key of the target.
+            docstring (str): The generated docstring.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the segment cannot be written.
+        """
+        self._append({"type": "docstring", "key": key, "docstring": docstring})
+
+    def record_file(self, file_path, content_hash):
+        """Append a committed file.
+
+        Args:
+            file_path (str): The file.
+            content_hash (str): The hash_content of the file on disk after it was
+                processed.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the segment cannot be written.
+        """
+        self._append(
+            {
+                "type": "file",
+                "path": os.path.realpath(file_path),
+                "content_hash": content_hash,
+            }
+        )
+
+    def _append(self, record):
+        """Write one record to this process's segment, opening it on first use.
+
+        Args:
+            record (dict): The record.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If the segment cannot be written.
+        """
+        if self._fd is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._fd = os.open(
+                os.path.join(self.directory, f"{os.getpid()}.jsonl"),
+                os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                0o644,
+            )
+            self._install_handler()
+        os.write(self._fd, (json.dumps(record) + "\n").encode("utf-8"))
+
+    def _install_handler(self):
+        """Sync the segment to disk on SIGINT before the usual interrupt.
+
+        Signal handlers can only be installed from the main thread; other threads
+        rely on close.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return
+        previous = self._previous_handler = signal.getsignal(signal.SIGINT)
+
+        def handle_interrupt(signum, frame):
+            self.flush()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                raise KeyboardInterrupt
+
+        signal.signal(signal.SIGINT, handle_interrupt)
+
+    def flush(self):
+        """Sync the segment to disk.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if self._fd is not None:
+            try:
+                os.fsync(self._fd)
+            except OSError:
+                pass
+
+    def close(self):
+        """Sync and close the segment and restore the SIGINT handler.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+        if self._previous_handler is not None:
+            if threading.current_thread() is threading.main_thread():
+                signal.signal(signal.SIGINT, self._previous_handler)
+            self._previous_handler = None
+
+    def remove(self):
+        """Close the journal and delete every segment.
+
+        Returns:
+            None
+
+        Raises:
+            OSError: If a segment cannot be deleted.
+        """
+        self.close()
+        for segment in self._segments():
+            os.unlink(segment)
+        self._docstrings = {}
+        self._files = {}
@@ -0,0 +1,103 @@
+from docu_gen.core.docstring_adder import plan_code
+from docu_gen.core.file_processor import prepare_file
+from docu_gen.core.report import FileReport
+from docu_gen.core.runner import _init_worker, _make_llm, _worker
+from docu_gen.utils.batch import read_batch_results, write_batch_requests
+
+
+def _iter_requests(files):
+    """Plan every file and yield one chat-completion request per uncached target.
+
+    Files are selected as in a run with the current process's options: empty,
+    fully documented and, with an index, unchanged files are left out, and with
+    override only their stale docstrings are planned.
+
+    Args:
+        files (iterable): The files to plan.
+
+    Yields:
+        tuple: The custom id, which is the target's cache key, and the request body.
+
+    Raises:
+        None
+    """
+    generator = _worker["generator"]
+    override = _worker["override"]
+    seen = set()
+    for file_path in files:
+        report = FileReport(file_path)
+        try:
+            status, source_code, qualnames, _ = prepare_file(
+                file_path,
+                override=override,
+                index=_worker["index"],
+                report=report,
+                override_all=_worker["override_all"],
+                chunk_lines=None,
+            )
+            if status is not None:
+                continue
+            _, targets = plan_code(source_code, file_path, override, qualnames, report)
+        except Exception as e:
+            print(f"Error planning file '{file_path}': {e}")
+            continue
+        for custom_id, body in generator.batch_requests(targets):
+            if custom_id not in seen:
+                seen.add(custom_id)
+                yield custom_id, body
+
+
+def export_batch(files, output_path, options):
+    """Write a Batch API input file with a request for every target of the files.
+
+    The requests are built by the generator a run with the same options uses, with
+    its backend, model and routing tiers, and the custom id of each request is the
+    target's cache key. Identical snippets are requested once and the results can
+    be matched back to any file.
+
+    Args:
+        files (iterable): The files to plan.
+        output_path (str): The JSONL file to write.
+        options (dict): The run options, as for process_files. Targets already in
+            the cache are not exported.
+
+    Returns:
+        int: The number of requests written.
+
+    Raises:
+        IOError: If the file cannot be written.
+    """
+    _init_worker(options)
+    try:
+        return write_batch_requests(output_path, _iter_requests(files))
+    finally:
+        _worker["generator"].close()
+        if _worker["index"] is not None:
+            _worker["index"].close()
+
+
+def ingest_batch(results_path, cache, options=None):
+    """Load the docstrings from a Batch API output file into the cache.
+
+    Args:
+        results_path (str): The JSONL file returned by the batch service.
+        cache (DocstringCache): The cache the docstrings are stored in.
+        options (dict, optional): The run options the requests were exported with,
+            which select the backend whose responses are cleaned. Defaults to
+            None, meaning the default backend.
+
+    Returns:
+        int: The number of docstrings loaded.
+
+    Raises:
+        IOError: If the file cannot be read.
+        ValueError: If a line is not valid JSON.
+    """
+    llm = _make_llm(options or {})
+    count = 0
+    for custom_id, content in read_batch_results(results_path).items():
+        docstring = llm.clean_docstring(content)
+        if docstring:
+            cache.set(custom_id, docstring)
+            count += 1
+    return count
@@ -0,0 +1,254 @@
+import math
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import libcst as cst
+from docu_gen.core.constant import PIPELINE
+from docu_gen.core.docstring_adder import apply_docstrings, plan_code
+from docu_gen.core.file_processor import _write_if_valid, commit_file, prepare_file
+from docu_gen.core.report import FileReport
+from docu_gen.core.runner import _error_status, _init_files, _init_worker, _worker
+from docu_gen.utils.tokens import estimate_tokens
+
+
+def _plan_file(file_path):
+    """Read and plan one file in a worker process.
+
+    Args:
+        file_path (str): The file to plan.
+
+    Returns:
+        tuple: The file path, its outcome, its FileReport, its content, the
+            qualified names of the stale docstrings to regenerate and the
+            DocstringTarget objects to generate. The outcome is None when the
+            targets must be generated; otherwise the file is done.
+
+    Raises:
+        None
+    """
+    report = FileReport(file_path)
+    override = _worker["override"]
+    try:
+        status, source_code, qualnames, _ = prepare_file(
+            file_path,
+            override=override,
+            index=_worker["index"],
+            report=report,
+            override_all=_worker["override_all"],
+            chunk_lines=None,
+            journal=_worker["journal"],
+        )
+        targets = []
+        if status is None:
+            _, targets = plan_code(source_code, file_path, override, qualnames, report)
+            if not targets:
+                print(f"No changes made to file: {file_path}")
+                status = "unchanged"
+        if status in ("skipped", "documented", "unchanged"):
+            commit_file(
+                file_path,
+                status,
+                source_code,
+                override,
+                qualnames,
+                _worker["index"],
+                _worker["journal"],
+                report,
+            )
+    except Exception as e:
+        status = _error_status(file_path, e)
+        source_code, qualnames, targets = None, None, []
+    return file_path, status, report, source_code, qualnames, targets
+
+
+def _apply_file(file_path, source_code, docstrings, report, qualnames):
+    """Insert generated docstrings, validate and write one file in a worker process.
+
+    Args:
+        file_path (str): The file.
+        source_code (str): Its content when it was planned.
+        docstrings (dict): The generated docstrings, keyed by target index.
+        report (FileReport): The report of the file so far.
+        qualnames (set): The stale docstrings regenerated, or None for all.
+
+    Returns:
+        tuple: The file path, its outcome and its FileReport as a dict.
+
+    Raises:
+        None
+    """
+    try:
+        modified_code = source_code
+        if docstrings:
+            # Trees cannot cross processes cheaply, so the module is parsed again.
+            with report.stage("parse"):
+                module = cst.parse_module(source_code)
+            with report.stage("transform"):
+                modified_code = apply_docstrings(module, docstrings).code
+        status, final_code = _write_if_valid(
+            file_path, source_code, modified_code, report
+        )
+        commit_file(
+            file_path,
+            status,
+            final_code,
+            _worker["override"],
+            qualnames,
+            _worker["index"],
+            _worker["journal"],
+            report,
+        )
+    except Exception as e:
+        status = _error_status(file_path, e)
+    return file_path, status, report.to_dict()
+
+
+def run_pipeline(files, options, jobs=1):
+    """Process files through a staged pipeline shared by all files.
+
+    Files are discovered in a thread, read and planned in a pool of worker
+    processes, generated in a single generation stage on the event loop of this
+    process, and finally transformed, validated and written in the pool. The
+    planned files wait for generation in one queue, largest first, and the
+    generator's scheduler hands request slots to the largest requests of all
+    files in flight, so long files start early and small ones fill the gaps.
+    Every stage is bounded, so a slow stage holds back the ones before it.
+
+    Args:
+        files (iterable): The files to process, typically a generator.
+        options (dict): The run options, as for process_files. The whole rate
+            limit quota goes to this process's generator.
+        jobs (int, optional): Number of worker processes for the CPU stages.
+            Defaults to 1.
+
+    Returns:
+        list: (file path, outcome, file report dict) tuples in discovery order.
+
+    Raises:
+        None
+    """
+    _init_worker(options)
+    executor = ProcessPoolExecutor(
+        max_workers=max(1, jobs), initializer=_init_files, initargs=(options,)
+    )
+    completed = False
+    try:
+        results = asyncio.run(_run(files, executor, max(1, jobs)))
+        completed = True
+        return results
+    finally:
+        executor.shutdown(wait=completed, cancel_futures=not completed)
+        _worker["generator"].close()
+        if _worker["journal"] is not None:
+            _worker["journal"].close()
+
+
+async def _run(files, executor, jobs):
+    """Run the stages of the pipeline until every file is processed.
+
+    Args:
+        files (iterable): The files to process.
+        executor (ProcessPoolExecutor): The pool running the CPU stages.
+        jobs (int): Number of worker processes in the pool.
+
+    Returns:
+        list: (file path, outcome, file report dict) tuples in discovery order.
+
+    Raises:
+        Exception: An error of the pool, e.g. a worker process that died.
+    """
+    loop = asyncio.get_running_loop()
+    generator = _worker["generator"]
+    results = {}
+    errors = []
+    # Planned files waiting for generation: (-estimated tokens, number, plan).
+    queue = asyncio.PriorityQueue()
+    # Files planned or being planned but not yet picked up by generation.
+    planned = asyncio.Semaphore(PIPELINE.get("max_planned_files"))
+    # Files being transformed, validated and written.
+    applying = asyncio.Semaphore(PIPELINE.get("max_applying_files_per_job") * jobs)
+    planning = set()
+    writing = set()
+
+    def spawn(coroutine, tasks):
+        task = asyncio.create_task(coroutine)
+        tasks.add(task)
+
+        def done(task):
+            tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                errors.append(task.exception())
+
+        task.add_done_callback(done)
+
+    async def plan(number, file_path):
+        try:
+            file_path, status, report, source_code, qualnames, targets = (
+                await loop.run_in_executor(executor, _plan_file, file_path)
+            )
+        except BaseException:
+            planned.release()
+            raise
+        if status is not None:
+            planned.release()
+            results[number] = (file_path, status, report.to_dict())
+            return
+        work = sum(estimate_tokens(target.code_snippet) for target in targets)
+        queue.put_nowait(
+            (-work, number, (file_path, report, source_code, qualnames, targets))
+        )
+
+    async def apply(number, file_path, source_code, docstrings, report, qualnames):
+        try:
+            results[number] = await loop.run_in_executor(
+                executor,
+                _apply_file,
+                file_path,
+                source_code,
+                docstrings,
+                report,
+                qualnames,
+            )
+        finally:
+            applying.release()
+
+    async def generate():
+        while True:
+            _, number, item = await queue.get()
+            if item is None:
+                return
+            planned.release()
+            file_path, report, source_code, qualnames, targets = item
+            with report.stage("llm"):
+                docstrings = await generator.agenerate(targets, report)
+            await applying.acquire()
+            spawn(
+                apply(number, file_path, source_code, docstrings, report, qualnames),
+                writing,
+            )
+
+    # One generating file per request slot keeps every slot busy even when
+    # each file has a single target.
+    generators = [
+        asyncio.create_task(generate())
+        for _ in range(generator.scheduler.max_concurrency)
+    ]
+    iterator = iter(files)
+    number = 0
+    while not errors:
+        # Walking the tree blocks, so it runs next to the event loop.
+        file_path = await loop.run_in_executor(None, next, iterator, None)
+        if file_path is None:
+            break
+        await planned.acquire()
+        spawn(plan(number, file_path), planning)
+        number += 1
+    while planning:
+        await asyncio.wait(set(planning))
+    for position in range(len(generators)):
+        queue.put_nowait((math.inf, position, None))
+    await asyncio.gather(*generators)
+    while writing:
+        await asyncio.wait(set(writing))
+    if errors:
+        raise errors[0]
+    return [results[position] for position in range(number)]
@@ -0,0 +1,343 @@
+import json
+import math
+import time
+import contextlib
+
+# Stages timed for every file, in pipeline order.
+STAGES = (
+    "read",
+    "scan",
+    "parse",
+    "finder",
+    "plan",
+    "llm",
+    "transform",
+    "validate",
+    "write",
+    "index",
+)
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+
+class FileReport:
+    """Wall and CPU time per stage and the LLM requests made for one file."""
+
+    def __init__(self, file_path):
+        """Initialize an empty report.
+
+        Args:
+            file_path (str): The file the report is about.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.file_path = file_path
+        self.stages = {}
+        self.requests = []
+        self.reused = []
+        self.routes = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Add the wall and CPU time spent in the block to a stage.
+
+        Args:
+            name (str): One of STAGES.
+
+        Returns:
+            contextmanager: A context manager timing its block.
+
+        Raises:
+            None
+        """
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(
+                name, {"wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            totals["wall_seconds"] += time.perf_counter() - wall
+            totals["cpu_seconds"] += time.process_time() - cpu
+
+    def add_request(self, qualnames, seconds, usage, ok, model=None):
+        """Record one LLM request.
+
+        Args:
+            qualnames (list): The targets documented by the request.
+            seconds (float): Time until the request completed, including quota
+                waits and retries.
+            usage (dict): The token counts reported by the API and the
+                "finish_reason" of the response, possibly empty.
+            ok (bool): Whether the request succeeded.
+            model (str, optional): The model the request was sent to.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        request = {
+            "targets": list(qualnames),
+            "seconds": seconds,
+            "ok": ok,
+            "model": model,
+            "finish_reason": usage.get("finish_reason"),
+        }
+        for field in TOKEN_FIELDS:
+            request[field] = usage.get(field, 0)
+        self.requests.append(request)
+
+    def add_reuse(self, qualname, kind):
+        """Record a target documented with the docstring of a clone.
+
+        Args:
+            qualname (str): The target.
+            kind (str): "clone" or "near-duplicate".
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.reused.append({"target": qualname, "kind": kind})
+
+    def add_route(self, qualname, tier, model, measures):
+        """Record the model tier a target was routed to.
+
+        Args:
+            qualname (str): The target.
+            tier (dict): The routing tier.
+            model (str): The model the target is sent to.
+            measures (dict): The complexity measures the tier was chosen from.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.routes.append(
+            {
+                "target": qualname,
+                "tier": tier.get("name"),
+                "model": model,
+                **measures,
+            }
+        )
+
+    def to_dict(self):
+        """Return the report as a JSON-serializable dict.
+
+        Returns:
+            dict: The "stages", "requests", "reused" targets and "routes" of the
+                file.
+
+        Raises:
+            None
+        """
+        return {
+            "stages": self.stages,
+            "requests": self.requests,
+            "reused": self.reused,
+            "routes": self.routes,
+        }
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers.
+
+    Args:
+        values (list): The numbers, in any order.
+        fraction (float): The percentile as a fraction, e.g. 0.9.
+
+    Returns:
+        float: The percentile, or 0.0 for an empty list.
+
+    Raises:
+        None
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+def build_run_report(results, wall_seconds, top=5):
+    """Aggregate the per-file reports of a run.
+
+    Args:
+        results (list): (file path, outcome, file report dict) tuples as returned
+            by process_files.
+        wall_seconds (float): The duration of the whole run.
+        top (int, optional): Number of slowest files and targets kept. Defaults
+            to 5.
+
+    Returns:
+        dict: The run totals, requests per finish reason, targets per routing
+            tier, latency percentiles, slowest files and targets and the
+            per-file reports.
+
+    Raises:
+        None
+    """
+    stages = {name: {"wall_seconds": 0.0, "cpu_seconds": 0.0} for name in STAGES}
+    tokens = {field: 0 for field in TOKEN_FIELDS}
+    files = []
+    latencies = []
+    targets = []
+    reused = {}
+    routes = {}
+    finish_reasons = {}
+    failed = 0
+    for file_path, status, report in results:
+        report = report or {"stages": {}, "requests": [], "reused": [], "routes": []}
+        for entry in report["reused"]:
+            reused[entry["kind"]] = reused.get(entry["kind"], 0) + 1
+        for entry in report["routes"]:
+            routes[entry["tier"]] = routes.get(entry["tier"], 0) + 1
+        for name, totals in report["stages"].items():
+            for key, value in totals.items():
+                stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})
+                stages[name][key] += value
+        for request in report["requests"]:
+            latencies.append(request["seconds"])
+            failed += not request["ok"]
+            reason = request.get("finish_reason")
+            if reason:
+                finish_reasons[reason] = finish_reasons.get(reason, 0) + 1
+            for field in TOKEN_FIELDS:
+                tokens[field] += request[field]
+            targets.extend(
+                (request["seconds"], file_path, qualname)
+                for qualname in request["targets"]
+            )
+        files.append(
+            dict(
+                report,
+                path=file_path,
+                status=status,
+                wall_seconds=sum(
+                    totals["wall_seconds"] for totals in report["stages"].values()
+                ),
+            )
+        )
+
+    return {
+        "wall_seconds": wall_seconds,
+        "files": len(files),
+        "stages": stages,
+        "requests": len(latencies),
+        "failed_requests": failed,
+        "tokens": tokens,
+        "finish_reasons": finish_reasons,
+        "reused": reused,
+        "routes": routes,
+        "latency_seconds": {
+            "p50": percentile(latencies, 0.5),
+            "p90": percentile(latencies, 0.9),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies, default=0.0),
+        },
+        "slowest_files": [
+            {"path": entry["path"], "wall_seconds": entry["wall_seconds"]}
+            for entry in sorted(files, key=lambda entry: -entry["wall_seconds"])[:top]
+        ],
+        "slowest_targets": [
+            {"path": file_path, "qualname": qualname, "seconds": seconds}
+            for seconds, file_path, qualname in sorted(
+                targets, key=lambda target: -target[0]
+            )[:top]
+        ],
+        "per_file": files,
+    }
+
+
+def print_run_report(report):
+    """Print a concise table of the run report.
+
+    Args:
+        report (dict): A report built with build_run_report.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    print(f"\nRun report ({report['wall_seconds']:.2f}s wall):")
+    print(f"  {'stage':<10} {'wall s':>9} {'CPU s':>9}")
+    for name, totals in report["stages"].items():
+        if totals["wall_seconds"]:
+            print(
+                f"  {name:<10} {totals['wall_seconds']:>9.2f} "
+                f"{totals['cpu_seconds']:>9.2f}"
+            )
+    if report["requests"]:
+        latency = report["latency_seconds"]
+        tokens = report["tokens"]
+        print(
+            f"  {report['requests']} requests ({report['failed_requests']} failed), "
+            f"latency p50 {latency['p50']:.2f}s, p90 {latency['p90']:.2f}s, "
+            f"p99 {latency['p99']:.2f}s, max {latency['max']:.2f}s"
+        )
+        print(
+            f"  tokens: {tokens['prompt_tokens']} prompt "
+            f"({tokens['cached_tokens']} cached), "
+            f"{tokens['completion_tokens']} completion"
+        )
+    if report.get("finish_reasons"):
+        # "early" responses were abandoned once their docstring was complete and
+        # "length" ones were cut short by their output token limit.
+        print(
+            "  finish reasons: "
+            + ", ".join(
+                f"{count} {reason}"
+                for reason, count in sorted(report["finish_reasons"].items())
+            )
+        )
+    if report["reused"]:
+        print(
+            "  reused docstrings: "
+            + ", ".join(
+                f"{count} {kind}s" for kind, count in sorted(report["reused"].items())
+            )
+        )
+    if report["routes"]:
+        print(
+            "  routed targets: "
+            + ", ".join(f"{count} {tier}" for tier, count in report["routes"].items())
+        )
+    if report["slowest_files"]:
+        print("  slowest files:")
+        for entry in report["slowest_files"]:
+            print(f"    {entry['wall_seconds']:>8.2f}s {entry['path']}")
+    if report["slowest_targets"]:
+        print("  slowest targets:")
+        for entry in report["slowest_targets"]:
+            print(f"    {entry['seconds']:>8.2f}s {entry['path']}::{entry['qualname']}")
+
+
+def write_run_report(report, path):
+    """Write the run report as JSON.
+
+    Args:
+        report (dict): A report built with build_run_report.
+        path (str): The destination file.
+
+    Returns:
+        None
+
+    Raises:
+        IOError: If the file cannot be written.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,182 @@
+import ast
+import textwrap
+from docu_gen.core.constant import ROUTING
+
+# Nodes adding a decision point to the cyclomatic complexity.
+_BRANCH_TYPES = (
+    ast.If,
+    ast.IfExp,
+    ast.For,
+    ast.AsyncFor,
+    ast.While,
+    ast.ExceptHandler,
+    ast.Assert,
+    ast.comprehension,
+)
+
+
+def measure_complexity(code_snippet):
+    """Measure how hard a target is to document.
+
+    Args:
+        code_snippet (str): The code sent to the LLM for the target.
+
+    Returns:
+        dict: The "lines", cyclomatic "complexity", "parameters" and "raises" of
+            the code, and the "score" combining them. Code that cannot be parsed
+            is only measured by its lines.
+
+    Raises:
+        None
+    """
+    lines = sum(1 for line in code_snippet.splitlines() if line.strip())
+    measures = {"lines": lines, "complexity": 1, "parameters": 0, "raises": 0}
+    try:
+        node = ast.parse(textwrap.dedent(code_snippet)).body[0]
+    except (SyntaxError, ValueError, IndexError):
+        node = None
+    if node is not None:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            arguments = node.args
+            measures["parameters"] = (
+                sum(
+                    argument.arg not in ("self", "cls")
+                    for argument in arguments.posonlyargs
+                    + arguments.args
+                    + arguments.kwonlyargs
+                )
+                + (arguments.vararg is not None)
+                + (arguments.kwarg is not None)
+            )
+        for child in ast.walk(node):
+            if isinstance(child, _BRANCH_TYPES):
+                measures["complexity"] += 1
+            elif isinstance(child, ast.BoolOp):
+                measures["complexity"] += len(child.values) - 1
+            elif isinstance(child, ast.Raise):
+                measures["raises"] += 1
+    measures["score"] = (
+        measures["complexity"]
+        + lines // 10
+        + max(0, measures["parameters"] - 3)
+        + measures["raises"]
+    )
+    return measures
+
+
+def parse_tier(spec):
+    """Parse a tier given on the command line.
+
+    Args:
+        spec (str): "NAME=MODEL[:MAX_SCORE[:MAX_TOKENS]]". An empty model uses the
+            default model and an empty or missing maximum score accepts every
+            target.
+
+    Returns:
+        dict: The tier's "name", "model_name", "max_score" and "max_tokens".
+
+    Raises:
+        ValueError: If the specification is malformed.
+    """
+    name, separator, rest = spec.partition("=")
+    if not separator or not name:
+        raise ValueError(
+            f"Invalid tier '{spec}', expected NAME=MODEL[:MAX_SCORE[:MAX_TOKENS]]."
+        )
+    parts = rest.split(":")
+    if len(parts) > 3:
+        raise ValueError(
+            f"Invalid tier '{spec}', expected NAME=MODEL[:MAX_SCORE[:MAX_TOKENS]]."
+        )
+    parts += [""] * (3 - len(parts))
+    return {
+        "name": name,
+        "model_name": parts[0] or None,
+        "max_score": float(parts[1]) if parts[1] else None,
+        "max_tokens": int(parts[2]) if parts[2] else None,
+    }
+
+
+def resolve_tier(tier, model_family, model_name):
+    """Choose the model of a tier for the backend of the run.
+
+    Args:
+        tier (dict): A tier with either a "model_name" or "model_names" keyed by
+            model family.
+        model_family (str): The model family of the run.
+        model_name (str): The model of the run.
+
+    Returns:
+        dict: A copy of the tier whose "model_name" is the model the tier sends
+            its targets to, or None for the run's model. A tier's "model_name"
+            always applies. Otherwise the model of the run's family applies if
+            it costs less than the run's model per input and output token.
+
+    Raises:
+        None
+    """
+    tier = dict(tier)
+    models = tier.pop("model_names", None) or {}
+    if tier.get("model_name") is None:
+        model = models.get(model_family)
+        prices = ROUTING.get("prices")
+        if (
+            model not in prices
+            or model_name not in prices
+            or not all(
+                price < run_price
+                for price, run_price in zip(prices[model], prices[model_name])
+            )
+        ):
+            model = None
+        tier["model_name"] = model
+    return tier
+
+
+class ModelRouter:
+    """Routes each target to the model tier matching its complexity."""
+
+    def __init__(self, tiers=None, model_family=None, model_name=None):
+        """Initialize the router.
+
+        Args:
+            tiers (list, optional): Tier dicts with a "name", a "model_name" (None
+                for the run's model) or "model_names" keyed by model family, a
+                "max_score" (None for no limit) and a "max_tokens" (None for the
+                default), from the simplest to the most complex. Defaults to
+                ROUTING["tiers"].
+            model_family (str, optional): The model family of the run, which
+                selects the model of tiers with "model_names". Defaults to None.
+            model_name (str, optional): The model of the run. Defaults to None.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If no tier is given.
+        """
+        self.tiers = [
+            resolve_tier(tier, model_family, model_name)
+            for tier in tiers or ROUTING.get("tiers")
+        ]
+        if not self.tiers:
+            raise ValueError("At least one routing tier is required.")
+
+    def route(self, code_snippet):
+        """Choose the tier of a target.
+
+        Args:
+            code_snippet (str): The code sent to the LLM for the target.
+
+        Returns:
+            tuple: The first tier whose maximum score is not exceeded by the
+                target's, or the last tier, and the measures of the target.
+
+        Raises:
+            None
+        """
+        measures = measure_complexity(code_snippet)
+        for tier in self.tiers:
+            if tier.get("max_score") is None or measures["score"] <= tier["max_score"]:
+                return tier, measures
+        return self.tiers[-1], measures
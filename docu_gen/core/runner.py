@@ -0,0 +1,244 @@
+import multiprocessing
+import multiprocessing.util
+from collections import Counter
+from docu_gen.core.constant import AI_MODEL, CHUNKING, RATE_LIMIT
+from docu_gen.core.file_processor import add_docstrings_to_file
+from docu_gen.core.generator import DocstringGenerator
+from docu_gen.core.index import ProjectIndex
+from docu_gen.core.journal import Journal
+from docu_gen.core.report import FileReport
+from docu_gen.core.router import ModelRouter
+from docu_gen.utils.docstring_cache import DocstringCache
+from docu_gen.utils.llm import LLM
+
+# Per-process state set up by ``_init_worker``.
+_worker = {}
+
+
+def _init_worker(options):
+    """Set up the generator used by the current process.
+
+    Args:
+        options (dict): The run options: "override", "override_all",
+            "cache_path" (None disables the cache), "index_path" (None disables
+            the index), "concurrency", "batch_tokens", "offline", "dedup",
+            "near_duplicate_threshold", the backend settings "model_family",
+            "model_name" and "base_url", the "routing_tiers" (None disables
+            routing), "chunk_lines", "journal_path" (None disables the journal),
+            "resume", "stream" and "adaptive_max_tokens", and the per-process
+            rate limits "requests_per_minute", "tokens_per_minute" and
+            "max_retries".
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    _init_files(options)
+    cache_path = options.get("cache_path")
+    cache = DocstringCache(path=cache_path) if cache_path else None
+    tiers = options.get("routing_tiers")
+    llm = _make_llm(options)
+    _worker["generator"] = DocstringGenerator(
+        llm=llm,
+        cache=cache,
+        concurrency=options.get("concurrency"),
+        batch_tokens=options.get("batch_tokens", 0),
+        offline=options.get("offline", False),
+        requests_per_minute=options.get("requests_per_minute"),
+        tokens_per_minute=options.get("tokens_per_minute"),
+        max_retries=options.get("max_retries", RATE_LIMIT.get("max_retries")),
+        dedup=options.get("dedup", True),
+        near_duplicate_threshold=options.get("near_duplicate_threshold"),
+        router=(
+            ModelRouter(tiers, llm.model_family, llm.model_name) if tiers else None
+        ),
+        journal=_worker["journal"],
+        stream=options.get("stream", False),
+        adaptive_max_tokens=options.get("adaptive_max_tokens", True),
+    )
+
+
+def _make_llm(options):
+    """Build the LLM of the backend selected by the run options.
+
+    Args:
+        options (dict): The run options, as for _init_worker.
+
+    Returns:
+        LLM: The LLM, whose client is not initialized yet.
+
+    Raises:
+        ValueError: If the model family is not supported.
+    """
+    return LLM(
+        model_name=options.get("model_name"),
+        model_family=options.get("model_family", AI_MODEL.get("model_family")),
+        base_url=options.get("base_url"),
+    )
+
+
+def _init_pool_worker(options):
+    """Set up a pool worker process and close its generator when it exits.
+
+    Args:
+        options (dict): The run options, as for _init_worker.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    _init_worker(options)
+    multiprocessing.util.Finalize(None, _worker["generator"].close, exitpriority=10)
+
+
+def _init_files(options):
+    """Set up the index, the journal and the file options of the current process.
+
+    Args:
+        options (dict): The run options, as for _init_worker.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    index_path = options.get("index_path")
+    _worker["index"] = ProjectIndex(index_path) if index_path else None
+    _worker["override"] = options.get("override", False)
+    _worker["override_all"] = options.get("override_all", False)
+    _worker["chunk_lines"] = options.get("chunk_lines", CHUNKING.get("chunk_lines"))
+    journal_path = options.get("journal_path")
+    _worker["journal"] = Journal(journal_path) if journal_path else None
+    if _worker["journal"] is not None and options.get("resume"):
+        _worker["journal"].replay()
+
+
+def _process_file(file_path, selection=None):
+    """Process one file with the current process's generator.
+
+    Args:
+        file_path (str): The file to process.
+        selection (set, optional): The only definitions documented. Defaults to
+            None, meaning all of them.
+
+    Returns:
+        tuple: The file path, its outcome and its FileReport as a dict. Errors are
+            reported as "error: <message>" instead of being raised, so one bad
+            file does not stop the run.
+
+    Raises:
+        None
+    """
+    report = FileReport(file_path)
+    try:
+        status = add_docstrings_to_file(
+            file_path,
+            override=_worker["override"],
+            generator=_worker["generator"],
+            index=_worker["index"],
+            report=report,
+            selection=selection,
+            override_all=_worker["override_all"],
+            chunk_lines=_worker["chunk_lines"],
+            journal=_worker["journal"],
+        )
+    except Exception as e:
+        status = _error_status(file_path, e)
+    return file_path, status, report.to_dict()
+
+
+def _error_status(file_path, error):
+    """Report an error that stopped the processing of a file.
+
+    Args:
+        file_path (str): The file.
+        error (Exception): The error.
+
+    Returns:
+        str: The outcome of the file, "error: <first line of the message>".
+
+    Raises:
+        None
+    """
+    print(f"Error processing file '{file_path}': {error}")
+    return "error: " + (str(error).splitlines() or [type(error).__name__])[0]
+
+
+def process_files(files, options, jobs=1, max_files_per_worker=None):
+    """Process files, optionally in a pool of worker processes.
+
+    Files are streamed to the workers as they are discovered. Results are returned
+    in the order the files were discovered.
+
+    Args:
+        files (iterable): The files to process, typically a generator.
+        options (dict): The run options passed to each worker.
+        jobs (int, optional): Number of worker processes. Defaults to 1, which
+            processes the files in the current process.
+        max_files_per_worker (int, optional): Number of files after which a worker
+            is replaced by a fresh one, bounding its memory. Defaults to None.
+
+    Returns:
+        list: (file path, outcome, file report dict) tuples in discovery order.
+
+    Raises:
+        None
+    """
+    if jobs <= 1:
+        _init_worker(options)
+        try:
+            return [_process_file(file_path) for file_path in files]
+        finally:
+            _worker["generator"].close()
+            if _worker["journal"] is not None:
+                _worker["journal"].close()
+
+    with multiprocessing.Pool(
+        processes=jobs,
+        initializer=_init_pool_worker,
+        initargs=(options,),
+        maxtasksperchild=max_files_per_worker,
+    ) as pool:
+        results = list(pool.imap(_process_file, files, chunksize=1))
+        # Workers that exit on their own run their finalizers; terminating the
+        # pool on leaving the block would kill them.
+        pool.close()
+        pool.join()
+        return results
+
+
+def print_summary(results):
+    """Print the outcome of every file followed by totals per outcome.
+
+    Args:
+        results (list): (file path, outcome, file report dict) tuples as returned
+            by process_files.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    if not results:
+        print("No Python files to process.")
+        return
+    print("\nSummary:")
+    for file_path, status, _ in results:
+        print(f"  {status:<18} {file_path}")
+    totals = Counter(status.split(":")[0] for _, status, _ in results)
+    print(
+        f"{len(results)} files: "
+        + ", ".join(f"{count} {status}" for status, count in sorted(totals.items()))
+    )
+    if totals["documented"]:
+        print(
+            f"Pre-scan skipped {totals['documented']} of {len(results)} files "
+            f"({totals['documented'] / len(results):.0%}) without parsing them "
+            "with libcst."
+        )
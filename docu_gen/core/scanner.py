@@ -0,0 +1,524 @@
+import io
+import re
+import ast
+import hashlib
+import tokenize
+
+_DEFINITION_TYPES = (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)
+
+# A Google style section header, e.g. "Args:" or "Raises:".
+_SECTION = re.compile(r"^(\s*)([A-Z][A-Za-z]*(?: [A-Za-z]+)?):\s*$")
+
+# A documented parameter, e.g. "name (str): ..." or "*args: ...".
+_PARAMETER = re.compile(r"^\s*\**(\w+)\s*(?:\(.*\))?\s*:")
+
+_ARGS_SECTIONS = ("Args", "Arguments", "Parameters")
+
+
+class Definition:
+    """A class, method or function found by scan_definitions."""
+
+    def __init__(
+        self,
+        index,
+        qualname,
+        code_type,
+        start,
+        end,
+        body_hash,
+        has_docstring,
+        docstring_hash=None,
+        drift=None,
+    ):
+        """Initialize the definition.
+
+        Args:
+            index (int): Pre-order position among all definitions in the module, as
+                assigned by DocstringPlanner.
+            qualname (str): Dotted name of the definition, e.g. "Class.method".
+            code_type (str): The type of code ("class", "method" or "function").
+            start (int): First line of the definition, including decorators.
+            end (int): Last line of the definition.
+            body_hash (str): Hash of the code, ignoring formatting, comments and
+                docstrings.
+            has_docstring (bool): Whether the definition has a docstring.
+            docstring_hash (str, optional): Hash of the docstring, or None without
+                one.
+            drift (list, optional): The parts of the docstring that disagree with
+                the code ("args", "raises"), or None if they were not checked.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.index = index
+        self.qualname = qualname
+        self.code_type = code_type
+        self.start = start
+        self.end = end
+        self.body_hash = body_hash
+        self.has_docstring = has_docstring
+        self.docstring_hash = docstring_hash
+        self.drift = drift
+
+
+def has_docstring(body):
+    """Check if a body starts with a docstring, as docstring_remover.has_docstring.
+
+    Args:
+        body (list): The statements of a module, class or function.
+
+    Returns:
+        bool: True if the first statement is a string or bytes constant, which
+            includes implicit concatenations and one-line suites.
+
+    Raises:
+        None
+    """
+    return (
+        bool(body)
+        and isinstance(body[0], ast.Expr)
+        and isinstance(body[0].value, ast.Constant)
+        and isinstance(body[0].value.value, (str, bytes))
+    )
+
+
+def count_undocumented(source_code, chunk_lines=None):
+    """Count the classes, methods and functions without a docstring.
+
+    This only walks the stdlib ``ast`` tree, which is much cheaper than a libcst
+    parse, so fully documented files can be skipped early.
+
+    Args:
+        source_code (str): The source code to scan.
+        chunk_lines (int, optional): Parse the module one chunk of top-level
+            statements of about this many lines at a time, as split_top_level
+            does. Defaults to None, which parses it whole.
+
+    Returns:
+        int: The number of definitions without a docstring. Code that ``ast`` cannot
+            parse is reported as having one, so it still goes through libcst.
+
+    Raises:
+        None
+    """
+    try:
+        return sum(
+            1
+            for chunk in _chunks(source_code, chunk_lines)
+            for node in ast.walk(ast.parse(chunk))
+            if isinstance(node, _DEFINITION_TYPES) and not has_docstring(node.body)
+        )
+    except (SyntaxError, ValueError, tokenize.TokenError):
+        return 1
+
+
+def scan_definitions(source_code, with_hashes=True, with_drift=False, chunk_lines=None):
+    """List the classes, methods and functions of a module without libcst.
+
+    Args:
+        source_code (str): The source code to scan.
+        with_hashes (bool, optional): Compute the body and docstring hashes of
+            every definition. Defaults to True; without it ``body_hash`` and
+            ``docstring_hash`` are None.
+        with_drift (bool, optional): Compare the docstring of every function and
+            method with its code. Defaults to False; without it ``drift`` is None.
+        chunk_lines (int, optional): Parse the module one chunk of top-level
+            statements of about this many lines at a time, as split_top_level
+            does, so only one chunk's tree is held at once. Defaults to None,
+            which parses it whole.
+
+    Returns:
+        list: Definition objects in pre-order.
+
+    Raises:
+        SyntaxError: If the source code cannot be parsed.
+        tokenize.TokenError: If the source code cannot be split into chunks.
+    """
+    definitions = []
+    line_offset = 0
+    for chunk in _chunks(source_code, chunk_lines):
+        scan_chunk(chunk, line_offset, definitions, with_hashes, with_drift)
+        line_offset += chunk.count("\n")
+    return definitions
+
+
+def scan_chunk(chunk, line_offset, definitions, with_hashes=True, with_drift=False):
+    """Scan one chunk of consecutive top-level statements of a module.
+
+    Scanning the chunks of a module in order gives the same definitions as
+    scanning the whole module, without ever holding all of it.
+
+    Args:
+        chunk (str): The chunk.
+        line_offset (int): The number of lines of the module before the chunk.
+        definitions (list): The Definition objects of the previous chunks,
+            extended in place.
+        with_hashes (bool, optional): As for scan_definitions. Defaults to True.
+        with_drift (bool, optional): As for scan_definitions. Defaults to False.
+
+    Returns:
+        None
+
+    Raises:
+        SyntaxError: If the chunk cannot be parsed.
+    """
+    _scan_tree(ast.parse(chunk), line_offset, definitions, with_hashes, with_drift)
+
+
+def _scan_tree(tree, line_offset, definitions, with_hashes, with_drift):
+    """Append the definitions of a parsed module or chunk to a list.
+
+    Args:
+        tree (ast.Module): The parsed code.
+        line_offset (int): The number of lines of the module before the code.
+        definitions (list): The Definition objects found so far, extended in
+            place.
+        with_hashes (bool): Compute the body and docstring hashes.
+        with_drift (bool): Compare docstrings with their code.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    first = len(definitions)
+    nodes = []
+    state = {"current_class": None}
+
+    def visit(node, parent):
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, _DEFINITION_TYPES):
+                visit(child, parent)
+                continue
+            qualname = parent + child.name
+            if isinstance(child, ast.ClassDef):
+                code_type = "class"
+                state["current_class"] = child.name
+            else:
+                code_type = "method" if state["current_class"] else "function"
+            start = min(
+                [child.lineno]
+                + [decorator.lineno for decorator in child.decorator_list]
+            )
+            docstring = _docstring_text(child.body)
+            definitions.append(
+                Definition(
+                    len(definitions),
+                    qualname,
+                    code_type,
+                    start + line_offset,
+                    child.end_lineno + line_offset,
+                    None,
+                    has_docstring(child.body),
+                    docstring_hash=(
+                        _hash_text(docstring)
+                        if with_hashes and docstring is not None
+                        else None
+                    ),
+                    drift=(
+                        find_drift(child, docstring)
+                        if with_drift and docstring is not None
+                        else None
+                    ),
+                )
+            )
+            nodes.append(child)
+            visit(child, qualname + ".")
+            if code_type == "class":
+                state["current_class"] = None
+
+    visit(tree, "")
+    if not with_hashes:
+        return
+
+    # Docstrings are dropped everywhere before hashing so adding or rewriting one
+    # never counts as a code change.
+    for node in ast.walk(tree):
+        if isinstance(node, _DEFINITION_TYPES + (ast.Module,)) and has_docstring(
+            node.body
+        ):
+            node.body = node.body[1:] or [ast.Pass()]
+    for definition, node in zip(definitions[first:], nodes):
+        definition.body_hash = _hash_node(node)
+
+
+def _chunks(source_code, chunk_lines):
+    """Return the chunks a module is scanned in.
+
+    Args:
+        source_code (str): The source code.
+        chunk_lines (int): The chunk length for split_top_level, or None.
+
+    Returns:
+        iterable: The chunks, or the whole module if chunk_lines is None.
+
+    Raises:
+        None
+    """
+    if not chunk_lines:
+        return [source_code]
+    return split_top_level(source_code, chunk_lines)
+
+
+def split_top_level(source_code, max_lines):
+    """Split a module into chunks of consecutive top-level statements.
+
+    A chunk is closed at the first top-level statement starting after it reached
+    ``max_lines`` lines, so chunks are about that long unless a single statement
+    is longer. Decorators stay with their definition and comments and blank lines
+    with the statement before them, so every chunk parses on its own and the
+    chunks joined give back the module.
+
+    Args:
+        source_code (str): The source code to split.
+        max_lines (int): The number of lines after which a chunk is closed.
+
+    Returns:
+        generator: The chunks, as source code strings.
+
+    Raises:
+        tokenize.TokenError: If the code cannot be tokenized.
+        SyntaxError: If the code has inconsistent indentation.
+    """
+    lines = io.StringIO(source_code).readlines()
+    chunk_start = 0
+    for start in _statement_starts(source_code):
+        if start - chunk_start >= max_lines:
+            yield "".join(lines[chunk_start:start])
+            chunk_start = start
+    yield "".join(lines[chunk_start:])
+
+
+def _statement_starts(source_code):
+    """Find the top-level statements of a module without parsing it.
+
+    Args:
+        source_code (str): The source code.
+
+    Returns:
+        generator: The 0-based first line of every top-level statement, which is
+            the line of its first decorator for a decorated definition.
+
+    Raises:
+        tokenize.TokenError: If the code cannot be tokenized.
+        SyntaxError: If the code has inconsistent indentation.
+    """
+    depth = 0
+    statement_start = True
+    decorated = False
+    for token in tokenize.generate_tokens(io.StringIO(source_code).readline):
+        if token.type == tokenize.INDENT:
+            depth += 1
+        elif token.type == tokenize.DEDENT:
+            depth -= 1
+        elif token.type == tokenize.NEWLINE:
+            statement_start = True
+        elif token.type not in (tokenize.NL, tokenize.COMMENT, tokenize.ENDMARKER):
+            if statement_start and depth == 0:
+                if not decorated:
+                    yield token.start[0] - 1
+                decorated = token.string == "@"
+            statement_start = False
+
+
+def _docstring_text(body):
+    """Return the docstring of a body.
+
+    Args:
+        body (list): The statements of a class or function.
+
+    Returns:
+        str: The docstring, or None if the body has none. Bytes docstrings are
+            decoded leniently.
+
+    Raises:
+        None
+    """
+    if not has_docstring(body):
+        return None
+    value = body[0].value.value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", "replace")
+    return value
+
+
+def _hash_text(text):
+    """Hash a text.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        str: A hex SHA-256 digest.
+
+    Raises:
+        None
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _sections(docstring):
+    """Split a Google style docstring into its sections.
+
+    Args:
+        docstring (str): The docstring.
+
+    Returns:
+        dict: The lines of every section, keyed by header without the colon.
+
+    Raises:
+        None
+    """
+    sections = {}
+    current = None
+    header_indent = 0
+    for line in docstring.expandtabs().splitlines():
+        match = _SECTION.match(line)
+        if match:
+            current = sections.setdefault(match.group(2), [])
+            header_indent = len(match.group(1))
+        elif current is not None and line.strip():
+            if len(line) - len(line.lstrip()) <= header_indent:
+                current = None
+            else:
+                current.append(line)
+    return sections
+
+
+def _documented_parameters(lines):
+    """Return the parameter names of an Args section.
+
+    Only the entries at the section's first indentation level are parameters;
+    deeper lines continue their description.
+
+    Args:
+        lines (list): The lines of the section.
+
+    Returns:
+        set: The parameter names, without leading asterisks.
+
+    Raises:
+        None
+    """
+    if not lines:
+        return set()
+    indent = min(len(line) - len(line.lstrip()) for line in lines)
+    names = set()
+    for line in lines:
+        if len(line) - len(line.lstrip()) == indent:
+            match = _PARAMETER.match(line)
+            if match and match.group(1) != "None":
+                names.add(match.group(1))
+    return names
+
+
+def _raised_exceptions(node):
+    """Return the exception classes a function raises itself.
+
+    Bare re-raises, raised variables and raises inside nested definitions are
+    ignored.
+
+    Args:
+        node (ast.FunctionDef | ast.AsyncFunctionDef): The function.
+
+    Returns:
+        set: The raised class names, e.g. "ValueError".
+
+    Raises:
+        None
+    """
+    raised = set()
+    pending = list(node.body)
+    while pending:
+        child = pending.pop()
+        if isinstance(child, _DEFINITION_TYPES + (ast.Lambda,)):
+            continue
+        if isinstance(child, ast.Raise) and child.exc is not None:
+            exc = child.exc.func if isinstance(child.exc, ast.Call) else child.exc
+            name = exc.attr if isinstance(exc, ast.Attribute) else exc
+            name = name.id if isinstance(name, ast.Name) else name
+            if isinstance(name, str) and name[:1].isupper():
+                raised.add(name)
+        pending.extend(ast.iter_child_nodes(child))
+    return raised
+
+
+def find_drift(node, docstring):
+    """Compare the docstring of a function or method with its code.
+
+    Only structured docstrings, with at least one Google style section, are
+    checked: their Args section must list exactly the parameters of the
+    signature, and every exception class the function raises must be named in
+    their Raises section.
+
+    Args:
+        node (ast.AST): The definition.
+        docstring (str): Its docstring.
+
+    Returns:
+        list: "args" and/or "raises" for the sections that no longer match the
+            code. Classes and unstructured docstrings always have none.
+
+    Raises:
+        None
+    """
+    if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return []
+    sections = _sections(docstring)
+    if not sections:
+        return []
+    drift = []
+    arguments = node.args
+    parameters = {
+        argument.arg
+        for argument in arguments.posonlyargs
+        + arguments.args
+        + arguments.kwonlyargs
+        + [arguments.vararg, arguments.kwarg]
+        if argument is not None
+    } - {"self", "cls"}
+    documented = next(
+        (sections[name] for name in _ARGS_SECTIONS if name in sections), None
+    )
+    if documented is not None or parameters:
+        if _documented_parameters(documented or []) - {"self", "cls"} != parameters:
+            drift.append("args")
+    raised = _raised_exceptions(node)
+    if raised:
+        documented_raises = set(
+            re.findall(r"\w+", " ".join(sections.get("Raises", [])))
+        )
+        if not raised <= documented_raises:
+            drift.append("raises")
+    return drift
+
+
+def _hash_node(node):
+    """Hash the parts of a definition that its docstring is generated from.
+
+    Functions are hashed whole. Classes are hashed by name and ``__init__`` only,
+    mirroring the snippet DocstringPlanner sends for them.
+
+    Args:
+        node (ast.AST): The definition, with docstrings already removed.
+
+    Returns:
+        str: A hex SHA-256 digest.
+
+    Raises:
+        None
+    """
+    if isinstance(node, ast.ClassDef):
+        parts = [node.name] + [
+            ast.dump(element)
+            for element in node.body
+            if isinstance(element, ast.FunctionDef) and element.name == "__init__"
+        ]
+        dump = "\n".join(parts)
+    else:
+        dump = ast.dump(node)
+    return hashlib.sha256(dump.encode("utf-8")).hexdigest()
@@ -1,10 +1,227 @@
+import io
+import tokenize
 from docu_gen.core.docstring_remover import DocstringRemover
 import libcst as cst
 
+_STATEMENT_START = (
+    tokenize.NEWLINE,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENCODING,
+)
+_BLANK = (tokenize.NL, tokenize.COMMENT)
+
 
 def validate_only_docstrings_added(original_code, modified_code):
     """Validate if only docstrings have been added or modified in the code.
 
+    The two sources are compared token by token, skipping the docstrings of the
+    module, classes and functions, so neither source has to be parsed. The answer
+    is the same as the one of validate_only_docstrings_added_libcst.
+
+    Args:
+        original_code (str): The original code to compare.
+        modified_code (str): The modified code to compare.
+
+    Returns:
+        bool: True if only docstrings have been added or modified, False otherwise.
+
+    Raises:
+        None
+    """
+    if original_code == modified_code:
+        return True
+    try:
+        original_tokens = _tokens_without_docstrings(original_code)
+        modified_tokens = _tokens_without_docstrings(modified_code)
+    except (tokenize.TokenError, SyntaxError):
+        return validate_only_docstrings_added_libcst(original_code, modified_code)
+    return original_tokens == modified_tokens
+
+
+def _tokens_without_docstrings(source_code):
+    """Tokenize source code and drop every statement DocstringRemover would remove.
+
+    Args:
+        source_code (str): The code to tokenize.
+
+    Returns:
+        list: Comparable token tuples. The text of every physical line that holds a
+            kept token is included, so whitespace and comments are compared too.
+
+    Raises:
+        tokenize.TokenError: If the code cannot be tokenized.
+        SyntaxError: If the code has inconsistent indentation.
+    """
+    tokens = list(tokenize.generate_tokens(io.StringIO(source_code).readline))
+    kept = []
+    last_row = 0
+    depth = 0
+    statement_start = True
+    in_header = False
+    # The module docstring is the first statement of the file.
+    position = _skip(tokens, 0, _BLANK)
+    end = _docstring_end(tokens, position)
+    if end is None:
+        index = 0
+    else:
+        last_row = _keep(kept, tokens, 0, position, last_row)
+        index = end
+
+    while index < len(tokens):
+        token = tokens[index]
+        if (
+            in_header
+            and depth == 0
+            and token.type == tokenize.OP
+            and token.string == ":"
+        ):
+            in_header = False
+            block = _skip(tokens, index + 1, (tokenize.COMMENT,))
+            if tokens[block].type == tokenize.NEWLINE:
+                # Comments and blank lines before a docstring belong to it.
+                indent = _skip(tokens, block + 1, _BLANK)
+                if tokens[indent].type == tokenize.INDENT:
+                    end = _docstring_end(tokens, indent + 1)
+                    if end is not None:
+                        last_row = _keep(kept, tokens, index, block + 1, last_row)
+                        last_row = _keep(kept, tokens, indent, indent + 1, last_row)
+                        index = end
+                        statement_start = True
+                        continue
+
+        if token.type == tokenize.OP:
+            if token.string in ("(", "[", "{"):
+                depth += 1
+            elif token.string in (")", "]", "}"):
+                depth -= 1
+        if statement_start and token.type == tokenize.NAME:
+            in_header = token.string in ("def", "class") or (
+                token.string == "async"
+                and index + 1 < len(tokens)
+                and tokens[index + 1].string == "def"
+            )
+        if token.type not in _BLANK:
+            statement_start = token.type in _STATEMENT_START
+        last_row = _keep(kept, tokens, index, index + 1, last_row)
+        index += 1
+
+    # Blank and comment lines that open a block come before its INDENT token,
+    # but follow it once a docstring is inserted above them, so INDENT tokens
+    # are moved past them.
+    normalized = []
+    indents = []
+    for token in kept:
+        if token[0] == tokenize.INDENT:
+            indents.append(token)
+            continue
+        if token[0] not in _BLANK:
+            normalized.extend(indents)
+            indents = []
+        normalized.append(token)
+    # Whitespace after the last line break is not part of any token.
+    trailing = source_code[len(source_code.rstrip()) :]
+    return normalized + indents + [trailing]
+
+
+def _skip(tokens, index, types):
+    """Return the index of the first token at or after ``index`` not of ``types``.
+
+    Args:
+        tokens (list): The tokens.
+        index (int): Where to start.
+        types (tuple): Token types to skip.
+
+    Returns:
+        int: The index of the first other token.
+
+    Raises:
+        None
+    """
+    while index < len(tokens) - 1 and tokens[index].type in types:
+        index += 1
+    return index
+
+
+def _docstring_end(tokens, index):
+    """Check whether a docstring statement starts at ``index``.
+
+    A docstring statement is a single, optionally parenthesized, plain or bytes
+    string literal, matching what DocstringRemover treats as a docstring.
+
+    Args:
+        tokens (list): The tokens.
+        index (int): Index of the first token of the statement.
+
+    Returns:
+        int: Index of the first token after the statement's line, or None if the
+            statement is not a docstring.
+
+    Raises:
+        None
+    """
+    parens = 0
+    while tokens[index].type == tokenize.OP and tokens[index].string == "(":
+        parens += 1
+        index += 1
+    token = tokens[index]
+    if token.type != tokenize.STRING:
+        return None
+    prefix = token.string[: len(token.string) - len(token.string.lstrip("rRbBuUfF"))]
+    if "f" in prefix.lower():
+        return None
+    index += 1
+    for _ in range(parens):
+        if tokens[index].type != tokenize.OP or tokens[index].string != ")":
+            return None
+        index += 1
+    if tokens[index].type == tokenize.COMMENT:
+        index += 1
+    if tokens[index].type == tokenize.OP and tokens[index].string == ";":
+        # DocstringRemover drops the whole line.
+        while tokens[index].type not in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            index += 1
+    if tokens[index].type == tokenize.NEWLINE:
+        return index + 1
+    if tokens[index].type == tokenize.ENDMARKER:
+        return index
+    return None
+
+
+def _keep(kept, tokens, start, stop, last_row):
+    """Append tokens to the comparable list.
+
+    Args:
+        kept (list): The comparable list.
+        tokens (list): The tokens.
+        start (int): Index of the first token to keep.
+        stop (int): Index after the last token to keep.
+        last_row (int): The last physical row whose text has been recorded.
+
+    Returns:
+        int: The updated last recorded row.
+
+    Raises:
+        None
+    """
+    for token in tokens[start:stop]:
+        if (
+            token.type not in (tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+            and token.start[0] > last_row
+        ):
+            kept.append((token.type, token.string, token.line))
+            last_row = token.end[0]
+        else:
+            kept.append((token.type, token.string))
+    return last_row
+
+
+def validate_only_docstrings_added_libcst(original_code, modified_code):
+    """Validate if only docstrings have been added or modified in the code.
+
+    This is the reference implementation: both sources are parsed with libcst,
+    stripped of docstrings and regenerated for comparison.
+
     Args:
         original_code (str): The original code to compare.
         modified_code (str): The modified code to compare.
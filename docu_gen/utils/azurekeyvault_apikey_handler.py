@@ -1,7 +1,9 @@
 from .apikey_handler import APIKeyHandler
 import os
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
+
+# Secret clients are reused per vault so the credential and its token are created
+# once per process.
+_secret_clients = {}
 
 
 # Handler for Azure Key Vault
@@ -23,8 +25,15 @@ class AzureKeyVaultAPIKeyHandler(APIKeyHandler):
             if not vault_url or not secret_name:
                 raise ValueError("Azure Key Vault URL or Secret Name not set.")
 
-            credential = DefaultAzureCredential()
-            client = SecretClient(vault_url=vault_url, credential=credential)
+            client = _secret_clients.get(vault_url)
+            if client is None:
+                # Imported here so runs that never reach Key Vault skip the Azure SDK.
+                from azure.identity import DefaultAzureCredential
+                from azure.keyvault.secrets import SecretClient
+
+                credential = DefaultAzureCredential()
+                client = SecretClient(vault_url=vault_url, credential=credential)
+                _secret_clients[vault_url] = client
             api_key = client.get_secret(secret_name).value
             if api_key:
                 print("API key retrieved from Azure Key Vault.")
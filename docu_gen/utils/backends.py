@@ -0,0 +1,418 @@
+import os
+import re
+import ast
+import json
+import textwrap
+from types import SimpleNamespace
+from .credentials import resolve_api_key
+from .tokens import estimate_tokens
+from docu_gen.core.constant import AI_MODEL, BACKENDS, CLIENT, PROMPT
+
+
+class Backend:
+    """A source of chat completions and the capabilities the generator respects."""
+
+    # Model used when none is given.
+    default_model_name = AI_MODEL.get("model_name")
+    # Upper bound for the requests in flight, or None to only use --concurrency.
+    max_concurrency = None
+    # Whether several targets can be packed into one JSON-mode request.
+    batching = True
+    # Whether requests count against an API quota paced with --rpm and --tpm.
+    rate_limited = True
+    # Whether responses can be streamed and abandoned once complete.
+    streaming = True
+
+    def __init__(self, base_url=None):
+        """Initialize the backend.
+
+        Args:
+            base_url (str, optional): The URL of the API. Defaults to None, which
+                uses the backend's default.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.base_url = base_url
+
+    def resolve_api_key(self, credential_provider=None):
+        """Return the API key the clients authenticate with.
+
+        Args:
+            credential_provider (callable, optional): Provider used instead of the
+                process-wide one. Defaults to None.
+
+        Returns:
+            str: The API key, or None if it could not be retrieved.
+
+        Raises:
+            None
+        """
+        return resolve_api_key(credential_provider)
+
+    def create_clients(self, api_key):
+        """Create the synchronous and asynchronous chat completion clients.
+
+        Args:
+            api_key (str): The API key the clients authenticate with.
+
+        Returns:
+            tuple: The synchronous and asynchronous clients.
+
+        Raises:
+            NotImplementedError: Must be implemented by subclasses.
+        """
+        raise NotImplementedError("Must implement create_clients method.")
+
+
+class OpenAIBackend(Backend):
+    """The OpenAI API, or any gateway serving it at another base URL."""
+
+    def create_clients(self, api_key):
+        """Create OpenAI clients with pooled keep-alive connections.
+
+        Args:
+            api_key (str): The API key the clients authenticate with.
+
+        Returns:
+            tuple: The synchronous and asynchronous clients.
+
+        Raises:
+            None
+        """
+        # Imported here so the backend registry does not load the OpenAI client.
+        import httpx
+        from openai import (
+            OpenAI,
+            AsyncOpenAI,
+            DefaultHttpxClient,
+            DefaultAsyncHttpxClient,
+        )
+
+        limits = httpx.Limits(
+            max_connections=CLIENT.get("max_connections"),
+            max_keepalive_connections=CLIENT.get("max_keepalive_connections"),
+            keepalive_expiry=CLIENT.get("keepalive_expiry_seconds"),
+        )
+        # Async retries are left to the request scheduler, which knows the quota.
+        return (
+            OpenAI(
+                api_key=api_key,
+                base_url=self.base_url,
+                http_client=DefaultHttpxClient(limits=limits),
+            ),
+            AsyncOpenAI(
+                api_key=api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(limits=limits),
+            ),
+        )
+
+
+class LocalBackend(OpenAIBackend):
+    """An OpenAI-compatible inference server, by default on localhost."""
+
+    default_model_name = BACKENDS["local"].get("model_name")
+    max_concurrency = BACKENDS["local"].get("max_concurrency")
+    # JSON mode is not supported by every local server.
+    batching = False
+    rate_limited = False
+
+    def __init__(self, base_url=None):
+        """Initialize the backend.
+
+        Args:
+            base_url (str, optional): The URL of the server. Defaults to the
+                local URL in BACKENDS.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        super().__init__(base_url or BACKENDS["local"].get("base_url"))
+
+    def resolve_api_key(self, credential_provider=None):
+        """Return the API key of the server, without querying Azure Key Vault.
+
+        Local servers usually accept any key, so a placeholder is used unless a
+        provider or OPENAI_API_KEY supplies one.
+
+        Args:
+            credential_provider (callable, optional): Provider of the key. Defaults
+                to None.
+
+        Returns:
+            str: The API key.
+
+        Raises:
+            None
+        """
+        if credential_provider:
+            return credential_provider()
+        return os.getenv("OPENAI_API_KEY") or "local"
+
+
+# Matches the "id: <id> (<code type>)" lines of a batched prompt.
+_BATCH_ID = re.compile(r"^id: (\S+) \((\w+)\)$", re.MULTILINE)
+
+
+class DeterministicBackend(Backend):
+    """Generates docstrings in-process from the prompt, without any network call.
+
+    The same prompt always gets the same docstring, which makes runs reproducible
+    in tests and benchmarks.
+    """
+
+    default_model_name = BACKENDS["deterministic"].get("model_name")
+    rate_limited = False
+
+    def resolve_api_key(self, credential_provider=None):
+        """Return a placeholder key; no credentials are needed.
+
+        Args:
+            credential_provider (callable, optional): Ignored.
+
+        Returns:
+            str: The placeholder key.
+
+        Raises:
+            None
+        """
+        return "deterministic"
+
+    def create_clients(self, api_key):
+        """Create in-process clients with the OpenAI chat completions interface.
+
+        Args:
+            api_key (str): Ignored.
+
+        Returns:
+            tuple: The synchronous and asynchronous clients.
+
+        Raises:
+            None
+        """
+
+        async def acreate(stream=False, stream_options=None, **request):
+            response = complete_deterministically(**request)
+            return DeterministicStream(response) if stream else response
+
+        return (
+            SimpleNamespace(
+                chat=SimpleNamespace(
+                    completions=SimpleNamespace(create=complete_deterministically)
+                )
+            ),
+            SimpleNamespace(
+                chat=SimpleNamespace(completions=SimpleNamespace(create=acreate))
+            ),
+        )
+
+
+def _deterministic_docstring(code_type, snippet):
+    """Build a docstring from a code snippet.
+
+    Args:
+        code_type (str): "class" or "function".
+        snippet (str): The code of the target.
+
+    Returns:
+        str: A class description, or a Google style docstring listing the
+            parameters of the function.
+
+    Raises:
+        None
+    """
+    if code_type == "class":
+        return "Represent the state handled by this class."
+    try:
+        node = ast.parse(textwrap.dedent(snippet).strip()).body[0]
+        arguments = node.args
+        parameters = [
+            argument.arg
+            for argument in arguments.posonlyargs
+            + arguments.args
+            + [arguments.vararg]
+            + arguments.kwonlyargs
+            + [arguments.kwarg]
+            if argument is not None and argument.arg not in ("self", "cls")
+        ]
+    except (SyntaxError, ValueError, IndexError, AttributeError):
+        parameters = []
+    lines = ["Do the work of this function.", "", "Args:"]
+    lines.extend(f"    {name}: The {name} argument." for name in parameters)
+    if not parameters:
+        lines.append("    None")
+    lines.extend(["", "Returns:", "    None", "", "Raises:", "    None"])
+    return "\n".join(lines)
+
+
+def complete_deterministically(messages, response_format=None, **request):
+    """Answer a chat completion request like the OpenAI API would.
+
+    Args:
+        messages (list): The chat messages built by the LLM.
+        response_format (dict, optional): {"type": "json_object"} for batched
+            requests, which are answered with a JSON object keyed by target id.
+        **request: The other request parameters, which are ignored.
+
+    Returns:
+        SimpleNamespace: An object with the "choices" and "usage" of a
+            ChatCompletion.
+
+    Raises:
+        None
+    """
+    prompt = "\n".join(message.get("content") or "" for message in messages)
+    user_message = messages[-1].get("content") or ""
+    if (response_format or {}).get("type") == "json_object":
+        snippets = user_message.split(PROMPT["batch_request"], 1)[-1]
+        sections = _BATCH_ID.split(
+            snippets.rsplit("\n\n" + PROMPT["batch_answer"], 1)[0]
+        )
+        content = json.dumps(
+            {
+                item_id: _deterministic_docstring(code_type, snippet)
+                for item_id, code_type, snippet in zip(
+                    sections[1::3], sections[2::3], sections[3::3]
+                )
+            }
+        )
+    else:
+        code_type = "class" if PROMPT["class_request"] in user_message else "function"
+        # The snippet follows the request and precedes the answer cue.
+        snippet = user_message.split(PROMPT[f"{code_type}_request"], 1)[-1]
+        snippet = snippet.rsplit("\n\n" + PROMPT["answer"], 1)[0]
+        content = _deterministic_docstring(code_type, snippet)
+    return SimpleNamespace(
+        choices=[
+            SimpleNamespace(
+                message=SimpleNamespace(content=content), finish_reason="stop"
+            )
+        ],
+        usage=SimpleNamespace(
+            prompt_tokens=estimate_tokens(prompt),
+            completion_tokens=estimate_tokens(content),
+            prompt_tokens_details=None,
+        ),
+    )
+
+
+class DeterministicStream:
+    """Streams a deterministic completion as chunks, like an OpenAI AsyncStream."""
+
+    def __init__(self, response, chunk_size=16):
+        """Initialize the stream.
+
+        Args:
+            response (SimpleNamespace): The completion to stream.
+            chunk_size (int, optional): Characters per chunk. Defaults to 16.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.response = response
+        self.chunk_size = chunk_size
+
+    async def __aiter__(self):
+        """Yield the content chunks, then a chunk with the usage.
+
+        Yields:
+            SimpleNamespace: Chunks with the "choices" and "usage" of a
+                ChatCompletionChunk.
+
+        Raises:
+            None
+        """
+        choice = self.response.choices[0]
+        content = choice.message.content
+        for start in range(0, len(content), self.chunk_size):
+            end = start + self.chunk_size
+            yield SimpleNamespace(
+                choices=[
+                    SimpleNamespace(
+                        delta=SimpleNamespace(content=content[start:end]),
+                        finish_reason=(
+                            choice.finish_reason if end >= len(content) else None
+                        ),
+                    )
+                ],
+                usage=None,
+            )
+        yield SimpleNamespace(choices=[], usage=self.response.usage)
+
+    async def close(self):
+        """Release the stream; nothing is held.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+
+
+# Backend classes keyed by model family.
+_backends = {
+    "openai": OpenAIBackend,
+    "local": LocalBackend,
+    "deterministic": DeterministicBackend,
+}
+
+
+def register_backend(model_family, backend_class):
+    """Make a backend available under a model family.
+
+    Args:
+        model_family (str): The name selecting the backend, e.g. with --backend.
+        backend_class (type): A Backend subclass.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    _backends[model_family] = backend_class
+
+
+def backend_names():
+    """Return the registered model families.
+
+    Returns:
+        list: The model families, sorted.
+
+    Raises:
+        None
+    """
+    return sorted(_backends)
+
+
+def get_backend(model_family, base_url=None):
+    """Create the backend of a model family.
+
+    Args:
+        model_family (str): The family of the model, e.g. "openai".
+        base_url (str, optional): The URL of the API. Defaults to None, which uses
+            the backend's default.
+
+    Returns:
+        Backend: The backend.
+
+    Raises:
+        ValueError: If the model family is not supported.
+    """
+    if model_family not in _backends:
+        raise ValueError(
+            f"Model family not supported. Allowed values: {backend_names()}"
+        )
+    return _backends[model_family](base_url)
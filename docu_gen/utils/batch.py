@@ -0,0 +1,128 @@
+import json
+import uuid
+
+
+def write_batch_requests(path, requests):
+    """Write chat-completion requests in the Batch API input format.
+
+    Args:
+        path (str): The JSONL file to write.
+        requests (iterable): (custom id, request body) tuples.
+
+    Returns:
+        int: The number of requests written.
+
+    Raises:
+        IOError: If the file cannot be written.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, body in requests:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            }
+            f.write(json.dumps(line) + "\n")
+            count += 1
+    return count
+
+
+def read_batch_results(path):
+    """Read the message contents from a Batch API output file.
+
+    Args:
+        path (str): The JSONL file returned by the batch service.
+
+    Returns:
+        dict: Message content keyed by custom id. Failed requests are left out.
+
+    Raises:
+        IOError: If the file cannot be read.
+        ValueError: If a line is not valid JSON.
+    """
+    results = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or response.get("status_code") != 200:
+                continue
+            choices = (response.get("body") or {}).get("choices") or []
+            content = choices[0].get("message", {}).get("content") if choices else None
+            if content:
+                results[result["custom_id"]] = content
+    return results
+
+
+class LocalBatchService:
+    """A file-based stand-in for the OpenAI Batch API."""
+
+    def __init__(self, respond):
+        """Initialize the service.
+
+        Args:
+            respond (callable): Function called with each request body that returns
+                the message content of the completion.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.respond = respond
+
+    def run(self, input_path, output_path):
+        """Answer every request of an input file and write the output file.
+
+        Args:
+            input_path (str): A JSONL file in the Batch API input format.
+            output_path (str): The JSONL file to write in the Batch API output format.
+
+        Returns:
+            int: The number of requests answered.
+
+        Raises:
+            IOError: If a file cannot be read or written.
+        """
+        count = 0
+        with open(input_path, "r", encoding="utf-8") as source, open(
+            output_path, "w", encoding="utf-8"
+        ) as target:
+            for line in source:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                body = request["body"]
+                completion = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "model": body.get("model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": self.respond(body),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+                result = {
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "request_id": uuid.uuid4().hex,
+                        "body": completion,
+                    },
+                    "error": None,
+                }
+                target.write(json.dumps(result) + "\n")
+                count += 1
+        return count
@@ -0,0 +1,82 @@
+import time
+from .env_apikey_handler import EnvAPIKeyHandler
+from .azurekeyvault_apikey_handler import AzureKeyVaultAPIKeyHandler
+from docu_gen.core.constant import CLIENT
+
+# Process-wide default provider and resolved keys, keyed by provider.
+_credential_provider = None
+_resolved_keys = {}
+
+
+def default_credential_provider():
+    """Retrieve the API key through the environment and Azure Key Vault handlers.
+
+    Returns:
+        str: The API key, or None if no handler could provide one.
+
+    Raises:
+        None
+    """
+    handler_chain = EnvAPIKeyHandler(successor=AzureKeyVaultAPIKeyHandler())
+    return handler_chain.handle()
+
+
+def set_credential_provider(provider):
+    """Replace the process-wide credential provider.
+
+    Args:
+        provider (callable): A function without arguments that returns the API key,
+            or None to restore the default handler chain.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    global _credential_provider
+    _credential_provider = provider
+    _resolved_keys.clear()
+
+
+def resolve_api_key(
+    credential_provider=None, ttl_seconds=CLIENT.get("api_key_ttl_seconds")
+):
+    """Return the API key, resolving it at most once per TTL.
+
+    Args:
+        credential_provider (callable, optional): Provider used instead of the
+            process-wide one. Defaults to None.
+        ttl_seconds (float, optional): How long a resolved key is reused.
+
+    Returns:
+        str: The API key, or None if the provider could not supply one. Failed
+            lookups are not cached.
+
+    Raises:
+        None
+    """
+    provider = (
+        credential_provider or _credential_provider or default_credential_provider
+    )
+    cached = _resolved_keys.get(provider)
+    now = time.monotonic()
+    if cached and now < cached[1]:
+        return cached[0]
+
+    api_key = provider()
+    if api_key:
+        _resolved_keys[provider] = (api_key, now + ttl_seconds)
+    return api_key
+
+
+def clear_api_key_cache():
+    """Forget every resolved API key so the next lookup queries the provider.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    _resolved_keys.clear()
@@ -0,0 +1,271 @@
+import io
+import os
+import time
+import sqlite3
+import hashlib
+import textwrap
+import tokenize
+from docu_gen.core.constant import CACHE, PROMPT_VERSION
+
+
+def normalize_snippet(code_snippet):
+    """Normalize a code snippet so formatting-only differences share a cache key.
+
+    Blank lines inside string literals are part of the code and are kept.
+
+    Args:
+        code_snippet (str): The code snippet to normalize.
+
+    Returns:
+        str: The snippet with unified line endings, no trailing whitespace, no blank
+            lines outside string literals and no common leading indentation.
+
+    Raises:
+        None
+    """
+    lines = code_snippet.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    code = textwrap.dedent("\n".join(line.rstrip() for line in lines))
+    inside_strings = _string_continuation_lines(code)
+    return "\n".join(
+        line
+        for number, line in enumerate(code.split("\n"), start=1)
+        if line or number in inside_strings
+    )
+
+
+def _string_continuation_lines(code):
+    """Find the lines of a snippet that continue a multi-line token.
+
+    Only string literals span several lines, so these are the lines whose
+    content belongs to a string.
+
+    Args:
+        code (str): The snippet.
+
+    Returns:
+        set: The 1-based numbers of the lines after the first line of every
+            multi-line token. If the snippet cannot be tokenized, every line is
+            returned so no blank line is removed.
+
+    Raises:
+        None
+    """
+    lines = set()
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            if token.end[0] > token.start[0]:
+                lines.update(range(token.start[0] + 1, token.end[0] + 1))
+    except (tokenize.TokenError, SyntaxError):
+        return set(range(1, code.count("\n") + 2))
+    return lines
+
+
+class DocstringCache:
+    """A persistent, content-addressed cache of generated docstrings."""
+
+    def __init__(
+        self,
+        path=CACHE.get("path"),
+        max_entries=CACHE.get("max_entries"),
+        max_age_days=CACHE.get("max_age_days"),
+        touch_batch=CACHE.get("touch_batch"),
+    ):
+        """Initialize the cache without opening the underlying database.
+
+        Args:
+            path (str, optional): Location of the SQLite database file.
+            max_entries (int, optional): Maximum number of entries kept on eviction.
+            max_age_days (int, optional): Entries unused for longer than this are
+                evicted.
+            touch_batch (int, optional): Number of cache hits whose last use is
+                kept in memory before it is written in one transaction.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.touch_batch = touch_batch
+        self._connection = None
+        # Time of the last hit of every key not yet written, keyed by key.
+        self._touched = {}
+
+    @staticmethod
+    def make_key(code_snippet, code_type, model_name, prompt_version=PROMPT_VERSION):
+        """Build the cache key for a generation request.
+
+        Args:
+            code_snippet (str): The code sent to the model.
+            code_type (str): The type of code snippet ("class", "method" or
+                "function").
+            model_name (str): The model used for generation.
+            prompt_version (str, optional): The version of the prompt template.
+
+        Returns:
+            str: A hex SHA-256 digest identifying the request.
+
+        Raises:
+            None
+        """
+        digest = hashlib.sha256()
+        for part in (
+            prompt_version,
+            model_name,
+            code_type,
+            normalize_snippet(code_snippet),
+        ):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _connect(self):
+        """Open the database on first use and create the schema if needed.
+
+        Returns:
+            sqlite3.Connection: The open connection.
+
+        Raises:
+            sqlite3.Error: If the database cannot be opened.
+        """
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS docstrings ("
+                "key TEXT PRIMARY KEY, docstring TEXT NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def get(self, key):
+        """Return the cached docstring for a key and mark it as recently used.
+
+        The last use is written with the others by ``flush``, at the latest after
+        ``touch_batch`` hits.
+
+        Args:
+            key (str): A key built with ``make_key``.
+
+        Returns:
+            str: The cached docstring, or None on a miss.
+
+        Raises:
+            sqlite3.Error: If the database cannot be read.
+        """
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT docstring FROM docstrings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time()
+        if len(self._touched) >= self.touch_batch:
+            self.flush()
+        return row[0]
+
+    def flush(self):
+        """Write the last use of the keys hit since the previous flush.
+
+        Returns:
+            None
+
+        Raises:
+            sqlite3.Error: If the database cannot be written.
+        """
+        if not self._touched or self._connection is None:
+            return
+        self._connection.executemany(
+            "UPDATE docstrings SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._touched.items()],
+        )
+        self._connection.commit()
+        self._touched = {}
+
+    def set(self, key, docstring):
+        """Store a generated docstring.
+
+        Args:
+            key (str): A key built with ``make_key``.
+            docstring (str): The docstring to store.
+
+        Returns:
+            None
+
+        Raises:
+            sqlite3.Error: If the database cannot be written.
+        """
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            "INSERT OR REPLACE INTO docstrings (key, docstring, created_at, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            (key, docstring, now, now),
+        )
+        connection.commit()
+
+    def evict(self):
+        """Remove entries that are too old or exceed the size limit.
+
+        Entries unused for more than ``max_age_days`` are removed first, then the
+        least recently used entries beyond ``max_entries``.
+
+        Returns:
+            int: The number of entries removed.
+
+        Raises:
+            sqlite3.Error: If the database cannot be written.
+        """
+        connection = self._connect()
+        self.flush()
+        removed = 0
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            removed += connection.execute(
+                "DELETE FROM docstrings WHERE last_used < ?", (cutoff,)
+            ).rowcount
+        if self.max_entries:
+            removed += connection.execute(
+                "DELETE FROM docstrings WHERE key NOT IN ("
+                "SELECT key FROM docstrings ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            ).rowcount
+        connection.commit()
+        return removed
+
+    def compact(self):
+        """Evict stale entries and reclaim the space they used on disk.
+
+        Returns:
+            int: The number of entries removed.
+
+        Raises:
+            sqlite3.Error: If the database cannot be written.
+        """
+        removed = self.evict()
+        connection = self._connect()
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("VACUUM")
+        return removed
+
+    def close(self):
+        """Write the pending last uses and close the database connection if it is
+        open.
+
+        Returns:
+            None
+
+        Raises:
+            sqlite3.Error: If the pending last uses cannot be written.
+        """
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
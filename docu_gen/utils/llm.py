@@ -1,63 +1,159 @@
-from openai import OpenAI
+import json
 from docu_gen.examples import python
-from .env_apikey_handler import EnvAPIKeyHandler
-from .azurekeyvault_apikey_handler import AzureKeyVaultAPIKeyHandler
+from .backends import get_backend
+from .tokens import estimate_tokens
 import sys
-from docu_gen.core.constant import AI_MODEL
+from docu_gen.core.constant import AI_MODEL, OUTPUT_BUDGET, PROMPT
+
+# Clients shared by every LLM in the process, keyed by model family, base URL and
+# API key.
+_shared_clients = {}
+
+
+def get_shared_clients(backend, api_key):
+    """Return the process-wide synchronous and asynchronous clients of a backend.
+
+    The clients are created on first use and keep their pooled keep-alive
+    connections for the lifetime of the process.
+
+    Args:
+        backend (Backend): The backend creating the clients.
+        api_key (str): The API key the clients authenticate with.
+
+    Returns:
+        tuple: The synchronous and asynchronous clients.
+
+    Raises:
+        None
+    """
+    key = (type(backend), backend.base_url, api_key)
+    if key not in _shared_clients:
+        _shared_clients[key] = backend.create_clients(api_key)
+    return _shared_clients[key]
+
+
+def read_usage(response, usage):
+    """Copy the token counts of a response into a dict.
+
+    Args:
+        response (ChatCompletion): The API response.
+        usage (dict): Receives "prompt_tokens", "completion_tokens" and
+            "cached_tokens". Nothing is recorded when it is None.
+
+    Returns:
+        None
+
+    Raises:
+        None
+    """
+    if usage is None or response.usage is None:
+        return
+    details = getattr(response.usage, "prompt_tokens_details", None)
+    usage["prompt_tokens"] = response.usage.prompt_tokens or 0
+    usage["completion_tokens"] = response.usage.completion_tokens or 0
+    usage["cached_tokens"] = (details and details.cached_tokens) or 0
+
+
+def find_docstring_end(content):
+    """Find where the docstring of a model response ends.
+
+    Models often wrap the docstring in triple quotes and then repeat the
+    signature or the body of the code; everything after the closing quotes is
+    not part of the docstring.
+
+    Args:
+        content (str): The response, complete or received so far.
+
+    Returns:
+        int: The position just after the closing triple quotes, or None if the
+            response has no complete quoted docstring yet.
+
+    Raises:
+        None
+    """
+    starts = [
+        (content.find(quotes), quotes) for quotes in ('"""', "'''") if quotes in content
+    ]
+    if not starts:
+        return None
+    start, quotes = min(starts)
+    end = content.find(quotes, start + 3)
+    return None if end == -1 else end + 3
+
+
+def is_truncated(content, finish_reason):
+    """Check whether the output token limit cut a docstring short.
+
+    A response cut short after the closing quotes of its docstring still holds
+    the whole docstring.
+
+    Args:
+        content (str): The response.
+        finish_reason (str): The finish reason of the response.
+
+    Returns:
+        bool: True if the limit was reached before the docstring was complete.
+
+    Raises:
+        None
+    """
+    return finish_reason == "length" and find_docstring_end(content or "") is None
 
 
 class LLM:
     """A class that represents a Language Model (LLM)."""
 
-    # TODO: allow user to specify model_name and model_family
     def __init__(
         self,
-        model_name=AI_MODEL.get("model_name"),
+        model_name=None,
         model_family=AI_MODEL.get("model_family"),
+        credential_provider=None,
+        base_url=None,
     ):
         """Initialize a Model object with the specified model name and model family.
 
         Args:
-            model_name (str): The name of the model. Defaults to "gpt-3.5-turbo".
-            model_family (str): The family to which the model belongs. Defaults to "openai".
+            model_name (str, optional): The name of the model. Defaults to the default model of the backend, "gpt-3.5-turbo" for "openai".
+            model_family (str): The family to which the model belongs, which selects the backend. Defaults to "openai".
+            credential_provider (callable, optional): Function returning the API key, used instead of the environment and Azure Key Vault handlers. Defaults to None.
+            base_url (str, optional): The URL of the API. Defaults to None, which uses the backend's default.
 
         Returns:
             None
 
         Raises:
-            None
+            ValueError: If the model family is not supported.
         """
-        self.model_name = model_name
+        self.backend = get_backend(model_family, base_url)
+        self.model_name = model_name or self.backend.default_model_name
         self.model_family = model_family
+        self.credential_provider = credential_provider
+        self.client = None
+        self.async_client = None
 
     def initialize_client(self):
-        """Initialize the GPT client.
+        """Attach the process-wide synchronous and asynchronous clients.
+
+        The API key is resolved at most once per TTL and the clients are shared by
+        every LLM of the same backend in the process.
 
         Returns:
             None
 
         Raises:
-            ValueError: If the model family is not supported.
+            None
         """
-        handler_chain = EnvAPIKeyHandler(successor=AzureKeyVaultAPIKeyHandler())
-
-        api_key = handler_chain.handle()
+        api_key = self.backend.resolve_api_key(self.credential_provider)
         if not api_key:
             print(
                 "Failed to retrieve the OpenAI API key from any source.",
                 file=sys.stderr,
             )
             sys.exit(1)
-        if self.model_family == "openai":
-            self.client = OpenAI(
-                api_key=api_key,
-            )
-        else:
-            raise ValueError("Model family not supported. Allowed values: ['openai']")
+        self.client, self.async_client = get_shared_clients(self.backend, api_key)
 
-    def generate_docstring(self, code_snippet, code_type):
-        """Perform generation of a docstring based on the provided code snippet and
-        type.
+    def build_messages(self, code_snippet, code_type):
+        """Build the chat messages used to request a docstring.
 
         Args:
             self: The object instance.
@@ -65,10 +161,10 @@ class LLM:
             code_type (str): The type of code snippet, either "class" or "function".
 
         Returns:
-            str: The generated docstring for the code snippet.
+            list: The system and user messages for the chat completion.
 
         Raises:
-            Exception: If an error occurs during the docstring generation process.
+            None
         """
         if code_type == "class":
             examples = python.CLASS_EXAMPLE
@@ -80,9 +176,7 @@ class LLM:
             )
             user_message = (
                 f"Here is an example of a class with its docstring:\n{examples}\n\n"
-                f"Now, please generate a docstring for the following class, including only the description. "
-                f"Do not include any attributes or methods. "
-                f"Do not include the class signature in the docstring.\n\n{code_snippet}\n\nDocstring:"
+                f"{PROMPT['class_request']}\n\n{code_snippet}\n\n{PROMPT['answer']}"
             )
         else:
             examples = python.FUNCTION_EXAMPLE
@@ -94,13 +188,10 @@ class LLM:
             )
             user_message = (
                 f"Here is an example of a function with its docstring:\n{examples}\n\n"
-                f"Now, please generate a docstring for the following code, including parameter "
-                f"descriptions, return types, and any raises clauses. "
-                f"Do not include the function signature in the docstring. "
-                f"Ensure the docstring adheres to PEP 257 conventions.\n\n{code_snippet}\n\nDocstring:"
+                f"{PROMPT['function_request']}\n\n{code_snippet}\n\n{PROMPT['answer']}"
             )
 
-        messages = [
+        return [
             {
                 "role": "system",
                 "content": system_message,
@@ -111,23 +202,241 @@ class LLM:
             },
         ]
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
+    def build_batch_messages(self, items):
+        """Build the chat messages used to request several docstrings at once.
+
+        The system message and the examples are sent once for the whole batch and
+        the model is asked for a JSON object mapping each id to its docstring.
+
+        Args:
+            self: The object instance.
+            items (list): (id, code snippet, code type) tuples.
+
+        Returns:
+            list: The system and user messages for the chat completion.
+
+        Raises:
+            None
+        """
+        system_message = (
+            "You are an expert Python developer. Write docstrings for several pieces of code at once. "
+            "For functions and methods, write clear and comprehensive docstrings in the Google style guide "
+            "format, including descriptions of parameters, return values, and any exceptions raised. "
+            "For classes, write only a concise description of what the class represents or does, "
+            "without any attributes or methods. "
+            "Follow PEP 257 conventions and do not include signatures or quotes in the docstrings. "
+            "Reply with a JSON object that maps each id to its docstring."
+        )
+        examples = f"Here is an example of a function with its docstring:\n{python.FUNCTION_EXAMPLE}\n\n"
+        if any(code_type == "class" for _, _, code_type in items):
+            examples += f"Here is an example of a class with its docstring:\n{python.CLASS_EXAMPLE}\n\n"
+        snippets = "\n\n".join(
+            f"id: {item_id} ({code_type})\n{code_snippet}"
+            for item_id, code_snippet, code_type in items
+        )
+        user_message = (
+            f"{examples}{PROMPT['batch_request']}"
+            f"\n\n{snippets}\n\n{PROMPT['batch_answer']}"
+        )
+        return [
+            {
+                "role": "system",
+                "content": system_message,
+            },
+            {
+                "role": "user",
+                "content": user_message,
+            },
+        ]
+
+    def clean_docstring(self, content):
+        """Strip trailing code, stray signatures and quotes from a model response.
+
+        Args:
+            self: The object instance.
+            content (str): The raw message content returned by the model.
+
+        Returns:
+            str: The cleaned docstring text.
+
+        Raises:
+            None
+        """
+        end = find_docstring_end(content)
+        if end is not None:
+            content = content[:end]
+        docstring = content.strip()
+        lines = docstring.split("\n")
+        filtered_lines = [
+            line for line in lines if not line.strip().startswith(("def ", "class "))
+        ]
+        docstring = "\n".join(filtered_lines).strip()
+        docstring = docstring.strip('"').strip("'").strip()
+        return docstring
+
+    def generate_docstring(self, code_snippet, code_type):
+        """Perform generation of a docstring based on the provided code snippet and
+        type.
+
+        Args:
+            self: The object instance.
+            code_snippet (str): The code snippet for which the docstring needs to be generated.
+            code_type (str): The type of code snippet, either "class" or "function".
+
+        Returns:
+            str: The generated docstring for the code snippet.
+
+        Raises:
+            openai.OpenAIError: If the request fails.
+        """
+        messages = self.build_messages(code_snippet, code_type)
+        response = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=messages,
+            max_tokens=OUTPUT_BUDGET.get("max_tokens"),
+            temperature=0,
+        )
+        return self.clean_docstring(response.choices[0].message.content)
+
+    async def agenerate_docstring(
+        self,
+        code_snippet,
+        code_type,
+        usage=None,
+        model_name=None,
+        max_tokens=OUTPUT_BUDGET.get("max_tokens"),
+        stream=False,
+    ):
+        """Asynchronously generate a docstring using the async client.
+
+        Args:
+            self: The object instance.
+            code_snippet (str): The code snippet for which the docstring needs to be generated.
+            code_type (str): The type of code snippet, either "class" or "function".
+            usage (dict, optional): Receives the token counts, the "finish_reason" of the response and whether its docstring was "truncated".
+            model_name (str, optional): The model used instead of the LLM's own. Defaults to None.
+            max_tokens (int, optional): The output token limit. Defaults to OUTPUT_BUDGET["max_tokens"].
+            stream (bool, optional): Stream the response and stop reading it once a complete quoted docstring has arrived. Defaults to False.
+
+        Returns:
+            str: The generated docstring for the code snippet.
+
+        Raises:
+            openai.OpenAIError: If the request fails. Errors are not retried here so
+                the caller's scheduler can decide.
+        """
+        messages = self.build_messages(code_snippet, code_type)
+        if stream:
+            response = await self.async_client.chat.completions.create(
+                model=model_name or self.model_name,
                 messages=messages,
-                max_tokens=1000,
+                max_tokens=max_tokens,
                 temperature=0,
+                stream=True,
+                stream_options={"include_usage": True},
             )
-            docstring = response.choices[0].message.content.strip()
-            lines = docstring.split("\n")
-            filtered_lines = [
-                line
-                for line in lines
-                if not line.strip().startswith(("def ", "class "))
-            ]
-            docstring = "\n".join(filtered_lines).strip()
-            docstring = docstring.strip('"').strip("'")
-            return docstring
-        except Exception as e:
-            print(f"Error generating docstring: {e}")
-            return "Unable to generate docstring."
+            content = await self._read_stream(response, messages, usage)
+            return self.clean_docstring(content)
+        response = await self.async_client.chat.completions.create(
+            model=model_name or self.model_name,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0,
+        )
+        read_usage(response, usage)
+        content = response.choices[0].message.content
+        if usage is not None:
+            usage["finish_reason"] = getattr(response.choices[0], "finish_reason", None)
+            usage["truncated"] = is_truncated(content, usage["finish_reason"])
+        return self.clean_docstring(content)
+
+    async def _read_stream(self, response, messages, usage=None):
+        """Read a streamed response until it ends or its docstring is complete.
+
+        A response abandoned early reports no usage, so its token counts are
+        estimated and its finish reason is "early".
+
+        Args:
+            self: The object instance.
+            response (AsyncStream): The streamed chat completion chunks.
+            messages (list): The messages of the request.
+            usage (dict, optional): Receives the token counts, the "finish_reason" of the response and whether its docstring was "truncated".
+
+        Returns:
+            str: The content received.
+
+        Raises:
+            openai.OpenAIError: If the stream fails.
+        """
+        parts = []
+        finish_reason = None
+        try:
+            async for chunk in response:
+                read_usage(chunk, usage)
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        parts.append(choice.delta.content)
+                    finish_reason = choice.finish_reason or finish_reason
+                # Only a chunk with a quote can complete the docstring.
+                if (
+                    finish_reason is None
+                    and parts
+                    and ('"' in parts[-1] or "'" in parts[-1])
+                    and find_docstring_end("".join(parts)) is not None
+                ):
+                    finish_reason = "early"
+                    break
+        finally:
+            await response.close()
+        content = "".join(parts)
+        if usage is not None:
+            if finish_reason == "early" or not usage:
+                usage["prompt_tokens"] = sum(
+                    estimate_tokens(message["content"]) for message in messages
+                )
+                usage["completion_tokens"] = estimate_tokens(content)
+                usage["cached_tokens"] = 0
+            usage["finish_reason"] = finish_reason
+            usage["truncated"] = is_truncated(content, finish_reason)
+        return content
+
+    async def agenerate_docstrings(
+        self, items, max_tokens, usage=None, model_name=None
+    ):
+        """Asynchronously generate docstrings for several snippets in one request.
+
+        Args:
+            self: The object instance.
+            items (list): (id, code snippet, code type) tuples.
+            max_tokens (int): The output token limit for the whole response.
+            usage (dict, optional): Receives the token counts of the response.
+            model_name (str, optional): The model used instead of the LLM's own. Defaults to None.
+
+        Returns:
+            dict: Docstrings keyed by id. Ids missing from the response, or for which
+                the response could not be parsed, are left out.
+
+        Raises:
+            openai.OpenAIError: If the request fails.
+        """
+        messages = self.build_batch_messages(items)
+        response = await self.async_client.chat.completions.create(
+            model=model_name or self.model_name,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=0,
+            response_format={"type": "json_object"},
+        )
+        read_usage(response, usage)
+        try:
+            content = json.loads(response.choices[0].message.content)
+        except (TypeError, ValueError) as e:
+            print(f"Unable to parse batched docstrings: {e}")
+            return {}
+        if not isinstance(content, dict):
+            return {}
+        return {
+            str(item_id): self.clean_docstring(docstring)
+            for item_id, docstring in content.items()
+            if isinstance(docstring, str) and docstring.strip()
+        }
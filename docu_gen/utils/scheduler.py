@@ -0,0 +1,359 @@
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from docu_gen.core.constant import RATE_LIMIT
+
+
+class TokenBucket:
+    """A token bucket that refills continuously up to a per-minute rate."""
+
+    def __init__(self, rate_per_minute):
+        """Initialize a full bucket.
+
+        Args:
+            rate_per_minute (float): Tokens added per minute, which is also the
+                bucket's capacity.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self._rate = self.capacity / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        """Add the tokens accumulated since the last update.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+    async def acquire(self, amount=1):
+        """Wait until the bucket holds ``amount`` tokens and take them.
+
+        Args:
+            amount (float, optional): The number of tokens to take. Amounts above the
+                capacity are capped to it. Defaults to 1.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        amount = min(float(amount), self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self._rate)
+
+
+class RequestScheduler:
+    """Runs LLM requests within rate limits, retrying throttled ones.
+
+    When every slot is taken, the waiting request with the most estimated tokens
+    gets the next free one, so the longest requests of all files in flight start
+    first and short ones fill the gaps.
+    """
+
+    def __init__(
+        self,
+        max_concurrency,
+        requests_per_minute=RATE_LIMIT.get("requests_per_minute"),
+        tokens_per_minute=RATE_LIMIT.get("tokens_per_minute"),
+        max_retries=RATE_LIMIT.get("max_retries"),
+        is_retryable=None,
+        is_throttled=None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency (int): Upper bound for the number of requests in flight.
+            requests_per_minute (float, optional): Request quota, or None for no limit.
+            tokens_per_minute (float, optional): Token quota, or None for no limit.
+            max_retries (int, optional): Retries of a throttled request before giving up.
+            is_retryable (callable, optional): Function that tells whether an error
+                is transient. Defaults to retrying 408, 409, 429 and 5xx responses,
+                timeouts and connection errors.
+            is_throttled (callable, optional): Function that tells whether a
+                transient error is rate limiting, which lowers the concurrency
+                limit and pauses every request. Other transient errors only delay
+                the failed request. Defaults to 429 responses and responses with a
+                Retry-After header.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.max_retries = max_retries
+        self.is_retryable = is_retryable or is_retryable_error
+        self.is_throttled = is_throttled or is_throttling_error
+        self._request_bucket = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self._token_bucket = (
+            TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+        self._in_flight = 0
+        # (-estimated tokens, arrival, future) of the requests waiting for a slot.
+        self._waiters = []
+        self._arrivals = itertools.count()
+        self._paused_until = 0.0
+        self._latency = None
+
+    async def run(self, request, estimated_tokens=0):
+        """Run a request once a slot and quota are available, retrying on throttling.
+
+        Args:
+            request (callable): Function without arguments returning the awaitable
+                to run. It is called again for every attempt.
+            estimated_tokens (int, optional): Prompt plus completion tokens the
+                request is expected to use. Defaults to 0.
+
+        Returns:
+            object: The result of the request.
+
+        Raises:
+            Exception: The last error, when it is not transient or the retries are
+                exhausted.
+        """
+        attempt = 0
+        delay = 0.0
+        while True:
+            if delay:
+                # Only this request backs off after a server fault.
+                await asyncio.sleep(delay)
+            await self._acquire_slot(estimated_tokens)
+            try:
+                await self._wait_for_quota(estimated_tokens)
+                started = time.monotonic()
+                result = await request()
+            except Exception as e:
+                if not self.is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._on_retryable_error(e, attempt)
+                attempt += 1
+                continue
+            finally:
+                self._release_slot()
+            self._on_success(time.monotonic() - started)
+            return result
+
+    async def _acquire_slot(self, estimated_tokens=0):
+        """Wait until fewer requests than the current limit are in flight.
+
+        Args:
+            estimated_tokens (int, optional): Tokens the request is expected to
+                use; larger requests are handed a free slot first. Defaults to 0.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if not self._waiters and self._in_flight < int(self.limit):
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (-estimated_tokens, next(self._arrivals), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # A slot handed over just before the cancellation is given back.
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        """Free a slot and hand the free slots to the largest waiting requests.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        """Hand free slots to waiting requests, largest first.
+
+        The slot is taken on the waiter's behalf, so no request arriving before
+        the waiter resumes can take it.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        while self._waiters and self._in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def _wait_for_quota(self, estimated_tokens):
+        """Wait out any backoff pause, then take from the rate limit buckets.
+
+        Args:
+            estimated_tokens (int): Tokens the request is expected to use.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        delay = self._paused_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self._paused_until - time.monotonic()
+        if self._request_bucket is not None:
+            await self._request_bucket.acquire(1)
+        if self._token_bucket is not None and estimated_tokens:
+            await self._token_bucket.acquire(estimated_tokens)
+
+    def _on_success(self, latency):
+        """Grow the concurrency limit additively, or shrink it on a latency spike.
+
+        Args:
+            latency (float): Duration of the request in seconds.
+
+        Returns:
+            None
+
+        Raises:
+            None
+        """
+        if (
+            self._latency is not None
+            and latency > RATE_LIMIT.get("latency_spike_factor") * self._latency
+        ):
+            self.limit = max(1.0, self.limit * RATE_LIMIT.get("latency_backoff_factor"))
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._wake_waiters()
+        self._latency = (
+            latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        )
+
+    def _on_retryable_error(self, error, attempt):
+        """Back off before the next attempt of a request that failed transiently.
+
+        The delay honours the server's ``Retry-After`` header when present and
+        otherwise grows exponentially with full jitter. Rate limiting halves the
+        concurrency limit and pauses all requests for the delay; any other
+        transient error, e.g. a 5xx response or a timeout, only delays the failed
+        request and leaves the limit alone.
+
+        Args:
+            error (Exception): The transient error.
+            attempt (int): Number of retries already made for the request.
+
+        Returns:
+            float: The delay the request waits for on its own before its next
+                attempt; 0 when all requests are paused instead.
+
+        Raises:
+            None
+        """
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(
+                0,
+                min(
+                    RATE_LIMIT.get("max_delay_seconds"),
+                    RATE_LIMIT.get("base_delay_seconds") * 2**attempt,
+                ),
+            )
+        if not self.is_throttled(error):
+            print(f"Request failed ({error}); retrying in {delay:.1f}s.")
+            return delay
+        self.limit = max(1.0, self.limit / 2)
+        print(f"Request throttled ({error}); retrying in {delay:.1f}s.")
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return 0.0
+
+
+def retry_after(error):
+    """Read the delay requested by the server from an error's response headers.
+
+    Args:
+        error (Exception): The error raised by the client.
+
+    Returns:
+        float: The delay in seconds, or None if the server did not request one.
+
+    Raises:
+        None
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def is_retryable_error(error):
+    """Tell whether an error is transient and the request is worth retrying.
+
+    Args:
+        error (Exception): The error raised by the client.
+
+    Returns:
+        bool: True for 408, 409, 429 and 5xx responses, timeouts and connection
+            errors.
+
+    Raises:
+        None
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in (408, 409, 429) or status_code >= 500
+    return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(
+        error
+    ).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def is_throttling_error(error):
+    """Tell whether an error means the client exceeds the server's rate limits.
+
+    Args:
+        error (Exception): A transient error raised by the client.
+
+    Returns:
+        bool: True for 429 responses and responses asking to retry after a
+            delay.
+
+    Raises:
+        None
+    """
+    return getattr(error, "status_code", None) == 429 or retry_after(error) is not None
@@ -0,0 +1,22 @@
+import re
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Estimate the number of model tokens in a text without a tokenizer.
+
+    Words and punctuation marks count as one token each, with long words counted
+    as one token per eight characters, which slightly overestimates the tokenizer
+    used by OpenAI models for source code.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The estimated token count.
+
+    Raises:
+        None
+    """
+    return sum(1 + len(token) // 8 for token in _TOKEN_PATTERN.findall(text))
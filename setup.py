@@ -12,12 +12,10 @@ setup(
     license="MIT",
     packages=find_packages(),
     install_requires=[
-        "astor>=0.8.1,<0.9.0",
         "libcst>=1.4.0,<2.0.0",
         "openai>=1.52.1,<2.0.0",
         "azure-identity>=1.7.0,<2.0.0",
         "azure-keyvault-secrets>=4.2.0,<5.0.0",
-        "azure-storage-blob>=12.8.0,<13.0.0",
     ],
     entry_points={
         "console_scripts": [
@@ -30,5 +28,5 @@ setup(
         "Topic :: Software Development :: Code Generators",
         "License :: OSI Approved :: MIT License",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.9",
 )
@@ -0,0 +1,57 @@
+import os
+import glob
+import shutil
+import libcst as cst
+import pytest
+from docu_gen.core.docstring_remover import DocstringRemover
+from docu_gen.core.generator import DocstringGenerator
+from docu_gen.utils import backends
+from docu_gen.utils.llm import LLM
+
+EXAMPLE_PROJECT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "example_project"
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Copy example_project without its docstrings into a temporary directory."""
+    directory = tmp_path / "project"
+    directory.mkdir()
+    for path in sorted(glob.glob(os.path.join(EXAMPLE_PROJECT, "*.py"))):
+        target = directory / os.path.basename(path)
+        shutil.copyfile(path, target)
+        source_code = target.read_text(encoding="utf-8")
+        if source_code.strip():
+            module = cst.parse_module(source_code).visit(DocstringRemover())
+            target.write_text(module.code, encoding="utf-8")
+    return directory
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    """Record every request answered by the deterministic backend."""
+    calls = []
+    complete = backends.complete_deterministically
+
+    def record(**request):
+        calls.append(request)
+        return complete(**request)
+
+    monkeypatch.setattr(backends, "complete_deterministically", record)
+    return calls
+
+
+@pytest.fixture
+def make_generator():
+    """Build generators using the deterministic backend, closed after the test."""
+    generators = []
+
+    def make(**options):
+        generator = DocstringGenerator(llm=LLM(model_family="deterministic"), **options)
+        generators.append(generator)
+        return generator
+
+    yield make
+    for generator in generators:
+        generator.close()
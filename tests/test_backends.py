@@ -0,0 +1,32 @@
+import json
+from docu_gen.utils.backends import complete_deterministically
+from docu_gen.utils.llm import LLM
+
+# The code mentions the words the prompt ends with.
+FUNCTION = 'def f(a, *, b):\n    return "PEP 257 conventions.\\n\\nDocstring:"\n'
+CLASS = "class A:\n    pass\n"
+
+
+def complete(messages, **request):
+    return complete_deterministically(messages, **request).choices[0].message.content
+
+
+def test_single_prompts():
+    llm = LLM(model_family="deterministic")
+    docstring = complete(llm.build_messages(FUNCTION, "function"))
+    assert "    a: The a argument." in docstring
+    assert "    b: The b argument." in docstring
+    assert complete(llm.build_messages(CLASS, "class")) == (
+        "Represent the state handled by this class."
+    )
+
+
+def test_batch_prompt():
+    llm = LLM(model_family="deterministic")
+    messages = llm.build_batch_messages(
+        [("0", FUNCTION, "function"), ("1", CLASS, "class")]
+    )
+    docstrings = json.loads(complete(messages, response_format={"type": "json_object"}))
+    assert sorted(docstrings) == ["0", "1"]
+    assert docstrings["0"] == complete(llm.build_messages(FUNCTION, "function"))
+    assert docstrings["1"] == complete(llm.build_messages(CLASS, "class"))
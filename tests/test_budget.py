@@ -0,0 +1,111 @@
+import pytest
+from docu_gen.core.budget import OutputBudget
+from docu_gen.core.docstring_adder import DocstringTarget
+from docu_gen.utils.tokens import estimate_tokens
+
+SETTINGS = {
+    "max_tokens": 1000,
+    "min_tokens": 10,
+    "class_tokens": 50,
+    "function_tokens": 100,
+    "tokens_per_parameter": 10,
+    "tokens_per_raise": 20,
+    "tokens_per_snippet_token": 0,
+    "headroom": 1.0,
+    "min_samples": 4,
+    "max_samples": 8,
+}
+
+FUNCTION = "def f(a, b):\n    raise ValueError(a)\n"
+
+
+def test_predict_estimates_until_enough_samples():
+    budget = OutputBudget(SETTINGS)
+    limit, group = budget.predict(FUNCTION, "function")
+    assert limit == 100 + 2 * 10 + 20
+    assert budget.predict("class A:\n    pass\n", "class")[0] == 50
+    # The limit stays within the bounds.
+    assert budget.predict(FUNCTION, "function", max_tokens=60)[0] == 60
+    assert budget.predict(FUNCTION, "function", max_tokens=5)[0] == 5
+    floor = OutputBudget(dict(SETTINGS, min_tokens=500))
+    assert floor.predict(FUNCTION, "function")[0] == 500
+
+    for tokens in (30, 40, 50):
+        budget.observe(group, tokens)
+    assert budget.predict(FUNCTION, "function")[0] == 140
+    budget.observe(group, 200)
+    # The 95th percentile of the samples, with headroom.
+    assert budget.predict(FUNCTION, "function")[0] == 200
+    headroom = OutputBudget(dict(SETTINGS, headroom=1.5))
+    for tokens in (30, 40, 50, 60):
+        headroom.observe(group, tokens)
+    assert headroom.predict(FUNCTION, "function")[0] == 90
+
+
+def test_groups_and_sample_window():
+    budget = OutputBudget(SETTINGS)
+    _, group = budget.predict(FUNCTION, "function")
+    _, other = budget.predict("def g(a):\n    return a\n", "function")
+    assert group != other
+    for tokens in [500] * 4 + [20] * 8:
+        budget.observe(group, tokens)
+    # Only the most recent max_samples completions are kept.
+    assert budget.predict(FUNCTION, "function")[0] == 20
+    assert budget.predict("def g(a):\n    return a\n", "function")[0] == 110
+
+
+def make_target(code=FUNCTION):
+    return DocstringTarget(0, "f", "function", code)
+
+
+@pytest.fixture
+def responses(make_generator, monkeypatch):
+    """A generator whose responses are scripted, and the limits it requested."""
+    generator = make_generator(dedup=False)
+    script = []
+    limits = []
+
+    async def respond(code_snippet, usage=None, max_tokens=None, **kwargs):
+        limits.append(max_tokens)
+        docstring, reported = script.pop(0)
+        usage.update(reported)
+        return docstring
+
+    monkeypatch.setattr(generator.llm, "agenerate_docstring", respond)
+    return generator, script, limits
+
+
+def test_truncated_response_is_requested_with_the_full_limit(responses):
+    generator, script, limits = responses
+    predicted, group = generator.budget.predict(FUNCTION, "function")
+    script.extend(
+        [
+            ("Cut", {"completion_tokens": predicted, "truncated": True}),
+            ("Complete.", {"completion_tokens": 123, "truncated": False}),
+        ]
+    )
+    assert generator.generate([make_target()]) == {0: "Complete."}
+    assert limits == [predicted, 1000]
+    # The completion of the retry is observed with the backend's count.
+    assert list(generator.budget._samples[group]) == [123]
+
+
+def test_completion_length_is_estimated_without_usage(responses):
+    generator, script, limits = responses
+    _, group = generator.budget.predict(FUNCTION, "function")
+    script.append(("A complete docstring.", {"truncated": False}))
+    generator.generate([make_target()])
+    assert len(limits) == 1
+    assert list(generator.budget._samples[group]) == [
+        estimate_tokens("A complete docstring.")
+    ]
+
+
+def test_truncated_response_at_the_full_limit_is_not_retried(responses):
+    generator, script, limits = responses
+    script.append(("Cut", {"completion_tokens": 1000, "truncated": True}))
+    target = make_target()
+    target.tier = {"max_tokens": 10}
+    assert generator.generate([target]) == {0: "Cut"}
+    assert limits == [10]
+    assert not generator.budget._samples
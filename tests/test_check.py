@@ -0,0 +1,100 @@
+import json
+import subprocess
+import sys
+import libcst as cst
+import pytest
+from docu_gen.core.check import build_check_report, check_file, check_files
+from docu_gen.core.docstring_adder import plan_docstrings
+
+CODE = '''def documented():
+    """Doc."""
+
+
+def concatenated():
+    "a" "b"
+
+
+def one_line(): "doc"
+
+
+def missing(): return 1
+
+
+class Missing:
+    def method(self):
+        pass
+'''
+
+
+def write(directory, name, code):
+    path = directory / name
+    path.write_text(code, encoding="utf-8")
+    return str(path)
+
+
+def run_check(*args):
+    return subprocess.run(
+        [sys.executable, "-m", "docu_gen", "--check", *args],
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_check_file_matches_planner(tmp_path):
+    result = check_file(write(tmp_path, "a.py", CODE))
+    assert result["error"] is None
+    assert result["definitions"] == 6
+    assert result["missing"] == [
+        {"qualname": "missing", "type": "function", "line": 12},
+        {"qualname": "Missing", "type": "class", "line": 15},
+        {"qualname": "Missing.method", "type": "method", "line": 16},
+    ]
+    planned = plan_docstrings(cst.parse_module(CODE))
+    assert sorted(entry["qualname"] for entry in result["missing"]) == sorted(
+        target.qualname for target in planned
+    )
+
+
+def test_check_file_error(tmp_path):
+    result = check_file(write(tmp_path, "bad.py", "def f(:\n"))
+    assert result["error"]
+    assert result["definitions"] == 0
+
+
+def test_build_check_report(tmp_path):
+    files = [
+        write(tmp_path, "a.py", CODE),
+        write(tmp_path, "b.py", 'def f():\n    """Doc."""\n'),
+        write(tmp_path, "bad.py", "def f(:\n"),
+    ]
+    report = build_check_report(check_files(files, jobs=1), 50)
+    assert report["files"] == 3
+    assert report["definitions"] == 7
+    assert report["documented"] == 4
+    assert report["coverage"] == pytest.approx(400 / 7)
+    assert report["passed"]
+    assert [entry["path"] for entry in report["missing"]] == [files[0]] * 3
+    assert [entry["path"] for entry in report["errors"]] == [files[2]]
+    assert not build_check_report(check_files(files, jobs=1), 60)["passed"]
+    assert build_check_report([], 100)["coverage"] == 100.0
+
+
+def test_check_exit_code(tmp_path):
+    write(tmp_path, "a.py", CODE)
+    result = run_check(str(tmp_path), "--fail-under", "50")
+    assert result.returncode == 0, result.stderr
+    assert "a.py:12: function missing" in result.stdout
+    assert result.stdout.rstrip().endswith("passed.")
+    result = run_check(str(tmp_path), "--fail-under", "51")
+    assert result.returncode == 1
+    assert result.stdout.rstrip().endswith("failed.")
+
+
+def test_check_json_report(tmp_path):
+    write(tmp_path, "a.py", CODE)
+    result = run_check(str(tmp_path), "--report", "-", "--jobs", "1")
+    assert result.returncode == 1
+    report = json.loads(result.stdout)
+    assert report["documented"] == 3
+    assert report["fail_under"] == 100
+    assert not report["passed"]
@@ -0,0 +1,61 @@
+import shutil
+import pytest
+from docu_gen.core.file_processor import add_docstrings_to_file
+from docu_gen.core.index import ProjectIndex
+from docu_gen.core.scanner import split_top_level
+
+
+def process(directory, make_generator, index_path, **options):
+    generator = make_generator()
+    index = ProjectIndex(str(index_path))
+    try:
+        return {
+            path.name: add_docstrings_to_file(
+                str(path), generator=generator, index=index, **options
+            )
+            for path in sorted(directory.glob("*.py"))
+        }
+    finally:
+        index.close()
+
+
+def contents(directory):
+    return {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(directory.glob("*.py"))
+    }
+
+
+@pytest.mark.parametrize("chunk_lines", [1, 5, 40])
+def test_chunked_output_matches_whole_file_output(
+    project, tmp_path, make_generator, chunk_lines
+):
+    chunked = tmp_path / "chunked"
+    shutil.copytree(project, chunked)
+    assert any(
+        len(list(split_top_level(code, chunk_lines))) > 1
+        for code in contents(chunked).values()
+    )
+
+    whole_outcomes = process(
+        project, make_generator, tmp_path / "whole.sqlite3", chunk_lines=None
+    )
+    chunked_outcomes = process(
+        chunked, make_generator, tmp_path / "chunked.sqlite3", chunk_lines=chunk_lines
+    )
+    assert chunked_outcomes == whole_outcomes
+    assert "written" in whole_outcomes.values()
+    assert contents(chunked) == contents(project)
+
+    # Regenerating every docstring gives the same result as well.
+    options = {"override": True, "override_all": True}
+    assert process(
+        chunked,
+        make_generator,
+        tmp_path / "chunked.sqlite3",
+        chunk_lines=chunk_lines,
+        **options,
+    ) == process(
+        project, make_generator, tmp_path / "whole.sqlite3", chunk_lines=None, **options
+    )
+    assert contents(chunked) == contents(project)
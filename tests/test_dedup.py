@@ -0,0 +1,32 @@
+import libcst as cst
+from docu_gen.core.compactor import compact_snippet
+from docu_gen.core.dedup import analyze
+
+
+def _snippet(middle, name="total"):
+    """Compact a long function whose body only differs in the given middle."""
+    edge = [f"{name} += check(items, {n})" for n in range(10)]
+    body = [f"{name} = 0"] + edge + middle + edge + [f"return {name}"]
+    code = "def process(items):\n" + "".join(f"    {line}\n" for line in body)
+    return compact_snippet(cst.parse_module(code).body[0], max_tokens=120)
+
+
+def test_clones_with_different_elided_middles_are_not_merged():
+    snippets = [
+        _snippet([f"total += load(items, {n})" for n in range(20)]),
+        _snippet([f"total += save(items, {n})" for n in range(20)]),
+        _snippet([f"total += load(items, {n})" for n in range(30)]),
+    ]
+    kept = {snippet.split("#")[0] for snippet in snippets}
+    assert "statements elided" in snippets[0]
+    assert len(kept) == 1
+    assert len({analyze(snippet).fingerprint for snippet in snippets}) == 3
+
+
+def test_clones_with_renamed_locals_are_merged():
+    middle = [f"total += load(items, {n})" for n in range(20)]
+    renamed = [statement.replace("total", "result") for statement in middle]
+    assert (
+        analyze(_snippet(middle)).fingerprint
+        == analyze(_snippet(renamed, name="result")).fingerprint
+    )
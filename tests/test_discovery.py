@@ -0,0 +1,151 @@
+import os
+import pytest
+from docu_gen.core import discovery
+from docu_gen.core.discovery import ExcludeMatcher, GitIgnore, iter_python_files
+
+BASE = os.path.normcase(os.path.abspath("/repo"))
+
+# (rules, path relative to the base, whether it is a directory, expected match)
+RULES = [
+    (["*.py"], "a.py", False, True),
+    (["*.py"], "src/deep/a.py", False, True),
+    (["*.py"], "a.pyc", False, None),
+    (["# *.py", ""], "a.py", False, None),
+    (["build/"], "build", True, True),
+    (["build/"], "src/build", True, True),
+    (["build/"], "build", False, None),
+    (["/build"], "build", True, True),
+    (["/build"], "src/build", True, None),
+    (["src/*.py"], "src/a.py", False, True),
+    (["src/*.py"], "lib/src/a.py", False, None),
+    (["src/*.py"], "src/deep/a.py", False, None),
+    (["**/gen"], "gen", True, True),
+    (["**/gen"], "a/b/gen", True, True),
+    (["docs/**"], "docs/a/b.py", False, True),
+    (["docs/**"], "docs", True, None),
+    (["a/**/b.py"], "a/b.py", False, True),
+    (["a/**/b.py"], "a/x/y/b.py", False, True),
+    (["a?.py"], "ab.py", False, True),
+    (["a?.py"], "a/.py", False, None),
+    (["[ab].py"], "b.py", False, True),
+    (["[!ab].py"], "b.py", False, None),
+    (["*.py", "!keep.py"], "keep.py", False, False),
+    (["*.py", "!keep.py"], "other.py", False, True),
+    (["!keep.py", "*.py"], "keep.py", False, True),
+    (["\\!bang.py"], "!bang.py", False, True),
+    (["\\#hash.py"], "#hash.py", False, True),
+]
+
+
+@pytest.mark.parametrize("lines, path, is_dir, expected", RULES)
+def test_gitignore_rules(lines, path, is_dir, expected):
+    ignore = GitIgnore(BASE, lines)
+    assert ignore.match(os.path.join(BASE, *path.split("/")), is_dir) is expected
+
+
+def make_tree(root, paths):
+    for path in paths:
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text("", encoding="utf-8")
+
+
+def found(paths, root, exclude=(), **options):
+    return sorted(
+        os.path.relpath(path, root).replace(os.sep, "/")
+        for path in iter_python_files(paths, list(exclude), **options)
+    )
+
+
+def test_walk_applies_nested_and_parent_gitignores(tmp_path):
+    (tmp_path / ".git").mkdir()
+    make_tree(
+        tmp_path,
+        [
+            "project/a.py",
+            "project/generated.py",
+            "project/keep/generated.py",
+            "project/build/b.py",
+            "project/pkg/c.py",
+            "project/pkg/local.py",
+            "project/pkg/deep/local.py",
+            "project/node_modules/d.py",
+        ],
+    )
+    (tmp_path / ".gitignore").write_text("generated.py\nbuild/\n", encoding="utf-8")
+    (tmp_path / "project" / "keep" / ".gitignore").write_text(
+        "!generated.py\n", encoding="utf-8"
+    )
+    (tmp_path / "project" / "pkg" / ".gitignore").write_text(
+        "/local.py\n", encoding="utf-8"
+    )
+    # The walk starts below the repository root, whose .gitignore still applies.
+    project = str(tmp_path / "project")
+    assert found([project], project) == [
+        "a.py",
+        "keep/generated.py",
+        "pkg/c.py",
+        "pkg/deep/local.py",
+    ]
+    assert found([project], project, use_ignore_files=False) == [
+        "a.py",
+        "build/b.py",
+        "generated.py",
+        "keep/generated.py",
+        "node_modules/d.py",
+        "pkg/c.py",
+        "pkg/deep/local.py",
+        "pkg/local.py",
+    ]
+    # A file given explicitly is only left out by the exclusion patterns.
+    generated = os.path.join(project, "generated.py")
+    assert found([generated], project) == ["generated.py"]
+
+
+def test_parent_gitignores_stop_at_the_repository(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.py\n", encoding="utf-8")
+    (tmp_path / "repo" / ".git").mkdir(parents=True)
+    make_tree(tmp_path, ["repo/src/a.py"])
+    src = str(tmp_path / "repo" / "src")
+    assert found([src], src) == ["a.py"]
+
+
+def test_exclude_matcher(tmp_path):
+    root = os.path.normcase(str(tmp_path))
+    matcher = ExcludeMatcher(
+        [os.path.join(root, "build", "*"), os.path.join(root, "*", "gen_*.py")]
+    )
+    assert matcher.matches(os.path.join(root, "build", "deep", "a.py"))
+    assert matcher.matches(os.path.join(root, "pkg", "deep", "gen_a.py"))
+    assert not matcher.matches(os.path.join(root, "pkg", "a.py"))
+    assert matcher.excludes_directory(os.path.join(root, "build"))
+    assert matcher.excludes_directory(os.path.join(root, "build", "deep"))
+    # A pattern not ending with "*" only matches files, so it prunes nothing.
+    assert not matcher.excludes_directory(os.path.join(root, "pkg"))
+    assert not ExcludeMatcher([os.path.join(root, "pkg")]).excludes_directory(
+        os.path.join(root, "pkg")
+    )
+    assert not ExcludeMatcher([]).excludes_directory(root)
+
+
+def test_walk_prunes_excluded_directories(tmp_path, monkeypatch):
+    make_tree(
+        tmp_path,
+        ["a.py", "build/b.py", "build/deep/c.py", "vendor/d.py", "pkg/gen_e.py"],
+    )
+    walked = []
+    scandir = os.scandir
+
+    def record(path):
+        walked.append(os.path.relpath(path, tmp_path).replace(os.sep, "/"))
+        return scandir(path)
+
+    monkeypatch.setattr(discovery.os, "scandir", record)
+    root = str(tmp_path)
+    exclude = [
+        os.path.join(root, "build", "*"),
+        os.path.join(root, "vendor"),
+        os.path.join(root, "*", "gen_*.py"),
+    ]
+    assert found([root], root, exclude) == ["a.py", "vendor/d.py"]
+    assert sorted(walked) == [".", "pkg", "vendor"]
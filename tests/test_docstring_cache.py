@@ -0,0 +1,109 @@
+import sqlite3
+import pytest
+from docu_gen.utils.docstring_cache import DocstringCache, normalize_snippet
+
+CODE = '''def f(a):
+    text = """first
+
+second"""
+
+    return a + len(text)
+'''
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DocstringCache(path=str(tmp_path / "cache" / "docstrings.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def _last_used(cache, key):
+    with sqlite3.connect(cache.path) as connection:
+        return connection.execute(
+            "SELECT last_used FROM docstrings WHERE key = ?", (key,)
+        ).fetchone()[0]
+
+
+def test_normalize_snippet_ignores_formatting_outside_strings():
+    indented = "\r\n".join(
+        "    " + line + "  " if line else "" for line in CODE.split("\n")
+    )
+    assert normalize_snippet(indented) == normalize_snippet(CODE)
+    assert "\n\n" not in normalize_snippet(CODE).replace('"""first\n\nsecond', "")
+    assert '"""first\n\nsecond"""' in normalize_snippet(CODE)
+
+
+def test_make_key_is_stable_and_keeps_blank_lines_in_strings():
+    key = DocstringCache.make_key(CODE, "function", "gpt-3.5-turbo")
+    assert key == DocstringCache.make_key(
+        CODE.replace("\n\n    return", "\n    return"), "function", "gpt-3.5-turbo"
+    )
+    assert key != DocstringCache.make_key(
+        CODE.replace("first\n\nsecond", "first\nsecond"), "function", "gpt-3.5-turbo"
+    )
+    assert key != DocstringCache.make_key(CODE, "method", "gpt-3.5-turbo")
+    assert key != DocstringCache.make_key(CODE, "function", "gpt-4o-mini")
+    assert key != DocstringCache.make_key(
+        CODE, "function", "gpt-3.5-turbo", prompt_version="0"
+    )
+
+
+def test_normalize_snippet_keeps_blank_lines_of_untokenizable_code():
+    code = 'def f(:\n    x = """\n\n'
+    assert normalize_snippet(code) == code
+
+
+def test_get_and_set(cache):
+    assert cache.get("missing") is None
+    cache.set("key", "A docstring.")
+    assert cache.get("key") == "A docstring."
+    cache.set("key", "Another docstring.")
+    assert cache.get("key") == "Another docstring."
+
+
+def test_touches_are_batched(tmp_path, monkeypatch):
+    cache = DocstringCache(path=str(tmp_path / "cache.sqlite3"), touch_batch=3)
+    monkeypatch.setattr("time.time", lambda: 1000.0)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    monkeypatch.setattr("time.time", lambda: 2000.0)
+    cache.get("a")
+    cache.get("b")
+    assert _last_used(cache, "a") == 1000.0
+    cache.get("c")
+    assert [_last_used(cache, key) for key in "abc"] == [2000.0] * 3
+
+    monkeypatch.setattr("time.time", lambda: 3000.0)
+    cache.get("a")
+    cache.close()
+    assert _last_used(cache, "a") == 3000.0
+
+
+def test_evict_removes_old_and_least_recently_used_entries(tmp_path, monkeypatch):
+    cache = DocstringCache(
+        path=str(tmp_path / "cache.sqlite3"), max_entries=2, max_age_days=1
+    )
+    now = 10 * 86400.0
+    monkeypatch.setattr("time.time", lambda: now - 2 * 86400)
+    cache.set("old", "old")
+    for offset, key in enumerate(("a", "b", "c")):
+        monkeypatch.setattr("time.time", lambda offset=offset: now - 100 + offset)
+        cache.set(key, key)
+    monkeypatch.setattr("time.time", lambda: now)
+    # A pending touch counts before entries are evicted.
+    cache.get("a")
+    assert cache.evict() == 2
+    assert cache.get("old") is None
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert cache.get("c") == "c"
+    cache.close()
+
+
+def test_compact(cache):
+    for number in range(50):
+        cache.set(str(number), "x" * 1000)
+    cache.max_entries = 10
+    assert cache.compact() == 40
+    assert cache.get("49") == "x" * 1000
@@ -0,0 +1,44 @@
+import os
+import sys
+import subprocess
+import pytest
+from benchmarks.import_time import ENTRY_POINTS, measure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only needed once a file needs docstrings or a key is fetched.
+HEAVY = ("libcst", "openai", "azure")
+
+
+def _imported_modules(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "cumulative" not in line
+    }
+
+
+@pytest.mark.parametrize("module", ["docu_gen.cli", "docu_gen.core.runner"])
+def test_entry_point_does_not_import_heavy_modules(module):
+    imported = _imported_modules(module)
+    assert module in imported
+    heavy = {name for name in imported if name.split(".")[0] in HEAVY}
+    assert not heavy
+
+
+# The budgets of the benchmark are for a quiet machine; the test only catches
+# regressions such as an eager import of a heavy module.
+TOLERANCE = 5
+
+
+@pytest.mark.parametrize("module, budget, forbidden", ENTRY_POINTS)
+def test_entry_point_import_time(module, budget, forbidden):
+    best = min(measure(module)[0] for _ in range(3))
+    assert 0 < best <= budget * TOLERANCE
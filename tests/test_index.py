@@ -0,0 +1,135 @@
+import os
+from docu_gen.core.file_processor import add_docstrings_to_file
+from docu_gen.core.index import ProjectIndex, hash_content
+from docu_gen.core.journal import Journal
+from docu_gen.core.scanner import scan_definitions
+
+DOCUMENTED = '''def f(a):
+    """Return a.
+
+    Args:
+        a (int): The value.
+    """
+    return a
+'''
+
+UNDOCUMENTED = "def g(b):\n    return b\n"
+
+
+def _record(index, path, source_code, written=()):
+    path.write_text(source_code, encoding="utf-8")
+    definitions = scan_definitions(source_code, with_drift=True)
+    index.record(str(path), hash_content(source_code), definitions, written)
+
+
+def test_is_up_to_date_follows_mtime_and_size(tmp_path):
+    index = ProjectIndex(str(tmp_path / "index.sqlite3"))
+    path = tmp_path / "module.py"
+    assert not os.path.exists(index.path)
+    _record(index, path, DOCUMENTED)
+    assert index.is_up_to_date(str(path))
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not index.is_up_to_date(str(path))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert index.is_up_to_date(str(path))
+
+    path.write_text(DOCUMENTED + "\n", encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert not index.is_up_to_date(str(path))
+    index.close()
+
+
+def test_undocumented_file_is_never_up_to_date(tmp_path):
+    index = ProjectIndex(str(tmp_path / "index.sqlite3"))
+    path = tmp_path / "module.py"
+    _record(index, path, DOCUMENTED + UNDOCUMENTED)
+    assert not index.is_up_to_date(str(path))
+    assert not index.has_content(str(path), hash_content(DOCUMENTED + UNDOCUMENTED))
+    assert not index.is_up_to_date(str(tmp_path / "unknown.py"), os.stat(path))
+    index.close()
+
+
+def test_has_content_refreshes_the_metadata(tmp_path):
+    index = ProjectIndex(str(tmp_path / "index.sqlite3"))
+    path = tmp_path / "module.py"
+    _record(index, path, DOCUMENTED)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert not index.is_up_to_date(str(path))
+    assert not index.has_content(str(path), hash_content(DOCUMENTED + "\n"))
+    assert index.has_content(str(path), hash_content(DOCUMENTED))
+    assert index.is_up_to_date(str(path))
+    index.close()
+
+
+def test_record_tracks_stale_docstrings(tmp_path):
+    index = ProjectIndex(str(tmp_path / "index.sqlite3"))
+    path = tmp_path / "module.py"
+    _record(index, path, DOCUMENTED)
+    assert index.is_up_to_date(str(path), override=True)
+
+    changed = DOCUMENTED.replace("return a", "return a * 2")
+    path.write_text(changed, encoding="utf-8")
+    definitions = scan_definitions(changed, with_drift=True)
+    assert index.drifted_definitions(str(path), definitions) == {"f"}
+    index.record(str(path), hash_content(changed), definitions)
+    assert index.is_up_to_date(str(path))
+    assert not index.is_up_to_date(str(path), override=True)
+    assert not index.has_content(str(path), hash_content(changed), override=True)
+
+    # Regenerating the docstring records it for the new body.
+    index.record(str(path), hash_content(changed), definitions, written={"f"})
+    assert index.drifted_definitions(str(path), definitions) == set()
+    assert index.is_up_to_date(str(path), override=True)
+    index.close()
+
+
+def test_file_outcomes(project, tmp_path, make_generator, requests):
+    index = ProjectIndex(str(tmp_path / "index.sqlite3"))
+    path = str(project / "complex_script.py")
+    assert add_docstrings_to_file(path, generator=make_generator(), index=index) == (
+        "written"
+    )
+    made = len(requests)
+    assert made
+    assert add_docstrings_to_file(path, generator=make_generator(), index=index) == (
+        "indexed"
+    )
+
+    # A touched file is read, found unchanged by its content and skipped.
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert add_docstrings_to_file(path, generator=make_generator(), index=index) == (
+        "indexed"
+    )
+    assert index.is_up_to_date(path)
+    assert len(requests) == made
+
+    # Without any docstring generated, the file is left unchanged.
+    other = str(project / "simple_script.py")
+    offline = make_generator(offline=True)
+    assert add_docstrings_to_file(other, generator=offline, index=index) == (
+        "unchanged"
+    )
+    assert not index.is_up_to_date(other)
+    index.close()
+
+
+def test_resumed_outcome(project, tmp_path, make_generator, requests):
+    path = str(project / "simple_script.py")
+    journal = Journal(str(tmp_path / "journal"))
+    assert add_docstrings_to_file(
+        path, generator=make_generator(), journal=journal
+    ) == ("written")
+    journal.close()
+
+    resumed = Journal(str(tmp_path / "journal"))
+    resumed.replay()
+    made = len(requests)
+    assert add_docstrings_to_file(
+        path, generator=make_generator(), journal=resumed
+    ) == ("resumed")
+    assert len(requests) == made
+    resumed.remove()
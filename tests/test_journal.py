@@ -0,0 +1,149 @@
+import os
+import json
+import pytest
+from docu_gen.core import file_processor
+from docu_gen.core.file_processor import add_docstrings_to_file
+from docu_gen.core.index import hash_content
+from docu_gen.core.journal import Journal
+from docu_gen.core.scanner import count_undocumented
+
+
+def write_segment(directory, name, records, tail=""):
+    directory.mkdir(exist_ok=True)
+    with open(directory / name, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write(tail)
+
+
+def test_record_and_replay(tmp_path):
+    source_code = "def f():\n    pass\n"
+    journal = Journal(str(tmp_path / "journal"))
+    assert not journal.exists()
+    journal.record_docstring("key", "Doc.")
+    journal.record_file(str(tmp_path / "a.py"), hash_content(source_code))
+    journal.close()
+    assert os.listdir(tmp_path / "journal") == [f"{os.getpid()}.jsonl"]
+
+    replayed = Journal(str(tmp_path / "journal"))
+    assert replayed.exists()
+    assert replayed.replay() == (1, 1)
+    assert replayed.get("key") == "Doc."
+    assert replayed.get("other") is None
+    assert replayed.is_committed(str(tmp_path / "a.py"), source_code)
+    # The path is resolved, and a file changed since it was committed is not.
+    assert replayed.is_committed(str(tmp_path / "." / "a.py"), source_code)
+    assert not replayed.is_committed(str(tmp_path / "a.py"), source_code + "x = 1\n")
+    assert not replayed.is_committed(str(tmp_path / "b.py"), source_code)
+
+
+def test_replay_merges_segments_and_ignores_truncated_lines(tmp_path):
+    directory = tmp_path / "journal"
+    path = os.path.realpath(str(tmp_path / "a.py"))
+    write_segment(
+        directory,
+        "100.jsonl",
+        [{"type": "docstring", "key": "a", "docstring": "A."}],
+        tail='{"type": "docstring", "key": "b", "docs',
+    )
+    write_segment(
+        directory,
+        "200.jsonl",
+        [
+            {"type": "docstring", "key": "c", "docstring": "C."},
+            {"type": "file", "path": path, "content_hash": hash_content("x = 1\n")},
+        ],
+    )
+    (directory / "notes.txt").write_text("not a segment\n", encoding="utf-8")
+
+    journal = Journal(str(directory))
+    assert journal.replay() == (2, 1)
+    assert journal.get("a") == "A."
+    assert journal.get("b") is None
+    assert journal.get("c") == "C."
+    assert journal.is_committed(path, "x = 1\n")
+
+
+def test_remove(tmp_path):
+    directory = tmp_path / "journal"
+    write_segment(
+        directory, "100.jsonl", [{"type": "docstring", "key": "a", "docstring": "A."}]
+    )
+    journal = Journal(str(directory))
+    journal.replay()
+    journal.record_docstring("b", "B.")
+    journal.remove()
+    assert not journal.exists()
+    assert journal.get("a") is None
+    assert os.listdir(directory) == []
+    # A removed journal can be written again.
+    journal.record_docstring("c", "C.")
+    journal.close()
+    assert Journal(str(directory)).replay() == (1, 0)
+
+
+def test_resume_repeats_no_request_and_no_write(
+    project, tmp_path, make_generator, requests, monkeypatch
+):
+    files = sorted(
+        str(path)
+        for path in project.glob("*.py")
+        if count_undocumented(path.read_text(encoding="utf-8"))
+    )
+    directory = tmp_path / "journal"
+    writes = []
+    write_if_valid = file_processor._write_if_valid
+
+    def record_write(file_path, source_code, modified_code, report=None):
+        result = write_if_valid(file_path, source_code, modified_code, report)
+        if result[0] == "written":
+            writes.append(file_path)
+        return result
+
+    monkeypatch.setattr(file_processor, "_write_if_valid", record_write)
+
+    # The interrupted run commits the first files, then is killed once the
+    # docstrings of the next one arrive and before it is written.
+    journal = Journal(str(directory))
+    generator = make_generator(journal=journal)
+    done = 2
+    for file_path in files[:done]:
+        add_docstrings_to_file(
+            file_path, generator=generator, journal=journal, chunk_lines=None
+        )
+
+    def interrupt(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(file_processor, "_write_if_valid", interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        add_docstrings_to_file(
+            files[done], generator=generator, journal=journal, chunk_lines=None
+        )
+    journal.close()
+    with open(directory / f"{os.getpid()}.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"type": "docstring", "key": "cut sh')
+    first_requests = [json.dumps(request["messages"]) for request in requests]
+    assert first_requests
+    assert len(writes) == done
+
+    monkeypatch.setattr(file_processor, "_write_if_valid", record_write)
+    del requests[:]
+    resumed = Journal(str(directory))
+    assert resumed.replay()[1] == done
+    generator = make_generator(journal=resumed)
+    outcomes = [
+        add_docstrings_to_file(
+            file_path, generator=generator, journal=resumed, chunk_lines=None
+        )
+        for file_path in files
+    ]
+    resumed.close()
+
+    assert outcomes[:done] == ["resumed"] * done
+    assert files[done] in writes
+    assert len(writes) == len(set(writes))
+    assert requests
+    assert not set(first_requests) & {
+        json.dumps(request["messages"]) for request in requests
+    }
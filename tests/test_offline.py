@@ -0,0 +1,97 @@
+import json
+from docu_gen.core.offline import export_batch, ingest_batch
+from docu_gen.core.router import ModelRouter
+from docu_gen.core.runner import process_files
+from docu_gen.utils import backends
+from docu_gen.utils.batch import LocalBatchService, read_batch_results
+from docu_gen.utils.docstring_cache import DocstringCache
+
+
+def _options(tmp_path, **options):
+    return dict(
+        {
+            "cache_path": str(tmp_path / "cache.sqlite3"),
+            "index_path": None,
+            "concurrency": 4,
+            "model_family": "deterministic",
+            "routing_tiers": ModelRouter().tiers,
+        },
+        **options,
+    )
+
+
+def _respond(body):
+    return backends.complete_deterministically(**body).choices[0].message.content
+
+
+def test_local_batch_service_round_trip(tmp_path):
+    input_path = tmp_path / "input.jsonl"
+    input_path.write_text(
+        json.dumps({"custom_id": "a", "body": {"model": "m", "messages": []}})
+        + "\n\n"
+        + json.dumps({"custom_id": "b", "body": {"model": "m", "messages": []}})
+        + "\n",
+        encoding="utf-8",
+    )
+    service = LocalBatchService(lambda body: f"answer for {body['model']}")
+    assert service.run(str(input_path), str(tmp_path / "output.jsonl")) == 2
+    assert read_batch_results(str(tmp_path / "output.jsonl")) == {
+        "a": "answer for m",
+        "b": "answer for m",
+    }
+
+
+def test_read_batch_results_skips_failed_requests(tmp_path):
+    path = tmp_path / "output.jsonl"
+    lines = [
+        {"custom_id": "a", "error": {"message": "expired"}, "response": None},
+        {"custom_id": "b", "error": None, "response": {"status_code": 500}},
+        {
+            "custom_id": "c",
+            "error": None,
+            "response": {
+                "status_code": 200,
+                "body": {"choices": [{"message": {"content": '"""Doc."""'}}]},
+            },
+        },
+    ]
+    path.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    assert read_batch_results(str(path)) == {"c": '"""Doc."""'}
+
+
+def test_export_ingest_then_run_makes_no_request(project, tmp_path, requests):
+    options = _options(tmp_path)
+    files = sorted(str(path) for path in project.glob("*.py"))
+    input_path = str(tmp_path / "input.jsonl")
+    output_path = str(tmp_path / "output.jsonl")
+
+    exported = export_batch(files, input_path, options)
+    assert exported
+    with open(input_path, encoding="utf-8") as f:
+        models = {json.loads(line)["body"]["model"] for line in f}
+    # The routing tiers resolve to the backend's own model.
+    assert models == {"deterministic"}
+    assert LocalBatchService(_respond).run(input_path, output_path) == exported
+
+    cache = DocstringCache(path=options["cache_path"])
+    assert ingest_batch(output_path, cache, options) == exported
+    cache.close()
+    assert export_batch(files, input_path, options) == 0
+
+    del requests[:]
+    results = process_files(files, dict(options, offline=True))
+    assert requests == []
+    statuses = {status for _, status, _ in results}
+    assert "written" in statuses
+    assert statuses <= {"written", "skipped", "documented"}
+    assert export_batch(files, input_path, options) == 0
+
+
+def test_export_skips_documented_and_indexed_files(project, tmp_path, requests):
+    options = _options(tmp_path, index_path=str(tmp_path / "index.sqlite3"))
+    files = sorted(str(path) for path in project.glob("*.py"))
+    results = process_files(files, options)
+    assert {status for _, status, _ in results} & {"written"}
+    assert export_batch(files, str(tmp_path / "input.jsonl"), options) == 0
+    options = dict(options, cache_path=None)
+    assert export_batch(files, str(tmp_path / "input.jsonl"), options) == 0
@@ -0,0 +1,44 @@
+import libcst as cst
+import pytest
+from docu_gen.core.docstring_adder import apply_docstrings, plan_docstrings
+from docu_gen.core.docstring_remover import DocstringRemover
+from docu_gen.core.scanner import count_undocumented, scan_definitions
+
+CODES = [
+    'def f():\n    """Doc."""\n    return 1\n',
+    "def f():\n    return 1\n",
+    'def f():\n    "a" "b"\n    return 1\n',
+    'def f():\n    ("a"\n     "b")\n    return 1\n',
+    'def f():\n    f"{1}"\n    return 1\n',
+    'def f():\n    "a" f"{1}"\n    return 1\n',
+    'def f():\n    b"doc"\n    return 1\n',
+    "def f():\n    x = 1\n    return x\n",
+    "def f(): return 1\n",
+    'def f(): "doc"\n',
+    'def f(): "doc"; return 1\n',
+    "class A: pass\n",
+    "class A: x = 1; y = 2\n",
+    'class A:\n    """Doc."""\n\n    def m(self): pass\n\n    class B:\n        "b"\n',
+    "class A:\n    def m(self):\n        def inner():\n            '''Doc.'''\n",
+    'async def f():\n    """Doc."""\n',
+    "async def f(): pass\n",
+]
+
+
+@pytest.mark.parametrize("code", CODES)
+def test_scanner_matches_planner(code):
+    targets = plan_docstrings(cst.parse_module(code))
+    assert count_undocumented(code) == len(targets)
+    undocumented = [d.qualname for d in scan_definitions(code) if not d.has_docstring]
+    assert sorted(undocumented) == sorted(target.qualname for target in targets)
+
+
+@pytest.mark.parametrize("code", CODES)
+def test_planned_docstrings_apply(code):
+    module = cst.parse_module(code)
+    targets = plan_docstrings(module, override=True)
+    result = apply_docstrings(module, {t.index: "Doc." for t in targets}).code
+    assert count_undocumented(result) == 0
+    assert count_undocumented(module.visit(DocstringRemover()).code) == len(
+        scan_definitions(code)
+    )
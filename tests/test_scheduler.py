@@ -0,0 +1,159 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from docu_gen.utils import scheduler as scheduler_module
+from docu_gen.utils.scheduler import (
+    RequestScheduler,
+    TokenBucket,
+    is_retryable_error,
+    is_throttling_error,
+    retry_after,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler_module.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(60)
+    asyncio.run(bucket.acquire(60))
+    assert bucket.tokens == 0
+    clock.now += 10
+    bucket._refill()
+    assert bucket.tokens == pytest.approx(10)
+    clock.now += 3600
+    bucket._refill()
+    assert bucket.tokens == 60
+
+
+def test_token_bucket_waits_for_missing_tokens(clock, monkeypatch):
+    slept = []
+
+    async def sleep(delay):
+        slept.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(scheduler_module.asyncio, "sleep", sleep)
+    bucket = TokenBucket(120)
+    asyncio.run(bucket.acquire(120))
+    # Amounts above the capacity are capped to it.
+    asyncio.run(bucket.acquire(1000))
+    assert slept == [pytest.approx(60)]
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, None),
+        ({"retry-after": "2"}, 2.0),
+        ({"retry-after-ms": "1500", "retry-after": "9"}, 1.5),
+        ({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, None),
+    ],
+)
+def test_retry_after(headers, expected):
+    assert retry_after(StatusError(429, headers)) == expected
+
+
+@pytest.mark.parametrize(
+    "error, retryable, throttling",
+    [
+        (StatusError(429), True, True),
+        (StatusError(503, {"retry-after": "1"}), True, True),
+        (StatusError(500), True, False),
+        (StatusError(408), True, False),
+        (asyncio.TimeoutError(), True, False),
+        (ConnectionError(), True, False),
+        (StatusError(400), False, False),
+        (ValueError(), False, False),
+    ],
+)
+def test_error_classification(error, retryable, throttling):
+    assert is_retryable_error(error) is retryable
+    assert is_throttling_error(error) is throttling
+
+
+def _failing(errors):
+    """Build a request raising the given errors before succeeding."""
+    errors = list(errors)
+
+    async def request():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    return lambda: request()
+
+
+def test_throttling_halves_the_limit_and_pauses(monkeypatch):
+    monkeypatch.setattr(scheduler_module.random, "uniform", lambda low, high: 0.0)
+    scheduler = RequestScheduler(max_concurrency=8)
+    result = asyncio.run(
+        scheduler.run(
+            _failing([StatusError(429), StatusError(429, {"retry-after": "0"})])
+        )
+    )
+    assert result == "ok"
+    # Halved twice, then grown additively by the success.
+    assert scheduler.limit == pytest.approx(2 + 1 / 2)
+
+
+def test_server_faults_keep_the_limit(monkeypatch):
+    monkeypatch.setattr(scheduler_module.random, "uniform", lambda low, high: 0.0)
+    scheduler = RequestScheduler(max_concurrency=8)
+    errors = [StatusError(500), asyncio.TimeoutError(), StatusError(502)]
+    assert asyncio.run(scheduler.run(_failing(errors))) == "ok"
+    assert scheduler.limit == 8
+    assert scheduler._paused_until == 0.0
+
+
+def test_retries_are_bounded():
+    scheduler = RequestScheduler(max_concurrency=2, max_retries=0)
+    with pytest.raises(StatusError):
+        asyncio.run(scheduler.run(_failing([StatusError(429)])))
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.run(_failing([ValueError()])))
+    assert scheduler._in_flight == 0
+
+
+def test_concurrency_is_bounded_and_largest_requests_go_first():
+    scheduler = RequestScheduler(max_concurrency=2)
+    running = []
+    started = []
+
+    async def request(name):
+        running.append(name)
+        started.append(name)
+        assert len(running) <= 2
+        await asyncio.sleep(0.01)
+        running.remove(name)
+        return name
+
+    async def main():
+        return await asyncio.gather(
+            *(
+                scheduler.run(lambda name=name: request(name), tokens)
+                for name, tokens in (("a", 1), ("b", 1), ("c", 5), ("d", 50))
+            )
+        )
+
+    assert asyncio.run(main()) == ["a", "b", "c", "d"]
+    assert started == ["a", "b", "d", "c"]
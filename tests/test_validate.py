@@ -0,0 +1,93 @@
+import pytest
+from docu_gen.core.validate import (
+    validate_only_docstrings_added,
+    validate_only_docstrings_added_libcst,
+)
+
+ORIGINAL = """import os
+
+
+class Store:
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+
+async def load(store, *, retries=3):
+    value = "a\\n\\nb"
+    return [store.name for _ in range(retries)]
+"""
+
+# (modified code, whether only docstrings were added or modified)
+CASES = [
+    (ORIGINAL, True),
+    (
+        ORIGINAL.replace(
+            "class Store:\n", 'class Store:\n    """A store on disk."""\n'
+        ),
+        True,
+    ),
+    (
+        ORIGINAL.replace(
+            "    def __init__(self, path):\n",
+            '    def __init__(self, path):\n        """Initialize.\n\n'
+            '        Args:\n            path (str): The path.\n        """\n',
+        ),
+        True,
+    ),
+    (
+        ORIGINAL.replace(
+            "async def load(store, *, retries=3):\n",
+            "async def load(store, *, retries=3):\n    '''Load the store.'''\n",
+        ),
+        True,
+    ),
+    ('"""Module docstring."""\n' + ORIGINAL, True),
+    (
+        ORIGINAL.replace(
+            "    def name(self):\n", '    def name(self):\n    \t"""Tab indented."""\n'
+        ).replace("\t", "    "),
+        True,
+    ),
+    (ORIGINAL.replace("retries=3", "retries=4"), False),
+    (ORIGINAL.replace("return [", "return  ["), False),
+    (ORIGINAL.replace("import os\n", "import os  # comment\n"), False),
+    (ORIGINAL.replace('"a\\n\\nb"', '"a\\n b"'), False),
+    (ORIGINAL.replace("\n\n\nasync", "\n\nasync"), False),
+    (
+        ORIGINAL.replace(
+            "class Store:\n", 'class Store:\n    """A store on disk."""\n\n'
+        ),
+        False,
+    ),
+    (
+        ORIGINAL.replace(
+            "        self.path = path\n",
+            '        self.path = path\n        """Not a docstring."""\n',
+        ),
+        False,
+    ),
+    (
+        ORIGINAL.replace(
+            "    value = ", '    """Load the store."""\n    value = '
+        ).replace("return [", "return  ["),
+        False,
+    ),
+]
+
+
+@pytest.mark.parametrize("modified_code, expected", CASES)
+def test_validators_agree(modified_code, expected):
+    assert validate_only_docstrings_added(ORIGINAL, modified_code) is expected
+    assert validate_only_docstrings_added_libcst(ORIGINAL, modified_code) is expected
+
+
+def test_validators_agree_on_removed_docstring():
+    documented = ORIGINAL.replace(
+        "class Store:\n", 'class Store:\n    """A store on disk."""\n'
+    )
+    assert validate_only_docstrings_added(documented, ORIGINAL)
+    assert validate_only_docstrings_added_libcst(documented, ORIGINAL)